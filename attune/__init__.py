@@ -3,18 +3,29 @@
 
 from .__version__ import *
 from ._arrangement import *
+from ._batch import *
+from ._cache import *
+from ._diff import *
 from ._discrete_tune import *
+from ._history import *
 from ._holistic import *
 from ._instrument import *
 from ._intensity import *
 from ._map import *
+from ._metrics import *
 from ._setable import *
 from ._note import *
 from ._offset import *
 from ._open import *
+from ._plan import *
 from ._rename import *
+from ._render import *
 from ._setpoint import *
+from ._simulate import *
 from ._store import *
+from ._stream import *
+from ._sweep import *
+from ._trace import *
 from ._tune import *
 from ._tune_test import *
 from .io import *
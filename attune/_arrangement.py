@@ -1,6 +1,7 @@
 __all__ = ["Arrangement"]
 
 
+import hashlib
 from typing import Dict, Union
 
 import numpy as np
@@ -32,12 +33,16 @@ class Arrangement:
             from other Arrangements which may depend on this one.
         tunes: Dict[str, Tune]
             Mapping of names to Tune objects which compose the Arrangement
+
+        Arrangements are treated as immutable: equality first compares a digest of the
+        name and tunes, which is computed once, and only compares tunes if they differ.
         """
         self._name: str = name
         self._tunes: Dict[str, Union[DiscreteTune, Tune]] = {
             k: mktune(v) if isinstance(v, dict) else v for k, v in tunes.items()
         }
         self._ind_units: str = "nm"
+        self._digest = None
 
     def __repr__(self):
         return f"Arrangement({repr(self.name)}, {repr(self.tunes)})"
@@ -46,11 +51,42 @@ class Arrangement:
         return self.tunes[key]
 
     def __eq__(self, other):
+        if not isinstance(other, Arrangement):
+            return False
+        if self.digest == other.digest:
+            return True
         if self.name != other.name:
             return False
-        if self.tunes != other.tunes:
+        return self.tunes == other.tunes
+
+    def isclose(self, other, *, rtol=1e-05, atol=1e-08):
+        """Whether another arrangement has the same name and approximately the same tunes.
+
+        Parameters
+        ----------
+        other: Arrangement
+            The arrangement to compare to.
+        rtol: float, optional
+            Relative tolerance, as in ``numpy.allclose``.
+        atol: float, optional
+            Absolute tolerance, as in ``numpy.allclose``.
+        """
+        if not isinstance(other, Arrangement):
+            return False
+        if self.name != other.name or self.keys() != other.keys():
             return False
-        return True
+        return all(v.isclose(other[k], rtol=rtol, atol=atol) for k, v in self.items())
+
+    @property
+    def digest(self):
+        """Hex digest of the name and tunes of the arrangement."""
+        if self._digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            h.update(repr(self.name).encode())
+            for k in sorted(self._tunes):
+                h.update(repr((k, self._tunes[k].digest)).encode())
+            self._digest = h.hexdigest()
+        return self._digest
 
     @property
     def independent(self):
@@ -82,6 +118,46 @@ class Arrangement:
         """Return the names and tunes in the arrangment."""
         return self.tunes.items()
 
+    def evolve(self, tune, *, independent=None, dependent=None):
+        """Create a new Arrangement with one continuous tune replaced.
+
+        All other tunes are shared with this arrangement, not copied.
+        Arrays are used as given, without conversion to lists.
+
+        Parameters
+        ----------
+        tune: str
+            The name of the tune to replace (or add).
+        independent: 1D array-like, optional
+            The new independent values.
+            Defaults to the independent values of the existing tune.
+        dependent: 1D array-like, optional
+            The new dependent values.
+            Defaults to the existing tune evaluated at ``independent``,
+            i.e. resampling the existing tune.
+
+        Returns
+        -------
+        Arrangement
+            The new arrangement.
+        """
+        if tune in self._tunes:
+            old = self._tunes[tune]
+            if isinstance(old, DiscreteTune):
+                raise TypeError(f"Cannot evolve DiscreteTune '{tune}'")
+            dep_units = old.dep_units
+            if independent is None:
+                independent = old.independent
+            if dependent is None:
+                dependent = old(independent)
+        else:
+            if independent is None or dependent is None:
+                raise ValueError(f"New tune '{tune}' requires both independent and dependent")
+            dep_units = None
+        tunes = self._tunes.copy()
+        tunes[tune] = Tune(independent, dependent, dep_units=dep_units)
+        return Arrangement(self._name, tunes)
+
     def as_dict(self):
         """Dictionary representation of the Arrangement"""
         out = {}
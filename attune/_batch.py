@@ -0,0 +1,213 @@
+"""Run many workups, in parallel, chaining their results into one instrument."""
+
+__all__ = ["run_batch"]
+
+
+import argparse
+import concurrent.futures
+import json
+import pathlib
+import sys
+import time
+
+import WrightTools as wt
+
+from ._diff import diff, patch
+from ._history import SpilledData
+from ._holistic import holistic
+from ._intensity import intensity
+from ._open import open as open_
+from ._setpoint import setpoint
+from ._transition import Transition
+from ._tune_test import tune_test
+
+
+WORKUPS = {
+    "holistic": holistic,
+    "intensity": intensity,
+    "setpoint": setpoint,
+    "tune_test": tune_test,
+}
+
+# keyword arguments of the workups given by run_batch itself
+RESERVED = ("data", "instrument", "plot", "autosave", "save_directory")
+
+
+def run_batch(jobs, instrument, *, processes=None, save_directory=None):
+    """Run a batch of workups, chaining the new instruments into one.
+
+    Jobs modifying different arrangements are independent, and run concurrently.
+    A job modifying the same arrangement as an earlier job works up the result of
+    that job, as if the jobs were run one after another in the order given.
+    Results are applied in the order given, so the final instrument does not depend on
+    which jobs finish first.
+    Its transitions record each job in turn, with the path of its data (and the axes, if
+    any) in the metadata. The data of each transition is read back from that file when
+    accessed, as saved rather than transformed to the axes.
+
+    Parameters
+    ----------
+    jobs: list of dict
+        Each with keys
+
+        * "data": path of the wt5 file to work up
+        * "workup": one of "holistic", "intensity", "setpoint" and "tune_test"
+        * "parameters": keyword arguments of the workup, including "arrangement", but not
+          "data", "instrument", "plot", "autosave" and "save_directory", which are given by
+          the batch
+        * "axes" (optional): expressions to transform the data to before the workup
+
+    instrument: attune.Instrument
+        The instrument to modify.
+    processes: int, optional
+        Number of worker processes. Default is None, which runs jobs in this process.
+    save_directory: Path-like, optional
+        If given, each job saves its instrument and figure to a subdirectory,
+        named by its index and workup. Default is None, which neither plots nor saves.
+
+    Returns
+    -------
+    attune.Instrument
+        The instrument with the result of every job applied.
+    list of dict
+        Report of each job, in the order given, with keys "data", "workup",
+        "arrangement", "wave" (jobs of a wave run concurrently) and "seconds".
+    """
+    jobs = [dict(job) for job in jobs]
+    for job in jobs:
+        if job["workup"] not in WORKUPS:
+            raise ValueError(f"Unknown workup '{job['workup']}'")
+        reserved = [key for key in RESERVED if key in job.get("parameters", {})]
+        if reserved:
+            raise ValueError(f"Parameters {reserved} are given by run_batch, not by jobs")
+        job["data"] = str(pathlib.Path(job["data"]).absolute())
+        job.setdefault("parameters", {})
+
+    # a job waits for the last earlier job of the same arrangement
+    waves = []
+    last = {}
+    for job in jobs:
+        arrangement = job["parameters"]["arrangement"]
+        wave = last.get(arrangement, -1) + 1
+        last[arrangement] = wave
+        waves.append(wave)
+
+    report = [None] * len(jobs)
+    executor = None
+    if processes is not None and processes > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=processes)
+    try:
+        for wave in range(max(waves, default=-1) + 1):
+            indices = [i for i, w in enumerate(waves) if w == wave]
+            sent = instrument
+            if executor is not None:
+                # workers need not be sent the history, _chain links the results to it here
+                sent = instrument.evolve(transition=Transition("read"))
+            args = [(jobs[i], sent, _job_directory(save_directory, i, jobs[i])) for i in indices]
+            if executor is None:
+                results = [_run_job(*a) for a in args]
+            else:
+                results = list(executor.map(_run_job, *zip(*args)))
+            start = instrument
+            for i, (result, seconds) in zip(indices, results):
+                instrument = _chain(instrument, start, result, jobs[i])
+                report[i] = {
+                    "data": jobs[i]["data"],
+                    "workup": jobs[i]["workup"],
+                    "arrangement": jobs[i]["parameters"]["arrangement"],
+                    "wave": wave,
+                    "seconds": seconds,
+                }
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return instrument, report
+
+
+def _job_directory(save_directory, index, job):
+    if save_directory is None:
+        return None
+    directory = pathlib.Path(save_directory).absolute() / f"{index:03}_{job['workup']}"
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def _run_job(job, instrument, save_directory):
+    start = time.perf_counter()
+    data = wt.open(job["data"])
+    try:
+        if "axes" in job:
+            data.transform(*job["axes"])
+        result = WORKUPS[job["workup"]](
+            data=data,
+            instrument=instrument,
+            plot=save_directory is not None,
+            autosave=save_directory is not None,
+            save_directory=save_directory,
+            **job["parameters"],
+        )
+    finally:
+        data.close()
+    # neither the data nor the previous instrument need be sent back
+    transition = Transition(result.transition.type, metadata=result.transition.metadata)
+    return result.evolve(transition=transition), time.perf_counter() - start
+
+
+def _chain(instrument, start, result, job):
+    # only the arrangement of this job differs from the instrument it worked up
+    delta = diff(start, result)
+    new = patch(instrument, delta)
+    metadata = dict(result.transition.metadata, data=job["data"])
+    if "axes" in job:
+        metadata["axes"] = list(job["axes"])
+    transition = Transition(
+        result.transition.type, instrument, metadata, data=SpilledData(job["data"])
+    )
+    return new.evolve(transition=transition)
+
+
+def main(args=None):
+    """Run the batch of workups described by a manifest, see :func:`run_batch`.
+
+    The manifest is a JSON file, with the list of jobs under "jobs" and, optionally,
+    the path of the instrument to modify under "instrument".
+    Relative paths are relative to the manifest.
+    """
+    parser = argparse.ArgumentParser(prog="attune-batch", description=main.__doc__)
+    parser.add_argument("manifest", type=pathlib.Path, help="JSON manifest of jobs")
+    parser.add_argument("-i", "--instrument", type=pathlib.Path, help="instrument to modify")
+    parser.add_argument("-o", "--output", type=pathlib.Path, help="where to save the result")
+    parser.add_argument("-j", "--processes", type=int, help="number of worker processes")
+    parser.add_argument(
+        "-s", "--save-directory", type=pathlib.Path, help="where to save each job's figure"
+    )
+    args = parser.parse_args(args)
+
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    here = args.manifest.parent
+    jobs = [dict(job, data=here / job["data"]) for job in manifest["jobs"]]
+    if args.instrument is not None:
+        instrument = open_(args.instrument)
+    elif "instrument" in manifest:
+        instrument = open_(here / manifest["instrument"])
+    else:
+        parser.error("no instrument given, neither in the manifest nor with --instrument")
+
+    start = time.perf_counter()
+    instrument, report = run_batch(
+        jobs, instrument, processes=args.processes, save_directory=args.save_directory
+    )
+    for i, job in enumerate(report):
+        print(
+            f"{i:>3} {job['workup']:<10} {job['arrangement']:<12} wave {job['wave']:<3}"
+            f" {job['seconds']:8.2f} s  {job['data']}",
+            file=sys.stderr,
+        )
+    print(f"{len(report)} jobs in {time.perf_counter() - start:.2f} s", file=sys.stderr)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            instrument.save(f)
+    else:
+        instrument.save(sys.stdout)
+        print()
@@ -0,0 +1,132 @@
+"""On-disk cache of the expensive intermediates of workups."""
+
+__all__ = ["clear_cache"]
+
+
+import hashlib
+import os
+import pathlib
+import tempfile
+
+import appdirs
+import numpy as np
+
+from ._common import setpoint_blocks
+
+
+# default bound on the total size of the cache, see ATTUNE_CACHE_MAX_BYTES
+MAX_BYTES = 2 ** 28
+# change whenever the meaning of cached values changes
+VERSION = 2
+
+
+def cache_directory():
+    """Directory of the cache, given by the ATTUNE_CACHE environment variable if set."""
+    if "ATTUNE_CACHE" in os.environ and os.environ["ATTUNE_CACHE"]:
+        return pathlib.Path(os.environ["ATTUNE_CACHE"])
+    return pathlib.Path(appdirs.user_cache_dir("attune", "attune"))
+
+
+def max_bytes():
+    """Bound on the size of the cache, given by ATTUNE_CACHE_MAX_BYTES if set."""
+    if "ATTUNE_CACHE_MAX_BYTES" in os.environ and os.environ["ATTUNE_CACHE_MAX_BYTES"]:
+        return int(os.environ["ATTUNE_CACHE_MAX_BYTES"])
+    return MAX_BYTES
+
+
+def key(stage, metadata, arrays=(), channels=()):
+    """Hex digest identifying an intermediate result.
+
+    Parameters
+    ----------
+    stage: str
+        Name of the computation.
+    metadata: dict
+        Parameters which the result depends on, with a deterministic ``repr``.
+    arrays: iterable of arrays, optional
+        Inputs held in memory (e.g. axes and setpoints).
+    channels: iterable of datasets, optional
+        Inputs on disk, which are hashed block by block.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((VERSION, stage, sorted(metadata.items()))).encode())
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        h.update(repr((array.dtype.str, array.shape)).encode())
+        h.update(array.tobytes())
+    for channel in channels:
+        h.update(repr((channel.dtype.str, channel.shape)).encode())
+        for block in setpoint_blocks(channel):
+            h.update(np.ascontiguousarray(channel[block]).tobytes())
+    return h.hexdigest()
+
+
+def cached(key, compute):
+    """Load the array (or tuple of arrays) stored under key, or compute and store it.
+
+    Parameters
+    ----------
+    key: str or None
+        As returned by :func:`key`. None bypasses the cache.
+    compute: callable
+        Called without arguments to compute the array, or a tuple of arrays.
+    """
+    if key is None:
+        return compute()
+    path = cache_directory() / f"{key}.npy"
+    try:
+        value = np.load(path)
+    except (OSError, ValueError):
+        pass
+    else:
+        # modification time orders entries for eviction, least recently used first
+        path.touch()
+        if value.dtype.names is not None:
+            return tuple(value[name][0] for name in value.dtype.names)
+        return value
+    value = compute()
+    _store(path, value)
+    return value
+
+
+def _store(path, value):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(value, tuple):
+        # a tuple is stored as a single record, one field per array
+        value = [np.asarray(v) for v in value]
+        dtype = [(f"f{i}", v.dtype, v.shape) for i, v in enumerate(value)]
+        value = np.array([tuple(value)], dtype=dtype)
+    # written to a temporary file first, so that other processes never read partial entries
+    with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as f:
+        np.save(f, value)
+    os.replace(f.name, path)
+    _evict(path.parent, max_bytes())
+
+
+def _evict(directory, max_bytes):
+    entries = []
+    for p in directory.glob("*.npy"):
+        try:
+            stat = p.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, p))
+    total = sum(size for _, size, _ in entries)
+    for _, size, p in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        try:
+            p.unlink()
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def clear_cache():
+    """Remove all intermediates cached by workups.
+
+    The cache lives in the directory given by the ATTUNE_CACHE environment variable,
+    by default the user cache directory. Its total size is bounded by
+    ATTUNE_CACHE_MAX_BYTES (256 MiB by default), evicting the least recently used.
+    """
+    _evict(cache_directory(), 0)
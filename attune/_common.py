@@ -1,14 +1,278 @@
 import pathlib
 
+import numexpr
+import numpy as np
 import WrightTools as wt
 
+from ._arrangement import Arrangement
+from ._instrument import Instrument
+from ._moments import moments
+from ._render import submit
+from ._setable import Setable
+from ._trace import span
+from ._tune import Tune
 
-def save(instrument, fig, image_name, save_directory=None):
+
+# approximate size of the blocks in which workups read channels
+BLOCK_BYTES = 2 ** 24
+
+
+def save(instrument, fig, image_name, save_directory=None, *, close=True):
     if save_directory is None:
         save_directory = "."
     save_directory = pathlib.Path(save_directory)
-    with open(save_directory / "instrument.json", "w") as f:
-        instrument.save(f)
-    # Should we timestamp the image?
-    p = (save_directory / image_name).with_suffix(".png")
-    wt.artists.savefig(p, fig=fig)
+    if instrument is not None:
+        with open(save_directory / "instrument.json", "w") as f:
+            instrument.save(f)
+    if fig is not None:
+        # Should we timestamp the image?
+        p = (save_directory / image_name).with_suffix(".png")
+        wt.artists.savefig(p, fig=fig, close=close)
+
+
+def finish(
+    instrument,
+    make_figure,
+    image_name,
+    *,
+    plot=True,
+    autosave=True,
+    save_directory=None,
+    trace=None,
+):
+    """Plot and save the result of a workup, as its ``plot`` and ``autosave`` options ask.
+
+    Parameters
+    ----------
+    instrument: attune.Instrument
+        The new instrument.
+    make_figure: callable
+        Called to build the figure, returning ``(fig, gs)``. A deferred figure is built
+        with ``pyplot=False``, on its own canvas, as pyplot is not thread safe.
+    image_name: str
+        Name of the image file, without suffix.
+    plot: bool or "deferred", optional
+        False skips the figure entirely, "deferred" builds and saves it in the
+        background, see :func:`attune.wait_for_plots`. Default is True.
+        A deferred figure is never returned, so it is not built unless autosaving.
+    autosave: bool, optional
+        Toggle saving the instrument and figure. Default is True.
+    save_directory: Path-like, optional
+        Where to save. Default is the current working directory.
+    trace: attune._trace.Trace, optional
+        Trace to time the "plot" and "save" stages in. A deferred plot is timed
+        only until it is submitted.
+    """
+    if plot not in (True, False, "deferred"):
+        raise ValueError(f"plot must be True, False or 'deferred', not {plot!r}")
+    if plot == "deferred":
+        # resolved now, in case the working directory changes before rendering
+        save_directory = pathlib.Path(save_directory or ".").absolute()
+        if autosave:
+            with span(trace, "save"):
+                save(instrument, None, image_name, save_directory)
+            with span(trace, "plot"):
+                submit(_render_figure, make_figure, image_name, save_directory)
+        return
+    fig = None
+    if plot:
+        with span(trace, "plot"):
+            fig = make_figure()[0]
+    if autosave:
+        with span(trace, "save"):
+            save(instrument, fig, image_name, save_directory)
+
+
+def _render_figure(make_figure, image_name, save_directory):
+    # never registered with pyplot, so there is nothing to close
+    fig, _ = make_figure(pyplot=False)
+    save(None, fig, image_name, save_directory, close=False)
+
+
+def apply_offsets(instrument, arrangement, tune, setpoints, offsets, *, transition):
+    """Add offsets to a tune at new setpoints, or make a new instrument of them.
+
+    If instrument is None, the new instrument has a single arrangement and tune,
+    whose dependent values are the offsets.
+    """
+    if instrument is not None:
+        return instrument.evolve(
+            arrangement,
+            tune,
+            independent=setpoints,
+            dependent=instrument[arrangement][tune].dependent + offsets,
+            transition=transition,
+        )
+    arr = Arrangement(arrangement, {tune: Tune(setpoints, offsets)})
+    return Instrument({arrangement: arr}, {tune: Setable(tune)}, transition=transition)
+
+
+def get_channel(data, channel):
+    """Resolve a channel given as an index, name or Channel object of data."""
+    if isinstance(channel, (int, str)):
+        return data.channels[wt.kit.get_index(data.channel_names, channel)]
+    return data[channel.natural_name]
+
+
+def axes_view(data, units="nm", *, trace=None):
+    """New data with the axes of data (and only the variables they use), but no channels.
+
+    Compatible axes are converted to the given units, as ``data.convert`` would do.
+    Workups process channels as arrays, adding them to the view only for plotting,
+    so that the (possibly large) original data is never copied as a whole.
+    Variables are copied in blocks of setpoints (see :func:`setpoint_blocks`) and keep their
+    shapes, blocks of the axes are read with :func:`axis_rows`.
+    Copying the variables and converting them are timed as "copy" and "units" in trace.
+    """
+    with span(trace, "copy"):
+        view = wt.Data(name=data.natural_name)
+        variables = {}
+        for axis in data.axes:
+            for v in axis.variables:
+                variables[v.natural_name] = v
+        for name, variable in variables.items():
+            copy = view.create_variable(
+                name, shape=variable.shape, dtype=variable.dtype, units=variable.units
+            )
+            for block in setpoint_blocks(variable):
+                copy[block] = variable[block]
+        view.transform(*data.axis_expressions)
+    with span(trace, "units"):
+        for axis, original in zip(view.axes, data.axes):
+            if axis.units != original.units:
+                axis.convert(original.units)
+        view.convert(units, verbose=False)
+    return view
+
+
+def setpoint_blocks(channel, max_bytes=BLOCK_BYTES):
+    """Slices of the first (setpoint) dimension of channel, for reading it in blocks.
+
+    Each block spans whole HDF5 chunks, and is as close to ``max_bytes`` as that allows.
+    """
+    nrows = channel.shape[0]
+    row_bytes = channel.dtype.itemsize * int(np.prod(channel.shape[1:]))
+    rows = max(1, max_bytes // max(row_bytes, 1))
+    if channel.chunks is not None:
+        chunk = channel.chunks[0]
+        rows = max(chunk, rows // chunk * chunk)
+    return [slice(i, min(i + rows, nrows)) for i in range(0, nrows, rows)]
+
+
+def read_rows(dataset, block):
+    """Read a block of setpoints from a channel or axis, as a floating point array.
+
+    Datasets which do not vary along the first dimension are read whole.
+    """
+    values = dataset[block] if dataset.shape[0] > 1 else dataset[:]
+    if not np.issubdtype(values.dtype, np.floating):
+        values = values.astype(float)
+    return values
+
+
+def axis_rows(axis, block):
+    """Read a block of setpoints from an axis, as a floating point array.
+
+    Evaluated as ``axis[block]`` would be, except that variables which do not vary along
+    the first dimension are read whole, and broadcast against the block.
+    """
+    values = {}
+    for variable in axis.variables:
+        rows = variable[block] if variable.shape[0] > 1 else variable[:]
+        values[variable.natural_name] = wt.units.converter(rows, variable.units, axis.units)
+    values = numexpr.evaluate(axis.expression.split("=")[0], local_dict=values)
+    if not np.issubdtype(values.dtype, np.floating):
+        values = values.astype(float)
+    return values
+
+
+def clipped_centers(
+    view,
+    channel,
+    *,
+    level=False,
+    gtol=None,
+    ltol=None,
+    out=None,
+    max_bytes=BLOCK_BYTES,
+    trace=None,
+):
+    """Level and clip a channel, and take the center of mass of each setpoint.
+
+    The channel is streamed in blocks of setpoints (see :func:`setpoint_blocks`),
+    so that memory use is bounded regardless of its size.
+    Global quantities (the leveling offset and the maximum for ``gtol``) are found first,
+    then each block is clipped and reduced.
+    Results are identical to processing the whole channel at once.
+
+    Parameters
+    ----------
+    view: WrightTools.Data
+        Data holding the axes of the channel, setpoints along the first axis and the
+        tuned motor along the second, as returned by :func:`axes_view`.
+    channel: WrightTools.data.Channel
+        The channel, setpoints along the first dimension.
+    level: bool, optional
+        Subtract the mean of the last three setpoints.
+    gtol: float, optional
+        Global tolerance, values below this fraction of the maximum become NaN.
+    ltol: float, optional
+        Local tolerance, values below this fraction of the maximum of their setpoint
+        become NaN.
+    out: WrightTools.data.Channel, optional
+        Channel of the same shape, to receive the clipped values (e.g. for plotting).
+    max_bytes: int, optional
+        Approximate size of each block read.
+    trace: attune._trace.Trace, optional
+        Trace to time the "read", "level", "clip" and "moments" stages in.
+
+    Returns
+    -------
+    centers: 1D array
+        Center of mass of each setpoint, along the second axis of view.
+        NaN values are treated as zero, as ``data.moment`` does.
+    limits: 1D array
+        Minimum and maximum of the second axis of view, found along the way.
+    """
+    blocks = setpoint_blocks(channel, max_bytes)
+    subtrahend = 0
+    if level:
+        with span(trace, "level"):
+            subtrahend = np.nanmean(read_rows(channel, slice(-3, None)), axis=0, keepdims=True)
+
+    def leveled(block):
+        with span(trace, "read"):
+            values = read_rows(channel, block)
+        if level:
+            with span(trace, "level"):
+                values -= subtrahend
+        return values
+
+    cutoff = None
+    if gtol is not None:
+        with span(trace, "clip"):
+            cutoff = np.nanmax([np.nanmax(leveled(block)) for block in blocks]) * gtol
+    joint = wt.kit.joint_shape(*view.axes)
+    dim = [s != r for s, r in zip(joint, view.axes[0].shape)].index(True)
+
+    centers = []
+    lo, hi = np.inf, -np.inf
+    for block in blocks:
+        values = leveled(block)
+        # clipping is applied within the moment, and to values only when they are kept
+        with span(trace, "clip"):
+            clip = cutoff
+            if ltol is not None:
+                local = np.nanmax(values, axis=1, keepdims=True) * ltol
+                clip = local if clip is None else np.fmax(clip, local)
+        with span(trace, "read"):
+            x = axis_rows(view.axes[1], block)
+            lo, hi = np.fmin(lo, np.nanmin(x)), np.fmax(hi, np.nanmax(x))
+        with span(trace, "moments"):
+            centers.append(moments(values, x, dim, orders=(1,), cutoff=clip)[0])
+        if out is not None:
+            with span(trace, "clip"):
+                if clip is not None:
+                    values[values < clip] = np.nan
+                out[block] = values
+    return np.squeeze(np.concatenate(centers)), np.array([lo, hi])
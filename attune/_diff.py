@@ -0,0 +1,155 @@
+"""Compact differences between instruments."""
+
+__all__ = ["diff", "patch"]
+
+
+from typing import Any, Dict
+
+import numpy as np
+
+from ._arrangement import Arrangement, mktune
+from ._instrument import Instrument
+from ._setable import Setable
+from ._transition import Transition, TransitionType
+from ._tune import Tune
+
+
+def diff(a: Instrument, b: Instrument) -> Dict[str, Any]:
+    """Compute the changes needed to turn one instrument into another.
+
+    The result is a JSON serializable dictionary, containing only what differs.
+    Continuous tunes with the same number of points are described by the
+    indices and new values of the points which changed.
+    Each changed arrangement records the digest of its original form,
+    so that :func:`patch` can refuse to apply the delta to a different instrument.
+
+    Parameters
+    ----------
+    a: Instrument
+        The original instrument.
+    b: Instrument
+        The modified instrument.
+
+    Returns
+    -------
+    dict
+        The delta, to be applied with :func:`patch`.
+    """
+    delta: Dict[str, Any] = {}
+    if a.name != b.name:
+        delta["name"] = b.name
+    delta["arrangements"] = {
+        "added": {k: b[k].as_dict() for k in b.arrangements if k not in a.arrangements},
+        "removed": [k for k in a.arrangements if k not in b.arrangements],
+        "changed": {},
+    }
+    for k in a.arrangements:
+        if k in b.arrangements and a[k].digest != b[k].digest:
+            delta["arrangements"]["changed"][k] = _diff_arrangement(a[k], b[k])
+    delta["setables"] = {
+        "added": {
+            k: v.as_dict()
+            for k, v in b.setables.items()
+            if k not in a.setables or a.setables[k] != v
+        },
+        "removed": [k for k in a.setables if k not in b.setables],
+    }
+    return delta
+
+
+def _diff_arrangement(a, b):
+    out = {"digest": a.digest}
+    if a.name != b.name:
+        out["name"] = b.name
+    out["added"] = {k: v.as_dict() for k, v in b.items() if k not in a.tunes}
+    out["removed"] = [k for k in a.keys() if k not in b.tunes]
+    out["changed"] = {}
+    for k, v in a.items():
+        if k in b.tunes and v.digest != b[k].digest:
+            out["changed"][k] = _diff_tune(v, b[k])
+    return out
+
+
+def _diff_tune(a, b):
+    if not (isinstance(a, Tune) and isinstance(b, Tune)):
+        return {"replace": b.as_dict()}
+    if len(a) != len(b) or a.dep_units != b.dep_units:
+        return {"replace": b.as_dict()}
+    changed = ~(_same(a.independent, b.independent) & _same(a.dependent, b.dependent))
+    index = np.flatnonzero(changed)
+    return {
+        "points": {
+            "index": index.tolist(),
+            "independent": b.independent[index].tolist(),
+            "dependent": b.dependent[index].tolist(),
+        }
+    }
+
+
+def _same(x, y):
+    return (x == y) | (np.isnan(x) & np.isnan(y))
+
+
+def patch(instrument: Instrument, delta: Dict[str, Any], *, check: bool = True) -> Instrument:
+    """Apply a delta computed by :func:`diff`.
+
+    Arrangements, tunes and setables which the delta does not touch are shared
+    with the given instrument.
+
+    Parameters
+    ----------
+    instrument: Instrument
+        The instrument to modify.
+    delta: dict
+        The changes to apply, as returned by :func:`diff` (or its JSON round trip).
+    check: bool, optional
+        Toggle verifying that changed arrangements match those the delta was computed from.
+        Default is True.
+
+    Returns
+    -------
+    Instrument
+        The patched instrument.
+    """
+    arrangements = instrument.arrangements.copy()
+    for k in delta["arrangements"]["removed"]:
+        del arrangements[k]
+    for k, d in delta["arrangements"]["changed"].items():
+        if check and instrument[k].digest != d["digest"]:
+            raise ValueError(f"Arrangement '{k}' does not match the original of this delta")
+        arrangements[k] = _patch_arrangement(instrument[k], d)
+    for k, d in delta["arrangements"]["added"].items():
+        arrangements[k] = Arrangement(**d)
+    setables = instrument.setables.copy()
+    for k in delta["setables"]["removed"]:
+        del setables[k]
+    for k, d in delta["setables"]["added"].items():
+        setables[k] = Setable(**d)
+    return Instrument(
+        arrangements,
+        setables,
+        name=delta.get("name", instrument.name),
+        transition=Transition(TransitionType.patch, instrument, metadata={"delta": delta}),
+    )
+
+
+def _patch_arrangement(arrangement, delta):
+    tunes = arrangement.tunes.copy()
+    for k in delta["removed"]:
+        del tunes[k]
+    for k, d in delta["changed"].items():
+        tunes[k] = _patch_tune(tunes[k], d)
+    for k, d in delta["added"].items():
+        tunes[k] = mktune(d)
+    return Arrangement(delta.get("name", arrangement.name), tunes)
+
+
+def _patch_tune(tune, delta):
+    if "replace" in delta:
+        return mktune(delta["replace"])
+    index = np.asarray(delta["points"]["index"], dtype=int)
+    independent = tune.independent
+    dependent = tune.dependent
+    independent[index] = delta["points"]["independent"]
+    dependent[index] = delta["points"]["dependent"]
+    return Tune(independent, dependent, dep_units=tune.dep_units)
@@ -1,9 +1,18 @@
 __all__ = ["DiscreteTune"]
 
+import hashlib
+import sys
 from typing import Dict, Tuple, Optional
 
+import numpy as np
+
 import WrightTools as wt
 
+from . import _metrics
+
+
+_convert = wt.units.convert
+
 
 class DiscreteTune:
     def __init__(
@@ -30,21 +39,46 @@ class DiscreteTune:
         self._ind_units = "nm"
         self._ranges = {k: tuple(v) for k, v in ranges.items()}
         self._default = default
+        self._digest = None
 
     def __repr__(self):
         return f"DiscreteTune({repr(self.ranges)}, {repr(self.default)})"
 
     def __call__(self, ind_value, *, ind_units=None, dep_units=None):
         if ind_units is not None and self._ind_units is not None:
-            ind_value = wt.units.convert(ind_value, ind_units, self._ind_units)
+            ind_value = _convert(ind_value, ind_units, self._ind_units)
         for key, (min, max) in self.ranges.items():
             if min <= ind_value <= max:
                 return key
         return self.default
 
     def __eq__(self, other):
+        if not isinstance(other, DiscreteTune):
+            return False
+        if self.digest == other.digest:
+            return True
         return self.ranges == other.ranges and self.default == other.default
 
+    def isclose(self, other, *, rtol=1e-05, atol=1e-08):
+        """Whether another tune has the same keys and default, and approximately the same ranges.
+
+        Parameters
+        ----------
+        other: DiscreteTune
+            The tune to compare to.
+        rtol: float, optional
+            Relative tolerance, as in ``numpy.allclose``.
+        atol: float, optional
+            Absolute tolerance, as in ``numpy.allclose``.
+        """
+        if not isinstance(other, DiscreteTune):
+            return False
+        if self.default != other.default or self.ranges.keys() != other.ranges.keys():
+            return False
+        return all(
+            np.allclose(v, other.ranges[k], rtol=rtol, atol=atol) for k, v in self.ranges.items()
+        )
+
     def as_dict(self):
         """Serialize this Tune as a python dictionary."""
         out = {}
@@ -53,6 +87,15 @@ class DiscreteTune:
         out["default"] = self.default
         return out
 
+    @property
+    def digest(self):
+        """Hex digest of the ranges and default of the tune."""
+        if self._digest is None:
+            ranges = sorted((k, tuple(map(float, v))) for k, v in self.ranges.items())
+            content = (ranges, self.default)
+            self._digest = hashlib.blake2b(repr(content).encode(), digest_size=16).hexdigest()
+        return self._digest
+
     @property
     def ranges(self):
         """The ranges for discrete setpoints."""
@@ -67,3 +110,7 @@ class DiscreteTune:
     def default(self):
         """The value returned if no supplied range applies."""
         return self._default
+
+
+_metrics.register(DiscreteTune, "__call__", "DiscreteTune.__call__")
+_metrics.register(sys.modules[__name__], "_convert", "units.convert")
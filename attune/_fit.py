@@ -0,0 +1,363 @@
+"""Fit many Gaussian peaks at once."""
+
+import concurrent.futures
+
+import numpy as np
+import scipy.optimize
+
+
+def estimate_gauss(xs, ys, weights=None):
+    """Closed form estimates of the parameters of many Gaussian peaks.
+
+    A parabola is fit to the logarithm of each peak, weighted by the square of the
+    signal so that the noisy tails do not dominate.
+    All peaks are solved together as a stack of 3x3 least squares problems.
+    Non-finite and non-positive points are ignored.
+
+    Parameters
+    ----------
+    xs: list of 1D arrays
+        Coordinates of each peak.
+    ys: list of 1D arrays
+        Signal of each peak, the same shapes as ``xs``.
+    weights: list of 1D arrays, optional
+        Weight of each point, the same shapes as ``xs``.
+        Default is None, which weighs all points equally.
+
+    Returns
+    -------
+    2D array
+        (npeaks, 3) array of center, sigma and amplitude.
+        Rows are NaN where the logarithm is not concave (i.e. not a peak).
+    """
+    n = len(xs)
+    problem = np.repeat(np.arange(n), [len(x) for x in xs])
+    x = np.concatenate(xs).astype(float) if n else np.empty(0)
+    y = np.concatenate(ys).astype(float) if n else np.empty(0)
+    if weights is None:
+        weight = np.ones_like(y)
+    else:
+        weight = np.concatenate(weights).astype(float) if n else np.empty(0)
+    with np.errstate(invalid="ignore"):
+        keep = np.isfinite(x) & np.isfinite(y) & (y > 0)
+    x, y, weight, problem = x[keep], y[keep], weight[keep], problem[keep]
+
+    # center and scale each problem for conditioning
+    counts = np.bincount(problem, minlength=n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.bincount(problem, weights=x, minlength=n) / counts
+        scale = np.sqrt(
+            np.bincount(problem, weights=(x - mean[problem]) ** 2, minlength=n) / counts
+        )
+    scale[~(scale > 0)] = 1
+    u = (x - mean[problem]) / scale[problem]
+    w = weight * y ** 2
+    log_y = np.log(y)
+
+    powers = [np.bincount(problem, weights=w * u ** k, minlength=n) for k in range(5)]
+    lhs = np.empty((n, 3, 3))
+    rhs = np.empty((n, 3))
+    for i in range(3):
+        rhs[:, i] = np.bincount(problem, weights=w * u ** i * log_y, minlength=n)
+        for j in range(3):
+            lhs[:, i, j] = powers[i + j]
+
+    out = np.full((n, 3), np.nan)
+    solvable = (counts >= 3) & (np.abs(np.linalg.det(lhs)) > 0)
+    c0, c1, c2 = np.linalg.solve(lhs[solvable], rhs[solvable][..., None])[..., 0].T
+    peak = c2 < 0
+    index = np.flatnonzero(solvable)[peak]
+    c0, c1, c2 = c0[peak], c1[peak], c2[peak]
+    out[index, 0] = mean[index] - scale[index] * c1 / (2 * c2)
+    out[index, 1] = scale[index] * np.sqrt(-1 / (2 * c2))
+    out[index, 2] = np.exp(c0 - c1 ** 2 / (4 * c2))
+    return out
+
+
+def fit_gauss_centers(xs, ys, weights=None, *, refine=True, processes=None):
+    """Find the centers of many Gaussian peaks.
+
+    Every peak first gets a closed form estimate, see :func:`estimate_gauss`.
+    Centers are bounded to the range of each peak's coordinates, extended by a tenth
+    of that range on either side.
+
+    Parameters
+    ----------
+    xs: list of 1D arrays
+        Coordinates of each peak.
+        Peaks are expected to be ordered, such that neighbors are similar.
+    ys: list of 1D arrays
+        Signal of each peak, the same shapes as ``xs``.
+    weights: list of 1D arrays, optional
+        Weight of each point, the same shapes as ``xs``.
+        A point of weight two counts as much as that point given twice.
+        Default is None, which weighs all points equally.
+    refine: bool, optional
+        Toggle refining each estimate with a nonlinear least squares fit.
+        Peaks without a valid estimate are started from the result of the preceding
+        peak instead. Without refinement, such peaks use the signal weighted mean.
+        Default is True.
+    processes: int, optional
+        Number of worker processes to use for refinement.
+        Peaks are split into contiguous blocks, one per process.
+        Default is None, which refines in this process.
+
+    Returns
+    -------
+    1D array
+        The center of each peak, NaN for peaks without any finite points.
+    """
+    xs = [np.asarray(x, dtype=float) for x in xs]
+    ys = [np.asarray(y, dtype=float) for y in ys]
+    if weights is None:
+        weights = [np.ones_like(y) for y in ys]
+    weights = [np.asarray(w, dtype=float) for w in weights]
+    estimates = estimate_gauss(xs, ys, weights)
+    if not refine:
+        out = estimates[:, 0].copy()
+        for i in range(len(out)):
+            x, y, w = _finite(xs[i], ys[i], weights[i])
+            if not x.size:
+                continue
+            if np.isnan(out[i]):
+                out[i] = np.average(x, weights=y * w) if np.sum(y * w) > 0 else np.median(x)
+            out[i] = np.clip(out[i], *_bounds(x))
+        return out
+    blocks = [(xs, ys, weights, estimates)]
+    if processes is not None and processes > 1 and len(xs) > processes:
+        edges = np.linspace(0, len(xs), processes + 1).astype(int)
+        blocks = [
+            (xs[a:b], ys[a:b], weights[a:b], estimates[a:b]) for a, b in zip(edges[:-1], edges[1:])
+        ]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(_refine_block, blocks))
+    else:
+        results = [_refine_block(block) for block in blocks]
+    return np.concatenate(results) if results else np.empty(0)
+
+
+def fit_gauss_centers_nd(xs, ys, weights=None, *, dims=None, refine=True, processes=None):
+    """Find the centers of many Gaussian peaks in several dimensions, each fit jointly.
+
+    The points of each peak are projected onto their principal ``dims`` dimensional
+    plane, in which a Gaussian of any covariance is fit, so that a peak correlated
+    between coordinates is not biased, as fitting each coordinate separately is
+    where the peak is cut off unevenly.
+    As in :func:`fit_gauss_centers`, each peak first gets a closed form estimate,
+    here a quadratic with cross terms fit to the logarithm of the signal (weighted by
+    its square), and centers are bounded to the range of each peak's projected
+    coordinates, extended by a tenth of that range on either side.
+
+    Parameters
+    ----------
+    xs: list of 2D arrays
+        (npoints, ndim) coordinates of each peak.
+        Peaks are expected to be ordered, such that neighbors are similar.
+    ys: list of 1D arrays
+        Signal of each peak, one for each point.
+    weights: list of 1D arrays, optional
+        Weight of each point. Default is None, which weighs all points equally.
+    dims: int, optional
+        Number of principal directions to fit along, e.g. ndim - 1 for points on
+        iso-surfaces. Default is None, which fits along all ndim.
+    refine: bool, optional
+        Toggle refining each estimate with a nonlinear least squares fit, started from
+        the result of the preceding peak where there is no valid estimate.
+        Without refinement, such peaks use the signal weighted mean.
+        Default is True.
+    processes: int, optional
+        Number of worker processes to use, splitting peaks into contiguous blocks.
+        Default is None, which fits in this process.
+
+    Returns
+    -------
+    2D array
+        (npeaks, ndim) center of each peak, NaN for peaks without any finite points.
+    """
+    xs = [np.asarray(x, dtype=float) for x in xs]
+    ys = [np.asarray(y, dtype=float) for y in ys]
+    if weights is None:
+        weights = [np.ones_like(y) for y in ys]
+    weights = [np.asarray(w, dtype=float) for w in weights]
+    ndim = xs[0].shape[1] if xs else 0
+    dims = ndim if dims is None else dims
+    blocks = [(xs, ys, weights, dims, refine)]
+    if processes is not None and processes > 1 and len(xs) > processes:
+        edges = np.linspace(0, len(xs), processes + 1).astype(int)
+        blocks = [
+            (xs[a:b], ys[a:b], weights[a:b], dims, refine) for a, b in zip(edges[:-1], edges[1:])
+        ]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(_fit_block_nd, blocks))
+    else:
+        results = [_fit_block_nd(block) for block in blocks]
+    return np.concatenate(results) if results else np.empty((0, ndim))
+
+
+def _fit_block_nd(block):
+    xs, ys, weights, dims, refine = block
+    ndim = xs[0].shape[1] if xs else 0
+    out = np.full((len(xs), ndim), np.nan)
+    previous = None
+    for i, (x, y, w) in enumerate(zip(xs, ys, weights)):
+        keep = np.isfinite(x).all(axis=1) & np.isfinite(y)
+        x, y, w = x[keep], y[keep], w[keep]
+        if not len(x):
+            continue
+        mean, axes = _principal(x, w, dims)
+        if not axes.shape[1]:
+            # every point at the same position
+            out[i] = mean
+            continue
+        u = (x - mean) @ axes
+        lo, hi = _bounds(u)
+        estimate = _estimate_gauss_nd(u, y, w)
+        if not refine:
+            if np.isnan(estimate).any():
+                center = (
+                    np.average(u, axis=0, weights=y * w)
+                    if np.sum(y * w) > 0
+                    else np.median(u, axis=0)
+                )
+            else:
+                center = estimate[: u.shape[1]]
+            out[i] = mean + axes @ np.clip(center, lo, hi)
+            continue
+        if not np.isnan(estimate).any():
+            x0 = estimate
+        elif previous is not None and len(previous) == len(estimate):
+            x0 = previous.copy()
+        else:
+            x0 = _start_nd(u, y)
+        x0[: u.shape[1]] = np.clip(x0[: u.shape[1]], lo, hi)
+        previous = _least_squares_nd(u, y, w, x0, (lo, hi))
+        out[i] = mean + axes @ previous[: u.shape[1]]
+    return out
+
+
+def _principal(x, w, dims):
+    """Weighted mean of points, and (ndim, n) unit vectors of their n <= dims principal axes.
+
+    Axes along which the points do not spread are left out.
+    """
+    mean = np.average(x, axis=0, weights=w)
+    deviation = x - mean
+    covariance = (deviation * w[:, None]).T @ deviation / np.sum(w)
+    variances, vectors = np.linalg.eigh(covariance)
+    order = np.argsort(variances)[::-1][:dims]
+    order = order[variances[order] > 1e-12 * variances.max()]
+    return mean, vectors[:, order]
+
+
+def _estimate_gauss_nd(u, y, w):
+    """Closed form Gaussian parameters (center, Cholesky factor of precision, amplitude).
+
+    NaN where the fit quadratic is not concave (i.e. not a peak).
+    """
+    n = u.shape[1]
+    pairs = [(j, k) for j in range(n) for k in range(j, n)]
+    size = n + len(pairs) + 2
+    out = np.full(size, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        keep = y > 0
+    if keep.sum() < 1 + n + len(pairs):
+        return out
+    u, y, w = u[keep], y[keep], w[keep]
+    scale = np.std(u, axis=0)
+    scale[~(scale > 0)] = 1
+    v = u / scale
+    design = np.column_stack([np.ones(len(v))] + [v[:, j] for j in range(n)])
+    design = np.column_stack([design] + [v[:, j] * v[:, k] for j, k in pairs])
+    root = np.sqrt(w) * y
+    c, *_ = np.linalg.lstsq(design * root[:, None], np.log(y) * root, rcond=None)
+    quadratic = np.zeros((n, n))
+    for (j, k), a in zip(pairs, c[1 + n :]):
+        quadratic[j, k] += a / 2
+        quadratic[k, j] += a / 2
+    precision = -2 * quadratic
+    try:
+        factor = np.linalg.cholesky(precision)
+    except np.linalg.LinAlgError:
+        return out
+    center = np.linalg.solve(precision, c[1 : 1 + n])
+    amplitude = np.exp(c[0] + c[1 : 1 + n] @ center / 2)
+    # back to the unscaled coordinates
+    return _pack(center * scale, factor / scale[:, None], amplitude)
+
+
+def _start_nd(u, y):
+    sigma = np.ptp(u, axis=0) / 10
+    sigma[~(sigma > 0)] = 1
+    return _pack(np.median(u, axis=0), np.diag(1 / sigma), np.max(y))
+
+
+def _pack(center, factor, amplitude):
+    lower = factor[np.tril_indices(len(center))]
+    return np.concatenate([center, lower, [amplitude]])
+
+
+def _least_squares_nd(u, y, w, x0, center_bounds):
+    n = u.shape[1]
+    scale = np.sqrt(w)
+    lower = np.tril_indices(n)
+
+    def resid(inps):
+        factor = np.zeros((n, n))
+        factor[lower] = inps[n:-1]
+        distance = (u - inps[:n]) @ factor
+        return scale * (y - inps[-1] * np.exp(-1 / 2 * np.sum(distance ** 2, axis=1)))
+
+    lo = np.full(len(x0), -np.inf)
+    hi = np.full(len(x0), np.inf)
+    lo[:n], hi[:n] = center_bounds
+    return scipy.optimize.least_squares(resid, x0, bounds=(lo, hi)).x
+
+
+def _refine_block(block):
+    xs, ys, weights, estimates = block
+    out = np.full(len(xs), np.nan)
+    previous = None
+    for i, (x, y, w, estimate) in enumerate(zip(xs, ys, weights, estimates)):
+        x, y, w = _finite(x, y, w)
+        if not x.size:
+            continue
+        lo, hi = _bounds(x)
+        if lo == hi:
+            # every point at the same coordinate, e.g. an iso-line along a grid line
+            out[i] = lo
+            continue
+        if not np.isnan(estimate).any():
+            x0 = estimate.copy()
+        elif previous is not None:
+            x0 = previous.copy()
+        else:
+            x0 = np.array([np.median(x), np.ptp(x) / 10, np.max(y)])
+        x0[0] = np.clip(x0[0], lo, hi)
+        previous = _least_squares(x, y, w, x0, (lo, hi))
+        out[i] = previous[0]
+    return out
+
+
+def _least_squares(x, y, w, x0, center_bounds):
+    scale = np.sqrt(w)
+
+    def resid(inps):
+        return scale * (y - _gauss(*inps)(x))
+
+    bounds = np.array([center_bounds, (-np.inf, np.inf), (-np.inf, np.inf)]).T
+    return scipy.optimize.least_squares(resid, x0, bounds=bounds).x
+
+
+def _finite(x, y, w):
+    keep = np.isfinite(x) & np.isfinite(y)
+    return x[keep], y[keep], w[keep]
+
+
+def _bounds(x):
+    # of each column, for 2D x
+    x_range = np.max(x, axis=0) - np.min(x, axis=0)
+    return np.min(x, axis=0) - x_range / 10, np.max(x, axis=0) + x_range / 10
+
+
+def _gauss(center, sigma, amplitude):
+    return lambda x: amplitude * np.exp(-1 / 2 * (x - center) ** 2 / sigma ** 2)
@@ -0,0 +1,279 @@
+"""Bounded in-memory history of transitions, with older instruments spilled to disk."""
+
+__all__ = ["history_bytes", "trim_history"]
+
+
+import abc
+import atexit
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+import uuid
+import weakref
+
+import dateutil.parser
+
+
+_directory = None
+
+
+def history_depth():
+    """Instruments kept in memory behind each transition, given by ATTUNE_HISTORY_DEPTH.
+
+    None (the default, if it is not set) keeps every instrument in memory.
+    """
+    if "ATTUNE_HISTORY_DEPTH" in os.environ and os.environ["ATTUNE_HISTORY_DEPTH"]:
+        return int(os.environ["ATTUNE_HISTORY_DEPTH"])
+    return None
+
+
+def history_directory():
+    """Directory of spilled instruments, given by the ATTUNE_HISTORY environment variable.
+
+    If it is not set, a temporary directory is made on first use and removed at exit.
+    """
+    global _directory
+    if "ATTUNE_HISTORY" in os.environ and os.environ["ATTUNE_HISTORY"]:
+        return pathlib.Path(os.environ["ATTUNE_HISTORY"])
+    if _directory is None:
+        _directory = pathlib.Path(tempfile.mkdtemp(prefix="attune-history-"))
+        atexit.register(shutil.rmtree, _directory, ignore_errors=True)
+    return _directory
+
+
+class Reference(abc.ABC):
+    """Stand in for an instrument or data no longer held in memory, read back on access.
+
+    The object read is kept only while something else refers to it, so walking a long
+    spilled history does not bring it back into memory as a whole.
+    """
+
+    def __init__(self):
+        self._resolved = lambda: None
+
+    def __getstate__(self):
+        # the object read back is not sent along, e.g. to worker processes
+        state = self.__dict__.copy()
+        del state["_resolved"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._resolved = lambda: None
+
+    def resolve(self):
+        value = self._resolved()
+        if value is None:
+            value = self._read()
+            self._resolved = weakref.ref(value)
+        return value
+
+    @abc.abstractmethod
+    def _read(self):
+        """Read the object referred to from disk."""
+
+
+class SpilledInstrument(Reference):
+    def __init__(self, path):
+        super().__init__()
+        self.path = pathlib.Path(path)
+
+    def __repr__(self):
+        return f"SpilledInstrument({str(self.path)!r})"
+
+    def _read(self):
+        from ._open import open as open_instrument
+
+        instrument = open_instrument(self.path / "instrument.json", load=None)
+        with open(self.path / "history.json") as f:
+            links = json.load(f)
+        transition = instrument.transition
+        transition._previous = _reference(links["previous"])
+        if links["data"] is not None:
+            transition._data = SpilledData(links["data"])
+        return instrument
+
+
+class StoredInstrument(Reference):
+    def __init__(self, name, time):
+        super().__init__()
+        self.name = name
+        self.time = time
+
+    def __repr__(self):
+        return f"StoredInstrument({self.name!r}, {self.time.isoformat()!r})"
+
+    def _read(self):
+        from ._store import load
+
+        return load(self.name, self.time)
+
+
+class SpilledData(Reference):
+    def __init__(self, path):
+        super().__init__()
+        self.path = pathlib.Path(path)
+
+    def __repr__(self):
+        return f"SpilledData({str(self.path)!r})"
+
+    def _read(self):
+        import WrightTools as wt
+
+        return wt.open(self.path)
+
+
+def _link(reference):
+    """JSON representation of a reference, see :func:`_reference`."""
+    if reference is None:
+        return None
+    if isinstance(reference, StoredInstrument):
+        return {"name": reference.name, "time": reference.time.isoformat()}
+    return {"path": str(reference.path)}
+
+
+def _reference(link):
+    if link is None:
+        return None
+    if "path" in link:
+        return SpilledInstrument(link["path"])
+    return StoredInstrument(link["name"], dateutil.parser.isoparse(link["time"]))
+
+
+def spill(instrument):
+    """Write instrument and the history it holds in memory to disk, returning a reference.
+
+    Instruments loaded from the store are not written again, but referred to there.
+    Every instrument written has its transition pointed at the references, so that
+    holding it no longer holds its history, and remembers its reference, so that it is
+    never written twice.
+    """
+    # oldest last, stopping at history already spilled
+    chain = []
+    while instrument is not None and not isinstance(instrument, Reference):
+        if getattr(instrument, "_spilled", None) is not None:
+            instrument = instrument._spilled
+            break
+        # instruments opened from files other than the store have load False
+        if instrument.load:
+            instrument = StoredInstrument(instrument.name, instrument.load)
+            break
+        chain.append(instrument)
+        instrument = instrument.transition._previous
+    reference = instrument
+    for instrument in reversed(chain):
+        path = history_directory() / uuid.uuid4().hex
+        path.mkdir(parents=True)
+        with open(path / "instrument.json", "w") as f:
+            instrument.save(f)
+        transition = instrument.transition
+        data = transition._data
+        if data is not None and not isinstance(data, Reference):
+            data.save(path / "data.wt5", verbose=False)
+            data = SpilledData(path / "data.wt5")
+        links = {"previous": _link(reference), "data": None}
+        if data is not None:
+            links["data"] = str(data.path)
+        with open(path / "history.json", "w") as f:
+            json.dump(links, f)
+        transition._previous = reference
+        transition._data = data
+        reference = SpilledInstrument(path)
+        reference._resolved = weakref.ref(instrument)
+        instrument._spilled = reference
+    return reference
+
+
+def limit(instrument):
+    """Trim the history of a new instrument to ATTUNE_HISTORY_DEPTH, if it is set.
+
+    Called once an instrument is made with its transition, rather than for each
+    transition, so that transitions which are discarded never spill anything.
+    """
+    depth = history_depth()
+    if depth is not None:
+        trim_history(instrument, depth)
+    return instrument
+
+
+def trim_history(instrument, depth=0):
+    """Spill all but the most recent instruments of the history to disk.
+
+    Spilled instruments (and the data of their transitions) are read back when their
+    transitions are accessed, so that ``instrument.transition.previous``, :func:`undo`
+    and :func:`store` work as before. Instruments loaded from the store are read back
+    from the store rather than written again.
+    Spilled files are kept in the directory given by the ATTUNE_HISTORY environment
+    variable, or else in a temporary directory removed when Python exits.
+
+    If the ATTUNE_HISTORY_DEPTH environment variable is set, the history of every new
+    instrument made with a transition is trimmed to that many previous instruments.
+
+    Parameters
+    ----------
+    instrument: attune.Instrument
+        The instrument whose history to trim, in place.
+    depth: int, optional
+        Number of previous instruments to keep in memory. Default is 0.
+    """
+    transition = instrument.transition
+    for _ in range(depth):
+        previous = transition._previous
+        if previous is None or isinstance(previous, Reference):
+            return
+        transition = previous.transition
+    previous = transition._previous
+    if previous is not None and not isinstance(previous, Reference):
+        transition._previous = spill(previous)
+
+
+def history_bytes(instrument):
+    """Bytes held in memory by an instrument and its history.
+
+    Only history in memory is counted (spilled instruments are not read back).
+    Tunes shared between instruments, as :meth:`attune.Instrument.evolve` shares them,
+    are counted once, and arrangements of lazy instruments only once decoded.
+
+    Parameters
+    ----------
+    instrument: attune.Instrument
+        The instrument to account for.
+
+    Returns
+    -------
+    dict
+        "instruments": the number of instruments in memory (including this one),
+        "tunes": bytes of the points of their tunes,
+        "data": bytes of the channels and variables of the data of their transitions,
+        "total": the sum of "tunes" and "data",
+        and "spilled": whether the history continues on disk.
+    """
+    from ._lazy import LazyArrangements
+    from ._tune import Tune
+
+    out = {"instruments": 0, "tunes": 0, "data": 0, "spilled": False}
+    seen = set()
+    while instrument is not None:
+        if isinstance(instrument, Reference):
+            out["spilled"] = True
+            break
+        out["instruments"] += 1
+        arrangements = instrument.arrangements
+        for name in arrangements:
+            if isinstance(arrangements, LazyArrangements) and not arrangements.is_decoded(name):
+                continue
+            for tune in arrangements[name].tunes.values():
+                if id(tune) in seen or not isinstance(tune, Tune):
+                    continue
+                seen.add(id(tune))
+                out["tunes"] += tune.independent.nbytes + tune.dependent.nbytes
+        data = instrument.transition._data
+        if data is not None and not isinstance(data, Reference) and id(data) not in seen:
+            seen.add(id(data))
+            for dataset in list(data.channels) + list(data.variables):
+                out["data"] += dataset.size * dataset.dtype.itemsize
+        instrument = instrument.transition._previous
+    out["total"] = out["tunes"] + out["data"]
+    return out
@@ -5,7 +5,9 @@ from datetime import datetime as _datetime
 from typing import Dict, Optional, Union
 import json
 
+from . import _history, _metrics
 from ._arrangement import Arrangement
+from ._lazy import LazyArrangements
 from ._setable import Setable
 from ._note import Note
 from ._transition import Transition, TransitionType
@@ -20,6 +22,7 @@ class Instrument(object):
         name: Optional[str] = None,
         transition: Optional[Union[Transition, dict]] = None,
         load: Optional[float] = None,
+        lazy: bool = False,
     ):
         """Representation of a system of arrangements for an instrument.
 
@@ -34,14 +37,26 @@ class Instrument(object):
         transition: Optional[Union[Transition, dict]]
             The operation which creates this instrument.
             If not given, will be "create".
+            If the ATTUNE_HISTORY_DEPTH environment variable is set, only that many
+            instruments of its history are kept in memory, see :func:`attune.trim_history`.
         load: Optional[float]
             POSIX timestamp of the tune when retrieved from the store.
             Ignore for instruments not retrieved from the store.
+        lazy: bool
+            If True, arrangements given as dictionaries are only constructed when first
+            accessed, rather than all at once here.
+            Useful when only a few of many arrangements will be used.
+            Default is False, unless arrangements are given as
+            the (lazy) arrangements of another instrument.
         """
         self._name: Optional[str] = name
-        self._arrangements: Dict["str", Arrangement] = {
-            k: Arrangement(**v) if isinstance(v, dict) else v for k, v in arrangements.items()
-        }
+        self._arrangements: Dict["str", Arrangement]
+        if lazy or isinstance(arrangements, LazyArrangements):
+            self._arrangements = LazyArrangements(arrangements)
+        else:
+            self._arrangements = {
+                k: Arrangement(**v) if isinstance(v, dict) else v for k, v in arrangements.items()
+            }
         if setables is None:
             setables = {}
         self._setables: Dict["str", Setable] = {
@@ -53,6 +68,7 @@ class Instrument(object):
             self._transition = Transition(**transition)
         else:
             self._transition = transition
+            _history.limit(self)
         self._load: Optional[float] = load
 
     def __repr__(self):
@@ -72,28 +88,48 @@ class Instrument(object):
             return False
         return True
 
+    def isclose(self, other, *, rtol=1e-05, atol=1e-08):
+        """Whether another instrument is approximately equal to this one.
+
+        Names and setables must be equal, and arrangements must be close,
+        see :meth:`attune.Arrangement.isclose`.
+
+        Parameters
+        ----------
+        other: Instrument
+            The instrument to compare to.
+        rtol: float, optional
+            Relative tolerance, as in ``numpy.allclose``.
+        atol: float, optional
+            Absolute tolerance, as in ``numpy.allclose``.
+        """
+        if self.name != other.name:
+            return False
+        if self._setables != other._setables:
+            return False
+        if self._arrangements.keys() != other._arrangements.keys():
+            return False
+        return all(
+            v.isclose(other[k], rtol=rtol, atol=atol) for k, v in self._arrangements.items()
+        )
+
     def __call__(self, ind_value, arrangement_name=None) -> Note:
+        start = _metrics.clock() if _metrics.enabled else None
         # get correct arrangement
-        valid = []
-        for arrangement in self._arrangements.values():
-            # we should probably do "close enough" for floating point on the edges...
-            try:
-                if arrangement.ind_min <= ind_value <= arrangement.ind_max:
-                    valid.append(arrangement)
-            except ValueError:
-                if (arrangement.ind_min <= ind_value).all() and (
-                    ind_value <= arrangement.ind_max
-                ).all():
-                    valid.append(arrangement)
         if arrangement_name is not None:
-            assert arrangement_name in [v.name for v in valid]
+            # only the requested arrangement need be checked (or, for lazy instruments, decoded)
             arrangement = self._arrangements[arrangement_name]
-        elif len(valid) == 1:
-            arrangement = valid[0]
-        elif len(valid) == 0:
-            raise ValueError(f"There are no valid arrangements at {ind_value}.")
+            assert _in_range(arrangement, ind_value)
         else:
-            raise ValueError("There are multiple valid arrangements! You must specify one.")
+            valid = [a for a in self._arrangements.values() if _in_range(a, ind_value)]
+            if len(valid) == 1:
+                arrangement = valid[0]
+            elif len(valid) == 0:
+                raise ValueError(f"There are no valid arrangements at {ind_value}.")
+            else:
+                raise ValueError("There are multiple valid arrangements! You must specify one.")
+        if start is not None:
+            _metrics.record("Instrument.select", _metrics.clock() - start)
         # call arrangement
         setable_positions = {}
         setables = self._setables.copy()
@@ -127,6 +163,59 @@ class Instrument(object):
     def __getitem__(self, item):
         return self._arrangements[item]
 
+    def evolve(
+        self,
+        arrangement: Optional[str] = None,
+        tune: Optional[str] = None,
+        *,
+        independent=None,
+        dependent=None,
+        name: Optional[str] = None,
+        transition: Optional[Transition] = None,
+    ):
+        """Create a new Instrument with one tune replaced.
+
+        Arrangements, tunes and setables which are not replaced are shared with this
+        instrument, rather than being serialized and reconstructed.
+
+        Parameters
+        ----------
+        arrangement: Optional[str]
+            The name of the arrangement containing the tune to replace.
+            If not given, no tunes are replaced.
+        tune: Optional[str]
+            The name of the tune to replace, required if ``arrangement`` is given.
+        independent: 1D array-like, optional
+            The new independent values, see :meth:`attune.Arrangement.evolve`.
+        dependent: 1D array-like, optional
+            The new dependent values, see :meth:`attune.Arrangement.evolve`.
+        name: Optional[str]
+            The name of the new instrument, defaults to the name of this instrument.
+        transition: Optional[Transition]
+            The operation which creates the new instrument.
+            If not given, will be "create".
+
+        Returns
+        -------
+        Instrument
+            The new instrument.
+        """
+        arrangements = self._arrangements.copy()
+        if arrangement is not None:
+            if tune is None:
+                raise ValueError("A tune must be given to evolve an arrangement")
+            arrangements[arrangement] = self[arrangement].evolve(
+                tune, independent=independent, dependent=dependent
+            )
+        if name is None:
+            name = self._name
+        return Instrument(
+            arrangements,
+            self._setables,
+            name=name,
+            transition=transition,
+        )
+
     def as_dict(self):
         """Dictionary representation for this Instrument."""
         out = {}
@@ -174,3 +263,16 @@ class Instrument(object):
                 return json.JSONEncoder.default(self, obj)
 
         json.dump(self.as_dict(), file, cls=NdarrayEncoder)
+
+
+_metrics.register(Instrument, "__call__", "Instrument.__call__")
+
+
+def _in_range(arrangement, ind_value):
+    # we should probably do "close enough" for floating point on the edges...
+    try:
+        return arrangement.ind_min <= ind_value <= arrangement.ind_max
+    except ValueError:
+        return (arrangement.ind_min <= ind_value).all() and (
+            ind_value <= arrangement.ind_max
+        ).all()
@@ -3,13 +3,18 @@
 import numpy as np
 import WrightTools as wt
 
-from ._instrument import Instrument
-from ._arrangement import Arrangement
-from ._setable import Setable
-from ._tune import Tune
+from ._trace import Trace
 from ._transition import Transition
 from ._plot import plot_intensity
-from ._common import save
+from . import _cache
+from ._common import (
+    apply_offsets,
+    axes_view,
+    clipped_centers,
+    finish,
+    get_channel,
+    setpoint_blocks,
+)
 
 
 # --- processing methods --------------------------------------------------------------------------
@@ -17,17 +22,14 @@ from ._common import save
 __all__ = ["intensity"]
 
 
-def _intensity(data, channel_name, tune_points, *, spline=True, **spline_kwargs):
-    data.moment(axis=1, channel=channel_name, moment=1, resultant=data.axes[0].shape)
-    offsets = data[f"{channel_name}_1_moment_1"].points
-
+def _intensity(points, limits, centers, tune_points, *, spline=True, **spline_kwargs):
     if spline:
-        spline = wt.kit.Spline(data.axes[0].points, offsets, **spline_kwargs)
-        return spline(tune_points).clip(data.axes[1].min(), data.axes[1].max())
-    if np.allclose(data.axes[0].points, tune_points):
-        return offsets.clip(data.axes[1].min(), data.axes[1].max())
-    elif np.allclose(data.axes[0].points, tune_points[::-1]):
-        return offsets.clip(data.axes[1].min(), data.axes[1].max())[::-1]
+        spline = wt.kit.Spline(points, centers, **spline_kwargs)
+        return spline(tune_points).clip(*limits)
+    if np.allclose(points, tune_points):
+        return centers.clip(*limits)
+    elif np.allclose(points, tune_points[::-1]):
+        return centers.clip(*limits)[::-1]
     else:
         raise ValueError("Data points and instrument points do not match, and splining disabled")
 
@@ -42,8 +44,11 @@ def intensity(
     level=False,
     gtol=0.01,
     ltol=0.1,
+    plot=True,
+    cache=True,
     autosave=True,
     save_directory=None,
+    trace=False,
     **spline_kwargs,
 ):
     """Workup a generic intensity plot for a single dependent.
@@ -66,10 +71,21 @@ def intensity(
         global tolerance for rejecting noise level relative to global maximum
     ltol: float, optional
         local tolerance for rejecting data relative to slice maximum
+    plot: bool or "deferred", optional
+        toggles plotting (Defaults to True).
+        "deferred" returns immediately, rendering in the background (see wait_for_plots)
+    cache: bool, optional
+        toggles reusing the centers of mass cached on disk by an earlier
+        call with the same data and parameters (Defaults to True).
+        Only used when not plotting, which needs the clipped channel anyway.
     autosave: bool, optional
         toggles saving of instrument file and images (Defaults to True)
     save_directory: Path-like
         where to save (Defaults to current working directory)
+    trace: bool, optional
+        toggles persisting the seconds spent in each stage in the transition metadata,
+        as "trace" (Defaults to False). They are kept in memory either way,
+        see trace_report.
     **spline_kwargs: optional
         extra arguments to pass to spline creation (e.g. s=0, k=1 for linear interpolation)
 
@@ -89,65 +105,90 @@ def intensity(
     }
     if not isinstance(channel, (int, str)):
         metadata["channel"] = channel.natural_name
-    transition = Transition("intensity", instrument, metadata=metadata, data=data)
-    data = data.copy()
-    data.convert("nm")
+    timings = Trace("intensity")
+    if trace:
+        metadata["trace"] = timings.stages
+    transition = Transition(
+        "intensity", instrument, metadata=metadata, data=data, trace=timings.stages
+    )
+    view = axes_view(data, trace=timings)
     if instrument is not None:
-        old_instrument = instrument.as_dict()
         setpoints = instrument[arrangement][tune].independent
     else:
-        old_instrument = None
-        setpoints = data.axes[0].points
+        setpoints = view.axes[0].points
     # TODO: units
     setpoints.sort()
 
-    if isinstance(channel, (int, str)):
-        channel = data.channels[wt.kit.get_index(data.channel_names, channel)]
-        orig_channel = data.create_channel(
-            f"{channel.natural_name}_orig", channel, units=channel.units
+    # only the one channel is read, in blocks of setpoints
+    channel = get_channel(data, channel)
+    name = channel.natural_name
+    # the clipped channel is only written out to plot it
+    clipped = None
+    if plot:
+        clipped = view.create_channel(name, shape=channel.shape, units=channel.units)
+        clipped.null = 0 if level else channel.null
+    # TODO: check if level does what we want
+    # TODO: gtol/ltol should maybe be moved to wt
+    with timings.span("cache"):
+        key = None
+        if cache and not plot:
+            key = _cache.key(
+                "clipped_centers",
+                {
+                    "level": level,
+                    "gtol": gtol,
+                    "ltol": ltol,
+                    "axes": view.axis_expressions,
+                    "units": [a.units for a in view.axes],
+                    "variables": [v.units for v in view.variables],
+                },
+                channels=[*view.variables, channel],
+            )
+        centers, limits = _cache.cached(
+            key,
+            lambda: clipped_centers(
+                view, channel, level=level, gtol=gtol, ltol=ltol, out=clipped, trace=timings
+            ),
         )
 
-    # TODO: check if level does what we want
-    if level:
-        data.level(channel.natural_name, 0, -3)
+    with timings.span("spline"):
+        points = view.axes[0].points
+        offsets = _intensity(points, limits, centers, setpoints, **spline_kwargs)
+        print(setpoints)
+        print(offsets)
+        try:
+            raw_offsets = _intensity(points, limits, centers, setpoints, spline=False)
+        except ValueError:
+            raw_offsets = None
 
-    # TODO: gtol/ltol should maybe be moved to wt
-    cutoff = channel.max() * gtol
-    channel.clip(min=cutoff)
-    max_axis = tuple(i for i, v in enumerate(data.axes[0].shape) if v > 1)
-    cutoff = np.nanmax(channel[:], axis=1, keepdims=True) * ltol
-    channel.clip(min=cutoff)
-
-    offsets = _intensity(data, channel.natural_name, setpoints, **spline_kwargs)
-    print(setpoints)
-    print(offsets)
-    try:
-        raw_offsets = _intensity(data, channel.natural_name, setpoints, spline=False)
-    except ValueError:
-        raw_offsets = None
-
-    units = data.axes[1].units
+    units = view.axes[1].units
     if units == "None":
         units = None
 
-    if instrument is not None:
-        old_instrument["arrangements"][arrangement]["tunes"][tune]["independent"] = setpoints
-        old_instrument["arrangements"][arrangement]["tunes"][tune]["dependent"] += offsets
-        try:
-            del old_instrument["transition"]
-        except KeyError:
-            pass
-        new_instrument = Instrument(**old_instrument, transition=transition)
-    else:
-        arr = Arrangement(arrangement, {tune: Tune(setpoints, offsets)})
-        new_instrument = Instrument(
-            {arrangement: arr}, {tune: Setable(tune)}, transition=transition
+    with timings.span("instrument"):
+        new_instrument = apply_offsets(
+            instrument, arrangement, tune, setpoints, offsets, transition=transition
         )
 
-    fig, _ = plot_intensity(
-        data, channel.natural_name, arrangement, tune, new_instrument, instrument, raw_offsets
-    )
+    if plot:
+        # the unclipped channel is copied only for plotting
+        with timings.span("plot"):
+            orig = view.create_channel(f"{name}_orig", shape=channel.shape, units=channel.units)
+            for block in setpoint_blocks(channel):
+                orig[block] = channel[block]
 
-    if autosave:
-        save(new_instrument, fig, "intensity", save_directory)
+    def make_figure(**kwargs):
+        return plot_intensity(
+            view, name, arrangement, tune, new_instrument, instrument, raw_offsets, **kwargs
+        )
+
+    finish(
+        new_instrument,
+        make_figure,
+        "intensity",
+        plot=plot,
+        autosave=autosave,
+        save_directory=save_directory,
+        trace=timings,
+    )
     return new_instrument
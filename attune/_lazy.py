@@ -0,0 +1,58 @@
+"""Deferred decoding of serialized arrangements."""
+
+import collections.abc
+from typing import Dict, Union
+
+from ._arrangement import Arrangement
+
+
+class LazyArrangements(collections.abc.MutableMapping):
+    def __init__(self, arrangements: Dict[str, Union[Arrangement, dict]]):
+        """Mapping of arrangement names to arrangements, decoded on first access.
+
+        Values given as dictionaries (e.g. parsed JSON) are kept in that raw form
+        until they are first looked up, at which point the Arrangement (and all of its
+        tunes and interpolators) is constructed once and cached.
+        Membership tests, iteration over keys and ``len`` never decode.
+
+        Parameters
+        ----------
+        arrangements: Dict[str, Union[Arrangement, dict]]
+            Mapping of names to Arrangement objects or their dictionary representations.
+        """
+        if isinstance(arrangements, LazyArrangements):
+            arrangements = arrangements._items
+        self._items: Dict[str, Union[Arrangement, dict]] = dict(arrangements)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def __getitem__(self, key):
+        value = self._items[key]
+        if isinstance(value, dict):
+            value = Arrangement(**value)
+            self._items[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self._items[key] = value
+
+    def __delitem__(self, key):
+        del self._items[key]
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def copy(self):
+        """Shallow copy, which shares decoded arrangements and leaves the rest undecoded."""
+        return LazyArrangements(self)
+
+    def is_decoded(self, key):
+        """Whether the arrangement named ``key`` has been constructed yet."""
+        return not isinstance(self._items[key], dict)
@@ -1,9 +1,12 @@
-__all__ = ["map_ind_points", "map_ind_limits"]
-
-import copy
+__all__ = ["map_ind_points", "map_ind_limits", "shift_ind_points"]
 
 import numpy as np
+import WrightTools as wt
 
+from ._arrangement import Arrangement
+from ._discrete_tune import DiscreteTune
+from ._instrument import Instrument
+from . import _history
 from ._transition import Transition
 from ._tune import Tune
 
@@ -34,13 +37,12 @@ def map_ind_points(instrument, arrangement, tune, setpoints, units=None):
     to_replace = instrument[arrangement][tune]
     if units is not None:
         setpoints = wt.units.convert(setpoints, units, to_replace.ind_units)
-    instr = copy.deepcopy(instrument)
-    instr[arrangement]._tunes[tune] = Tune(
-        setpoints, to_replace(setpoints), dep_units=to_replace.dep_units
+    return instrument.evolve(
+        arrangement,
+        tune,
+        independent=setpoints,
+        transition=Transition("map_ind_points", instrument, metadata=md),
     )
-    instr._transition = Transition("map_ind_points", instrument, metadata=md)
-    instr._load = None
-    return instr
 
 
 def map_ind_limits(instrument, arrangement, tune, min, max, units=None):
@@ -75,4 +77,72 @@ def map_ind_limits(instrument, arrangement, tune, min, max, units=None):
     instr = map_ind_points(instrument, arrangement, tune, points, units)
     md = {"arrangement": arrangement, "tune": tune, "min": min, "max": max, "units": units}
     instr._transition = Transition("map_ind_limits", instrument, metadata=md)
-    return instr
+    return _history.limit(instr)
+
+
+def shift_ind_points(instrument, arrangement, shift, *, restore_setpoints=True):
+    """Shift the independent values of every continuous tune of an arrangement at once.
+
+    Equivalent to replacing each tune by one with independent values ``x + shift(x)``
+    (and the same dependent values), then, if ``restore_setpoints``, mapping it back onto
+    the original independent values with :func:`map_ind_points`.
+    Tunes sharing independent values are resampled together, and a single instrument
+    and transition is created.
+
+    Parameters
+    ----------
+    instrument: Instrument
+        The instrument object to alter.
+    arrangement: str
+        The name of the arrangement to alter.
+    shift: callable
+        Called with the independent values of each tune, returning the shift of each.
+    restore_setpoints: bool, optional
+        Toggle resampling each shifted tune at its original independent values.
+        Default is True.
+
+    Returns
+    -------
+    Instrument
+        The instrument with the arrangement shifted.
+    """
+    groups = {}
+    for name, tune in instrument[arrangement].items():
+        if isinstance(tune, DiscreteTune):
+            continue
+        key = tune.independent.tobytes()
+        groups.setdefault(key, []).append(name)
+
+    md = {"arrangement": arrangement, "restore_setpoints": restore_setpoints}
+    tunes = instrument[arrangement].tunes.copy()
+    for names in groups.values():
+        x = tunes[names[0]].independent
+        shifted = x + shift(x)
+        dependent = np.stack([tunes[name].dependent for name in names], axis=1)
+        if restore_setpoints:
+            dependent = _interp_linear(shifted, dependent, x)
+            independent = x
+        else:
+            independent = shifted
+        for i, name in enumerate(names):
+            tunes[name] = Tune(independent, dependent[:, i], dep_units=tunes[name].dep_units)
+
+    arrangements = instrument.arrangements.copy()
+    arrangements[arrangement] = Arrangement(arrangement, tunes)
+    return Instrument(
+        arrangements,
+        instrument.setables,
+        name=instrument.name,
+        transition=Transition("shift_ind_points", instrument, metadata=md),
+    )
+
+
+def _interp_linear(x, y, x_new):
+    """Linear interpolation (and extrapolation) of the columns of y, as tunes evaluate it."""
+    # the same operations as scipy.interpolate.interp1d, so that results are identical
+    order = np.argsort(x, kind="mergesort")
+    x, y = x[order], y[order]
+    hi = np.searchsorted(x, x_new).clip(1, len(x) - 1)
+    lo = hi - 1
+    slope = (y[hi] - y[lo]) / (x[hi] - x[lo])[:, None]
+    return slope * (x_new - x[lo])[:, None] + y[lo]
@@ -0,0 +1,194 @@
+"""Opt-in counters and timers of the calls made while acquiring."""
+
+__all__ = ["collect_metrics", "disable_metrics", "enable_metrics", "metrics", "reset_metrics"]
+
+
+import collections
+import contextlib
+import functools
+import threading
+import time
+
+import numpy as np
+
+
+# checked by the calls timed with timed, and by the stages recorded inline
+enabled = False
+# latencies kept for percentiles, per name (the most recent)
+SAMPLES = 10000
+clock = time.perf_counter
+
+_lock = threading.Lock()
+_stats = {}
+# (owner, attribute, name, original) of hot calls, replaced only while enabled
+_registered = []
+
+
+class _Stat:
+    __slots__ = ["count", "total", "samples", "bytes_read", "bytes_written"]
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.samples = collections.deque(maxlen=SAMPLES)
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+
+def _stat(name):
+    stat = _stats.get(name)
+    if stat is None:
+        stat = _stats.setdefault(name, _Stat())
+    return stat
+
+
+def record(name, seconds):
+    """Count one call of name, which took seconds."""
+    with _lock:
+        stat = _stat(name)
+        stat.count += 1
+        stat.total += seconds
+        stat.samples.append(seconds)
+
+
+def record_bytes(name, *, read=0, written=0):
+    """Add bytes read or written to the totals of name."""
+    with _lock:
+        stat = _stat(name)
+        stat.bytes_read += read
+        stat.bytes_written += written
+
+
+def _timer(function, name):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            record(name, clock() - start)
+
+    return wrapper
+
+
+def timed(name):
+    """Decorate a function to record its calls under name, when metrics are enabled.
+
+    The check of whether they are costs every call a little, see :func:`register`
+    for calls on the hot path.
+    """
+
+    def decorator(function):
+        timer = _timer(function, name)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            return timer(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def register(owner, attribute, name):
+    """Record calls of owner.attribute under name, when metrics are enabled.
+
+    The attribute (a method of a class, or a function of a module which calls it by
+    its global name) is replaced by a timed wrapper only while metrics are enabled,
+    so that calls cost nothing more otherwise.
+    """
+    original = getattr(owner, attribute)
+    _registered.append((owner, attribute, name, original))
+    if enabled:
+        setattr(owner, attribute, _timer(original, name))
+
+
+def enable_metrics():
+    """Start recording call counts, latencies and bytes, see :func:`metrics`."""
+    global enabled
+    if not enabled:
+        for owner, attribute, name, original in _registered:
+            setattr(owner, attribute, _timer(original, name))
+    enabled = True
+
+
+def disable_metrics():
+    """Stop recording. What was recorded is kept, see :func:`reset_metrics`."""
+    global enabled
+    for owner, attribute, name, original in _registered:
+        setattr(owner, attribute, original)
+    enabled = False
+
+
+def reset_metrics():
+    """Forget everything recorded so far."""
+    with _lock:
+        _stats.clear()
+
+
+def metrics():
+    """What was recorded while metrics were enabled.
+
+    Recorded names are those of the instrumented calls (``"Instrument.__call__"``,
+    ``"Tune.__call__"``, ``"DiscreteTune.__call__"``, ``"open"``, ``"load"`` and
+    ``"store"``), and of stages within them: ``"Instrument.select"`` (finding the
+    arrangement), ``"units.convert"`` (unit conversion of tune inputs and outputs) and
+    ``"store.write"`` (writing the files of one stored instrument).
+    Bytes are counted for ``"open"`` (read, including by ``load``) and ``"store"``
+    (written).
+
+    Returns
+    -------
+    dict
+        For each name, a dict with keys "count", "total" (seconds), "mean", "p50", "p90",
+        "p99" and "max" (seconds, of the most recent calls, see ``SAMPLES``),
+        "bytes_read" and "bytes_written".
+    """
+    with _lock:
+        stats = {
+            name: (s.count, s.total, np.array(s.samples), s.bytes_read, s.bytes_written)
+            for name, s in _stats.items()
+        }
+    out = {}
+    for name, (count, total, samples, read, written) in sorted(stats.items()):
+        row = {"count": count, "total": total, "mean": total / count if count else np.nan}
+        for key, q in [("p50", 50), ("p90", 90), ("p99", 99), ("max", 100)]:
+            row[key] = np.percentile(samples, q) if samples.size else np.nan
+        row["bytes_read"] = read
+        row["bytes_written"] = written
+        out[name] = row
+    return out
+
+
+@contextlib.contextmanager
+def collect_metrics(reset=True):
+    """Record metrics within a with block.
+
+    The dict yielded is filled with :func:`metrics` when the block exits,
+    after which recording is restored to what it was before.
+
+    Parameters
+    ----------
+    reset: bool, optional
+        Toggle forgetting what was recorded before the block. Default is True.
+
+    Examples
+    --------
+    >>> with attune.collect_metrics() as report:
+    ...     instrument(1300, "sig")
+    >>> report["Instrument.__call__"]["count"]
+    1
+    """
+    previous = enabled
+    if reset:
+        reset_metrics()
+    report = {}
+    enable_metrics()
+    try:
+        yield report
+    finally:
+        if not previous:
+            disable_metrics()
+        report.update(metrics())
@@ -0,0 +1,75 @@
+"""Moments of channels along an axis, computed together."""
+
+import numpy as np
+
+
+def moments(values, x, axis, *, orders=(0, 1), cutoff=None, keepdims=False):
+    """Moments of values along one axis, as ``WrightTools.Data.moment`` defines them.
+
+    Moment 0 is the (trapezoidal) integral, moment 1 the center of mass and moment 2 the
+    variance about the center of mass.
+    All requested moments share one set of trapezoid weights and one weighted array,
+    rather than each integrating (and reading) the values again.
+
+    Parameters
+    ----------
+    values: array
+        The values to take moments of. NaN values are treated as zero.
+    x: array
+        Coordinates, broadcastable to the shape of values and monotonic along axis.
+        Moments are computed in double precision, whatever the types of values and x.
+    axis: int
+        The dimension to take moments along.
+    orders: iterable of int, optional
+        The moments to compute, each of 0, 1 or 2. Default is (0, 1).
+    cutoff: number or array, optional
+        Values below cutoff are treated as zero, as if clipped.
+        Arrays must be broadcastable to the shape of values.
+    keepdims: bool, optional
+        Toggle keeping axis, with length one. Default is False.
+
+    Returns
+    -------
+    list of arrays
+        One array for each of orders, in the same order.
+    """
+    orders = list(orders)
+    if not set(orders) <= {0, 1, 2}:
+        raise ValueError(f"Only moments 0, 1 and 2 are supported, not {orders}")
+    values = np.asarray(values)
+    shape = np.broadcast(values, x).shape
+    x = np.broadcast_to(np.asarray(x, dtype=float), shape)
+    with np.errstate(invalid="ignore"):
+        keep = np.isfinite(values)
+        if cutoff is not None:
+            keep &= ~(values < cutoff)
+    y = np.where(keep, values, 0)
+
+    # integrals are computed about the first coordinate, for precision of the variance
+    origin = x.take([0], axis=axis)
+    dx = x - origin
+    wy = y * _trapezoid_weights(x, axis)
+    m0 = np.sum(wy, axis=axis, keepdims=True)
+    out = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if 0 in orders:
+            out[0] = m0 * np.sign(x.take([-1], axis=axis) - origin)
+        if 1 in orders or 2 in orders:
+            shift = np.sum(wy * dx, axis=axis, keepdims=True) / m0
+            out[1] = origin + shift
+        if 2 in orders:
+            out[2] = np.sum(wy * dx ** 2, axis=axis, keepdims=True) / m0 - shift ** 2
+    if keepdims:
+        return [out[order] for order in orders]
+    return [np.squeeze(out[order], axis=axis) for order in orders]
+
+
+def _trapezoid_weights(x, axis):
+    """Weights w such that ``np.sum(w * y, axis)`` is ``np.trapezoid(y, x, axis=axis)``."""
+    half = np.diff(x, axis=axis) / 2
+    pad = [(0, 0)] * x.ndim
+    pad[axis] = (0, 1)
+    weights = np.pad(half, pad)
+    pad[axis] = (1, 0)
+    weights += np.pad(half, pad)
+    return weights
@@ -1,9 +1,9 @@
 __all__ = ["offset_by", "offset_to"]
 
-import copy
+import WrightTools as wt
 
+from . import _history
 from ._transition import Transition
-from ._tune import Tune
 
 
 def offset_by(instrument, arrangement, tune, amount, amount_units=None):
@@ -16,15 +16,12 @@ def offset_by(instrument, arrangement, tune, amount, amount_units=None):
     to_offset = instrument[arrangement][tune]
     if amount_units is not None:
         amount = wt.units.convert(amount, amount_units, to_offset.dep_units)
-    instr = copy.deepcopy(instrument)
-    instr[arrangement]._tunes[tune] = Tune(
-        to_offset.independent,
-        to_offset.dependent + amount,
-        dep_units=to_offset.dep_units,
+    return instrument.evolve(
+        arrangement,
+        tune,
+        dependent=to_offset.dependent + amount,
+        transition=Transition("offset_by", instrument, metadata=md),
     )
-    instr._transition = Transition("offset_by", instrument, metadata=md)
-    instr._load = None
-    return instr
 
 
 def offset_to(
@@ -49,4 +46,4 @@ def offset_to(
         "setpoint_units": setpoint_units,
     }
     instr._transition = Transition("offset_to", instrument, metadata=md)
-    return instr
+    return _history.limit(instr)
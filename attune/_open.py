@@ -2,12 +2,14 @@ __all__ = ["open"]
 
 import json
 
+from . import _metrics
 from ._instrument import Instrument
 
 open_ = open
 
 
-def open(path, *, load=False):
+@_metrics.timed("open")
+def open(path, *, load=False, lazy=False):
     """Open an instrument stored in a JSON file.
 
     Parameters
@@ -18,6 +20,10 @@ def open(path, *, load=False):
     load: datetime
         Allows this method to be used for loading by providing its associated store time
         Should generally be avoided when used directly
+    lazy: bool
+        If True, the file is parsed once, but each arrangement is only constructed
+        when it is first accessed. See :class:`attune.Instrument`.
+        Default is False.
 
     Returns
     -------
@@ -29,5 +35,7 @@ def open(path, *, load=False):
     else:
         with open_(path, "r") as f:
             d = json.load(f)
+            if _metrics.enabled:
+                _metrics.record_bytes("open", read=f.tell())
 
-    return Instrument(**d, load=load)
+    return Instrument(**d, load=load, lazy=lazy)
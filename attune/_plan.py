@@ -0,0 +1,286 @@
+"""Choose where to measure next, concentrating on the points that decide the workup."""
+
+__all__ = ["IntensityPlanner", "SetpointPlanner"]
+
+
+import abc
+
+import numpy as np
+
+from ._stream import IntensityStream, SetpointStream
+from ._transition import Transition
+
+
+class _Planner(abc.ABC):
+    """Samples of each setpoint along the tuned motor, refined where they matter most.
+
+    Every setpoint first gets an evenly spaced pass over the limits.
+    After that, intervals between neighboring samples are ranked by a loss (see
+    :meth:`_loss`) across all setpoints, and the best are bisected.
+    """
+
+    # weight of every interval, so that regions without signal are never abandoned entirely
+    floor = 1e-3
+
+    def __init__(self, *, arrangement, tune, instrument, limits, initial, resolution):
+        self.arrangement = arrangement
+        self.tune = tune
+        self.previous = instrument
+        self.setpoints = np.sort(instrument[arrangement][tune].independent)
+        self.limits = tuple(sorted(limits))
+        self.resolution = resolution
+        if self.resolution is None:
+            self.resolution = (self.limits[1] - self.limits[0]) / 1024
+        self._x = [np.empty(0) for _ in self.setpoints]
+        self._y = [np.empty(0) for _ in self.setpoints]
+        self._pending = [set() for _ in self.setpoints]
+        self._initial = np.linspace(*self.limits, initial)
+
+    def __len__(self):
+        return sum(len(x) for x in self._x)
+
+    def propose(self, n):
+        """The next points to measure.
+
+        Points already proposed but not yet told are not proposed again.
+
+        Parameters
+        ----------
+        n: int
+            Maximum number of points to propose.
+
+        Returns
+        -------
+        2D array
+            (npoints, 2) array of setpoint and motor offset, best first.
+            Fewer than n once every interval is at the resolution.
+        """
+        proposals = []
+        # the initial pass first, setpoint by setpoint
+        for i in range(len(self.setpoints)):
+            for x in self._initial:
+                if len(proposals) == n:
+                    break
+                if x not in self._pending[i] and not np.any(self._x[i] == x):
+                    proposals.append((i, x))
+        if len(proposals) < n and self._initial_done():
+            proposals.extend(self._refine(n - len(proposals)))
+        for i, x in proposals:
+            self._pending[i].add(x)
+        return np.array([(self.setpoints[i], x) for i, x in proposals]).reshape(-1, 2)
+
+    def _initial_done(self):
+        return all(np.all(np.isin(self._initial, x)) for x in self._x)
+
+    def _refine(self, n):
+        losses, candidates = [], []
+        maximum = np.nanmax([np.nanmax(y) for y in self._y])
+        for i, (x, y) in enumerate(zip(self._x, self._y)):
+            loss = self._loss(i, x, y, maximum) + self.floor
+            loss *= np.diff(x) / (self.limits[1] - self.limits[0])
+            middle = (x[:-1] + x[1:]) / 2
+            # an interval is bisected only once, and not below the resolution
+            splittable = np.diff(x) >= 2 * self.resolution
+            for p in self._pending[i]:
+                splittable &= ~((x[:-1] < p) & (p < x[1:]))
+            losses.append(loss[splittable])
+            candidates.extend((i, m) for m in middle[splittable])
+        losses = np.concatenate(losses)
+        best = np.argsort(-losses, kind="stable")[:n]
+        return [candidates[b] for b in best]
+
+    def tell(self, points, values):
+        """Add measurements.
+
+        Parameters
+        ----------
+        points: 2D array-like
+            (npoints, 2) array of setpoint and motor offset, as proposed.
+        values: 1D array-like
+            The channel measured at each point.
+        """
+        points = np.reshape(np.asarray(points, dtype=float), (-1, 2))
+        values = np.ravel(np.asarray(values, dtype=float))
+        if len(points) != len(values):
+            raise ValueError(f"{len(points)} points but {len(values)} values")
+        index = np.searchsorted(self.setpoints, points[:, 0])
+        index = index.clip(0, len(self.setpoints) - 1)
+        if not np.allclose(self.setpoints[index], points[:, 0]):
+            raise ValueError("Points must be at the setpoints of the tune")
+        for i, x, y in zip(index, points[:, 1], values):
+            self._pending[i].discard(x)
+            j = np.searchsorted(self._x[i], x)
+            self._x[i] = np.insert(self._x[i], j, x)
+            self._y[i] = np.insert(self._y[i], j, y)
+
+    def samples(self, setpoint):
+        """Motor offsets and values measured so far at a setpoint, in order of offset."""
+        i = np.flatnonzero(np.isclose(self.setpoints, setpoint))[0]
+        return self._x[i].copy(), self._y[i].copy()
+
+    @abc.abstractmethod
+    def _loss(self, i, x, y, maximum):
+        """Loss of each interval between the samples x, y of setpoint i.
+
+        maximum is the largest value measured at any setpoint.
+        """
+
+    @abc.abstractmethod
+    def _stream(self):
+        """The stream which works up the samples of each setpoint."""
+
+    def instrument(self):
+        """The instrument worked up from the measurements so far.
+
+        Each setpoint is a slice of its samples, worked up as the stream of the same
+        workup would (see :class:`IntensityStream` and :class:`SetpointStream`).
+
+        Raises
+        ------
+        ValueError
+            If the initial pass is not complete, or too few setpoints have a result for
+            the spline.
+        """
+        if not self._initial_done():
+            raise ValueError("Measure the initial pass of every setpoint first")
+        stream = self._stream()
+        for setpoint, x, y in zip(self.setpoints, self._x, self._y):
+            stream.append(setpoint, x, y)
+        new = stream.instrument()
+        metadata = dict(new.transition.metadata, measurements=len(self))
+        return new.evolve(transition=Transition(new.transition.type, self.previous, metadata))
+
+
+class IntensityPlanner(_Planner):
+    def __init__(
+        self,
+        *,
+        arrangement,
+        tune,
+        instrument,
+        limits,
+        initial=9,
+        resolution=None,
+        gtol=0.01,
+        ltol=0.1,
+        **spline_kwargs,
+    ):
+        """Plan the measurements of an intensity scan.
+
+        Intervals are ranked by their length times the clipped signal at their ends
+        (and its change across them), relative to the global maximum: the centers of mass
+        which the workup finds depend only on the signal kept by ``gtol`` and ``ltol``,
+        so measurements concentrate on the ridge and on its edges.
+
+        Parameters
+        ----------
+        arrangement: str
+            Name of the arrangement to modify.
+        tune: str
+            Name of the tune to modify. Its independent values are the setpoints.
+        instrument: attune.Instrument
+            The instrument to modify.
+        limits: 2-tuple of float
+            Range of motor offsets to explore, relative to the tune.
+        initial: int, optional
+            Number of evenly spaced offsets measured first at each setpoint. Default is 9.
+        resolution: float, optional
+            Smallest spacing of offsets. Default is None, 1/1024 of the limits.
+        gtol: float, optional
+            Global tolerance for rejecting noise level relative to the global maximum.
+        ltol: float, optional
+            Local tolerance for rejecting data relative to the maximum of each setpoint.
+        **spline_kwargs: optional
+            Extra arguments to pass to spline creation.
+        """
+        super().__init__(
+            arrangement=arrangement,
+            tune=tune,
+            instrument=instrument,
+            limits=limits,
+            initial=initial,
+            resolution=resolution,
+        )
+        self.gtol = gtol
+        self.ltol = ltol
+        self.spline_kwargs = spline_kwargs
+
+    def _loss(self, i, x, y, maximum):
+        clip = -np.inf
+        if self.gtol is not None:
+            clip = maximum * self.gtol
+        if self.ltol is not None:
+            clip = np.fmax(clip, np.nanmax(y) * self.ltol)
+        with np.errstate(invalid="ignore"):
+            kept = np.where(y >= clip, y, 0) / maximum
+        return np.maximum(kept[:-1], kept[1:]) + np.abs(np.diff(kept))
+
+    def _stream(self):
+        return IntensityStream(
+            arrangement=self.arrangement,
+            tune=self.tune,
+            instrument=self.previous,
+            gtol=self.gtol,
+            ltol=self.ltol,
+            **self.spline_kwargs,
+        )
+
+
+class SetpointPlanner(_Planner):
+    # half width of the region sampled about each crossing, relative to the measured range
+    window = 0.1
+
+    def __init__(
+        self, *, arrangement, tune, instrument, limits, initial=5, resolution=None, **spline_kwargs
+    ):
+        """Plan the measurements of a setpoint scan.
+
+        Intervals are ranked by their length times how close the measured value is to
+        its setpoint at their ends (intervals across which it crosses rank first),
+        so that measurements concentrate about where the workup finds the zero crossing.
+
+        Parameters
+        ----------
+        arrangement: str
+            Name of the arrangement to modify.
+        tune: str
+            Name of the tune to modify. Its independent values are the setpoints.
+        instrument: attune.Instrument
+            The instrument to modify.
+        limits: 2-tuple of float
+            Range of motor offsets to explore, relative to the tune.
+        initial: int, optional
+            Number of evenly spaced offsets measured first at each setpoint. Default is 5.
+        resolution: float, optional
+            Smallest spacing of offsets. Default is None, 1/1024 of the limits.
+        **spline_kwargs: optional
+            Extra arguments to pass to spline creation.
+        """
+        super().__init__(
+            arrangement=arrangement,
+            tune=tune,
+            instrument=instrument,
+            limits=limits,
+            initial=initial,
+            resolution=resolution,
+        )
+        self.spline_kwargs = spline_kwargs
+
+    def _loss(self, i, x, y, maximum):
+        difference = y - self.setpoints[i]
+        crossing = np.sign(difference[:-1]) != np.sign(difference[1:])
+        # a window about the crossing, rather than only its bracket: the fit takes the
+        # measured values as its coordinate, so clustered noisy values bias its slope
+        width = self.window * (np.nanmax(difference) - np.nanmin(difference))
+        near = np.fmin(np.abs(difference[:-1]), np.abs(difference[1:]))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            loss = 1 / (1 + (near / width) ** 2)
+        return np.where(crossing, 1, np.nan_to_num(loss))
+
+    def _stream(self):
+        return SetpointStream(
+            arrangement=self.arrangement,
+            tune=self.tune,
+            instrument=self.previous,
+            **self.spline_kwargs,
+        )
@@ -1,17 +1,62 @@
 """Internal plotting functions for workup."""
 
+import itertools
+
 import WrightTools as wt
-import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+def _create_figure(*, pyplot=True, width="single", nrows=1, cols=(1,), default_aspect=1):
+    """As ``wt.artists.create_figure``, or without pyplot (which is not thread safe).
+
+    Without pyplot the figure is drawn on its own Agg canvas, with the same layout.
+    """
+    kwargs = dict(width=width, nrows=nrows, cols=cols, default_aspect=default_aspect)
+    if pyplot:
+        return wt.artists.create_figure(**kwargs)
+    # the default margin and spacings of create_figure, in inches
+    margin, space, cbar_width = 1.0, 0.25, 0.25
+    figure_width = {"single": 6.5, "double": 14.0}[width]
+    ratios = np.array([c for c in cols if c != "cbar"], dtype=np.float64)
+    subplot_width = figure_width - 2 * margin - (len(cols) - 1) * space
+    subplot_widths = iter((subplot_width - cols.count("cbar") * cbar_width) * ratios / sum(ratios))
+    width_ratios = [cbar_width if c == "cbar" else next(subplot_widths) for c in cols]
+    height = width_ratios[0] * default_aspect
+    figure_height = nrows * height + (nrows - 1) * space + 2 * margin
+
+    def relative(inches, total, n):
+        return (inches * n) / (total - inches * n + inches)
+
+    fig = wt.artists.Figure(figsize=[figure_width, figure_height])
+    FigureCanvasAgg(fig)
+    gs = wt.artists.GridSpec(
+        nrows,
+        len(cols),
+        hspace=relative(space, figure_height - 2 * margin, nrows),
+        wspace=relative(space, figure_width - 2 * margin, len(cols)),
+        width_ratios=width_ratios,
+        height_ratios=[height] * nrows,
+    )
+    wt.artists.subplots_adjust(fig, inches=margin)
+    return fig, gs
 
 
 def plot_intensity(
-    data, channel, arrangement, tune, instrument, prior_instrument=None, raw_offsets=None
+    data,
+    channel,
+    arrangement,
+    tune,
+    instrument,
+    prior_instrument=None,
+    raw_offsets=None,
+    *,
+    pyplot=True,
 ):
-    fig, gs = wt.artists.create_figure(
-        width="single", nrows=2, cols=[1, "cbar"], default_aspect=0.5
+    fig, gs = _create_figure(
+        pyplot=pyplot, width="single", nrows=2, cols=[1, "cbar"], default_aspect=0.5
     )
-    ax = plt.subplot(gs[0, 0])
+    ax = fig.add_subplot(gs[0, 0])
     instrument_plot_kwargs = {"lw": 5, "c": "k", "alpha": 0.5}
     prior_instrument_plot_kwargs = {"lw": 2, "c": "k"}
     new_tune = instrument[arrangement][tune]
@@ -23,12 +68,12 @@ def plot_intensity(
             prior_tune.dependent,
             **prior_instrument_plot_kwargs,
         )
-    wt.artists.plot_gridlines()
+    wt.artists.plot_gridlines(ax=ax)
     ax.set_ylabel(tune)
     ax.set_xlim(instrument[arrangement].ind_min, instrument[arrangement].ind_max)
     ax.xaxis.set_tick_params(label1On=False)
 
-    ax = plt.subplot(gs[1, 0])
+    ax = fig.add_subplot(gs[1, 0])
     graymap = "greyscale"
     ax.pcolor(data, channel=f"{channel}_orig", cmap=graymap)
     ax.pcolor(data, channel=channel)
@@ -42,12 +87,12 @@ def plot_intensity(
 
     ax.plot(new_tune.independent, ypoints, **instrument_plot_kwargs)
     ax.axhline(0, **prior_instrument_plot_kwargs)
-    wt.artists.plot_gridlines()
+    wt.artists.plot_gridlines(ax=ax)
     ax.set_ylabel(fr"$\mathsf{{\Delta {tune}}}$")
     ax.set_xlabel(data.axes[0].label)
     ax.set_xlim(instrument[arrangement].ind_min, instrument[arrangement].ind_max)
 
-    cax = plt.subplot(gs[1, 1])
+    cax = fig.add_subplot(gs[1, 1])
     ticks = np.linspace(data[channel].null, data[channel].max(), 11)
     wt.artists.plot_colorbar(
         cax, vlim=(data[channel].null, data[channel].max()), ticks=ticks, label=channel
@@ -57,12 +102,20 @@ def plot_intensity(
 
 
 def plot_setpoint(
-    data, channel, arrangement, tune, instrument, prior_instrument=None, raw_offsets=None
+    data,
+    channel,
+    arrangement,
+    tune,
+    instrument,
+    prior_instrument=None,
+    raw_offsets=None,
+    *,
+    pyplot=True,
 ):
-    fig, gs = wt.artists.create_figure(
-        width="single", nrows=2, cols=[1, "cbar"], default_aspect=0.5
+    fig, gs = _create_figure(
+        pyplot=pyplot, width="single", nrows=2, cols=[1, "cbar"], default_aspect=0.5
     )
-    ax = plt.subplot(gs[0, 0])
+    ax = fig.add_subplot(gs[0, 0])
     instrument_plot_kwargs = {"lw": 5, "c": "k", "alpha": 0.5}
     prior_instrument_plot_kwargs = {"lw": 2, "c": "k"}
     ax.plot(
@@ -79,9 +132,9 @@ def plot_setpoint(
             **prior_instrument_plot_kwargs,
         )
     ax.set_ylabel(tune)
-    wt.artists.plot_gridlines()
+    wt.artists.plot_gridlines(ax=ax)
 
-    ax = plt.subplot(gs[1, 0])
+    ax = fig.add_subplot(gs[1, 0])
     # data[channel][:] -= data.axes[0][:]
     data[channel].signed = True
     limits = -0.05 * data[channel].mag(), 0.05 * data[channel].mag()
@@ -102,22 +155,22 @@ def plot_setpoint(
         )
     ax.plot(instrument[arrangement][tune].independent, ypoints, **instrument_plot_kwargs)
     ax.axhline(0, **prior_instrument_plot_kwargs)
-    wt.artists.plot_gridlines()
+    wt.artists.plot_gridlines(ax=ax)
     ax.set_ylabel(fr"$\mathsf{{\Delta {tune}}}$")
     ax.set_xlabel(data.axes[0].label)
     ax.set_xlim(instrument[arrangement].ind_min, instrument[arrangement].ind_max)
 
-    cax = plt.subplot(gs[1, 1])
+    cax = fig.add_subplot(gs[1, 1])
     ticks = np.linspace(*limits, 11)
     wt.artists.plot_colorbar(cax, vlim=limits, ticks=ticks, label=channel, cmap="signed")
 
     return fig, gs
 
 
-def plot_tune_test(data, channel, used_offsets, raw_offsets=None):
-    fig, gs = wt.artists.create_figure(default_aspect=0.5, cols=[1, "cbar"])
+def plot_tune_test(data, channel, used_offsets, raw_offsets=None, *, pyplot=True):
+    fig, gs = _create_figure(pyplot=pyplot, default_aspect=0.5, cols=[1, "cbar"])
     # heatmap
-    ax = plt.subplot(gs[0, 0])
+    ax = fig.add_subplot(gs[0, 0])
     ax.pcolor(data, channel=channel)
     ax.set_xlim(data.axes[0].min(), data.axes[0].max())
     # lines
@@ -138,7 +191,7 @@ def plot_tune_test(data, channel, used_offsets, raw_offsets=None):
     ax.set_ylabel(fr"$\mathsf{{\Delta}}$ {data.axes[0].label}")
 
     # colorbar
-    cax = plt.subplot(gs[:, -1])
+    cax = fig.add_subplot(gs[:, -1])
     label = channel
     ticks = np.linspace(0, data[channel].max(), 7)
     wt.artists.plot_colorbar(cax=cax, label=label, ticks=ticks)
@@ -155,18 +208,33 @@ def plot_holistic(
     instrument,
     prior_instrument,
     raw_offsets=None,
+    *,
+    pyplot=True,
 ):
     data[amp_channel].normalize()
 
+    if len(data.axes) != 2:
+        return _plot_holistic_projections(
+            data,
+            amp_channel,
+            center_channel,
+            arrangement,
+            tunes,
+            instrument,
+            prior_instrument,
+            raw_offsets,
+            pyplot=pyplot,
+        )
+
     amp_cmap = wt.artists.colormaps["default"]
     center_cmap = wt.artists.colormaps["rainbow"]
 
-    fig, gs = wt.artists.create_figure(nrows=2, cols=[1, "cbar"])
-    ax_amp = plt.subplot(gs[0, 0])
-    ax_cen = plt.subplot(gs[1, 0])
+    fig, gs = _create_figure(pyplot=pyplot, nrows=2, cols=[1, "cbar"])
+    ax_amp = fig.add_subplot(gs[0, 0])
+    ax_cen = fig.add_subplot(gs[1, 0])
 
-    cax_amp = plt.subplot(gs[0, 1])
-    cax_center = plt.subplot(gs[1, 1])
+    cax_amp = fig.add_subplot(gs[0, 1])
+    cax_center = fig.add_subplot(gs[1, 1])
     amp_ticks = np.linspace(0, 1, 11)
     center_ticks = instrument[arrangement].independent
 
@@ -197,7 +265,7 @@ def plot_holistic(
         alpha=1,
     )
 
-    wt.artists.set_fig_labels(xlabel=data.axes[0].label, ylabel=data.axes[1].label)
+    wt.artists.set_fig_labels(fig=fig, xlabel=data.axes[0].label, ylabel=data.axes[1].label)
 
     wt.artists.plot_colorbar(cax_amp, cmap=amp_cmap, ticks=amp_ticks, label="Intensity")
     wt.artists.plot_colorbar(cax_center, cmap=center_cmap, ticks=center_ticks, label="Center")
@@ -254,3 +322,86 @@ def plot_holistic(
             )  # TODO don't be bad about point handleing
 
     return fig, gs
+
+
+def _plot_holistic_projections(
+    data,
+    amp_channel,
+    center_channel,
+    arrangement,
+    tunes,
+    instrument,
+    prior_instrument,
+    raw_offsets=None,
+    *,
+    pyplot=True,
+):
+    """Holistic plot for other than two motors, projecting onto each pair of axes.
+
+    Points are drawn in order of increasing amplitude, so that each projection shows
+    (approximately) the maximum amplitude along the hidden axes.
+    """
+    amp_cmap = wt.artists.colormaps["default"]
+    center_cmap = wt.artists.colormaps["rainbow"]
+    center_ticks = instrument[arrangement].independent
+
+    amps = np.asarray(data[amp_channel][:]).ravel()
+    centers = np.broadcast_to(data[center_channel][:], data[amp_channel].shape).ravel()
+    coords = [np.broadcast_to(a[:], data[amp_channel].shape).ravel() for a in data.axes]
+    order = np.argsort(amps)
+    order = order[np.isfinite(amps[order])]
+
+    pairs = list(itertools.combinations(range(len(data.axes)), 2)) or [(0, 0)]
+    fig, gs = _create_figure(
+        pyplot=pyplot,
+        width="double" if len(pairs) > 2 else "single",
+        nrows=2,
+        cols=[1] * len(pairs) + ["cbar"],
+    )
+    for col, (i, j) in enumerate(pairs):
+        ax_amp = fig.add_subplot(gs[0, col])
+        ax_cen = fig.add_subplot(gs[1, col])
+        ax_amp.scatter(
+            coords[i][order], coords[j][order], c=amps[order], cmap=amp_cmap, vmin=0, vmax=1, s=4
+        )
+        ax_cen.scatter(
+            coords[i][order],
+            coords[j][order],
+            c=centers[order],
+            cmap=center_cmap,
+            vmin=np.min(center_ticks),
+            vmax=np.max(center_ticks),
+            s=4,
+        )
+        for ax in [ax_amp, ax_cen]:
+            ax.plot(
+                prior_instrument[arrangement][tunes[i]].dependent,
+                prior_instrument[arrangement][tunes[j]].dependent,
+                color="k",
+                linewidth=2,
+                zorder=2,
+            )
+            ax.plot(
+                instrument[arrangement][tunes[i]].dependent,
+                instrument[arrangement][tunes[j]].dependent,
+                color="k",
+                linewidth=6,
+                alpha=0.5,
+                zorder=2,
+            )
+            if raw_offsets is not None:
+                ax.scatter(
+                    raw_offsets[:, i], raw_offsets[:, j], color="w", s=50, zorder=10, marker="*"
+                )
+            ax.set_ylabel(data.axes[j].label)
+        ax_cen.set_xlabel(data.axes[i].label)
+        ax_amp.xaxis.set_tick_params(label1On=False)
+
+    cax_amp = fig.add_subplot(gs[0, -1])
+    cax_center = fig.add_subplot(gs[1, -1])
+    wt.artists.plot_colorbar(
+        cax_amp, cmap=amp_cmap, ticks=np.linspace(0, 1, 11), label="Intensity"
+    )
+    wt.artists.plot_colorbar(cax_center, cmap=center_cmap, ticks=center_ticks, label="Center")
+    cax_center.set_xlabel("")
+    return fig, gs
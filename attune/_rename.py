@@ -10,7 +10,4 @@ def rename(instr: Instrument, name: str):
     Note: this tranistion breaks the history, as the primary key changes.
     """
     trans = Transition(TransitionType.rename, metadata={"old_name": instr.name})
-    new_instr = instr.as_dict()
-    new_instr["transition"] = trans
-    new_instr["name"] = name
-    return Instrument(**new_instr)
+    return instr.evolve(name=name, transition=trans)
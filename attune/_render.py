@@ -0,0 +1,60 @@
+"""Rendering workup figures in the background."""
+
+__all__ = ["wait_for_plots"]
+
+
+import concurrent.futures
+import threading
+
+
+# a single worker, so that renders run one at a time, in the order they were submitted
+# (figures are built without pyplot, which is not thread safe)
+_executor = None
+_pending = []
+_lock = threading.Lock()
+
+
+def submit(function, *args, **kwargs):
+    """Call function in the background rendering thread, returning its future."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="attune-render"
+            )
+        future = _executor.submit(function, *args, **kwargs)
+        _pending.append(future)
+    return future
+
+
+def wait_for_plots(timeout=None):
+    """Wait for figures of workups run with ``plot="deferred"`` to be rendered and saved.
+
+    Parameters
+    ----------
+    timeout: float, optional
+        Maximum number of seconds to wait. Default is None, which waits for all of them.
+
+    Returns
+    -------
+    int
+        The number of renders which finished.
+
+    Raises
+    ------
+    TimeoutError
+        If renders are still pending after timeout. They are kept, to be waited for again.
+    Exception
+        The first error raised by a render, after all of them have finished.
+    """
+    with _lock:
+        pending = list(_pending)
+    done, not_done = concurrent.futures.wait(pending, timeout=timeout)
+    with _lock:
+        for future in done:
+            _pending.remove(future)
+    if not_done:
+        raise TimeoutError(f"{len(not_done)} plots still rendering after {timeout} s")
+    for future in pending:
+        future.result()
+    return len(done)
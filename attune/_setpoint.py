@@ -3,13 +3,20 @@
 import numpy as np
 import WrightTools as wt
 
-from ._instrument import Instrument
-from ._arrangement import Arrangement
-from ._setable import Setable
-from ._tune import Tune
+from ._trace import Trace, span
 from ._transition import Transition
 from ._plot import plot_setpoint
-from ._common import save
+from . import _cache
+from ._common import (
+    BLOCK_BYTES,
+    apply_offsets,
+    axes_view,
+    axis_rows,
+    finish,
+    get_channel,
+    read_rows,
+    setpoint_blocks,
+)
 
 
 # --- processing methods --------------------------------------------------------------------------
@@ -17,33 +24,99 @@ from ._common import save
 __all__ = ["setpoint"]
 
 
-def _setpoint(data, channel_name, tune_points, *, spline=True, **spline_kwargs):
-    offsets = []
-    chops = data.chop(1)
-    for c in chops.values():
-        xi = c.axes[0].points
-        yi = c[channel_name].points
-        xi, yi = wt.kit.remove_nans_1D(xi, yi)
-        if np.all(np.isnan(yi)):
-            offsets.append(np.nan)
-        elif np.nanmin(yi) <= 0 <= np.nanmax(yi):
-            p = np.polynomial.Polynomial.fit(yi, xi, 2)
-            offsets.append(p(0))
-        else:
-            offsets.append(np.nan)
-
-    offsets = np.array(offsets)
+def _setpoint_zeros(view, channel, setpoints, *, out=None, max_bytes=BLOCK_BYTES, trace=None):
+    """Where the channel less its setpoint crosses zero, for each setpoint.
+
+    Quadratic fits along the second axis of view, see :func:`_quadratic_zeros`.
+    The channel is streamed in blocks of setpoints, which are written to ``out`` if given.
+    Reading and fitting are timed as "read" and "fit" in trace.
+    Returns the zeros, and the minimum and maximum of the second axis of view.
+    """
+    zeros = []
+    lo, hi = np.inf, -np.inf
+    for block in setpoint_blocks(channel, max_bytes):
+        with span(trace, "read"):
+            values = read_rows(channel, block)
+            values -= setpoints[block].reshape((-1,) + (1,) * (values.ndim - 1))
+            if out is not None:
+                out[block] = values
+            x = axis_rows(view.axes[1], block)
+            lo, hi = np.fmin(lo, np.nanmin(x)), np.fmax(hi, np.nanmax(x))
+            x = np.broadcast_to(x, values.shape)
+        with span(trace, "fit"):
+            zeros.append(
+                _quadratic_zeros(
+                    x.reshape(len(values), -1).astype(float),
+                    values.reshape(len(values), -1).astype(float),
+                )
+            )
+    return np.concatenate(zeros), np.array([lo, hi])
+
+
+def _setpoint(points, limits, offsets, tune_points, *, spline=True, **spline_kwargs):
     if spline:
-        spline = wt.kit.Spline(data.axes[0].points, offsets, **spline_kwargs)
-        return spline(tune_points).clip(data.axes[1].min(), data.axes[1].max())
-    if np.allclose(data.axes[0].points, tune_points):
-        return offsets[::-1].clip(data.axes[1].min(), data.axes[1].max())
-    elif np.allclose(data.axes[0].points, tune_points[::-1]):
-        return offsets[::-1].clip(data.axes[1].min(), data.axes[1].max())[::-1]
+        spline = wt.kit.Spline(points, offsets, **spline_kwargs)
+        return spline(tune_points).clip(*limits)
+    if np.allclose(points, tune_points):
+        return offsets[::-1].clip(*limits)
+    elif np.allclose(points, tune_points[::-1]):
+        return offsets[::-1].clip(*limits)[::-1]
     else:
         raise ValueError("Data points and instrument points do not match, and splining disabled")
 
 
+def _quadratic_zeros(x, y):
+    """Where quadratic fits of x as a function of y cross y = 0, for each row.
+
+    Equivalent to ``np.polynomial.Polynomial.fit(y, x, 2)(0)`` for each row (ignoring NaNs),
+    but with all rows solved at once, as 3x3 normal equations in the same scaled domain.
+    Rows which do not bracket zero are NaN.
+    Rows with fewer than three distinct values of y, for which the fit is underdetermined,
+    fall back to ``Polynomial.fit`` itself.
+
+    Parameters
+    ----------
+    x: 2D array
+        Independent values of each fit, one row per fit.
+    y: 2D array
+        Dependent values of each fit, the same shape as ``x``.
+
+    Returns
+    -------
+    1D array
+        The value of each fit at zero.
+    """
+    valid = np.isfinite(x) & np.isfinite(y)
+    x = np.where(valid, x, 0)
+    y_lo = np.where(valid, y, np.inf).min(axis=1)
+    y_hi = np.where(valid, y, -np.inf).max(axis=1)
+    out = np.full(len(x), np.nan)
+    bracketed = valid.any(axis=1) & (y_lo <= 0) & (0 <= y_hi)
+
+    # count distinct values, with invalid values sorted to the end of each row
+    ordered = np.sort(np.where(valid, y, np.inf), axis=1)
+    with np.errstate(invalid="ignore"):
+        steps = np.diff(ordered, axis=1) > 0
+    distinct = valid.any(axis=1) + np.sum(steps & np.isfinite(ordered[:, 1:]), axis=1)
+    batched = bracketed & (distinct >= 3)
+    for i in np.flatnonzero(bracketed & ~batched):
+        p = np.polynomial.Polynomial.fit(y[i][valid[i]], x[i][valid[i]], 2)
+        out[i] = p(0)
+
+    # map y onto the window [-1, 1], as Polynomial.fit does
+    scale = 2 / (y_hi[batched] - y_lo[batched])
+    offset = -(y_hi[batched] + y_lo[batched]) / (y_hi[batched] - y_lo[batched])
+    w = valid[batched]
+    u = np.where(w, offset[:, None] + scale[:, None] * np.where(w, y[batched], 0), 0)
+    powers = [np.sum(w * u ** k, axis=1) for k in range(5)]
+    lhs = np.stack([np.stack(powers[i : i + 3], axis=-1) for i in range(3)], axis=-2)
+    rhs = np.stack([np.sum(u ** k * x[batched], axis=1) for k in range(3)], axis=-1)
+    c = np.linalg.solve(lhs, rhs[..., None])[..., 0]
+    # y = 0 is u = offset
+    out[batched] = c[:, 0] + c[:, 1] * offset + c[:, 2] * offset ** 2
+    return out
+
+
 def setpoint(
     *,
     data,
@@ -51,8 +124,11 @@ def setpoint(
     arrangement,
     tune,
     instrument=None,
+    plot=True,
+    cache=True,
     autosave=True,
     save_directory=None,
+    trace=False,
     **spline_kwargs
 ):
     """Workup a generic setpoint plot for a single tune.
@@ -69,10 +145,21 @@ def setpoint(
         name of the tune to modify in the instrument
     instrument: attune.Curve, optional
         instrument object to modify (Default None: make a new instrument)
+    plot: bool or "deferred", optional
+        toggles plotting (Defaults to True).
+        "deferred" returns immediately, rendering in the background (see wait_for_plots)
+    cache: bool, optional
+        toggles reusing the zero crossings cached on disk by an earlier
+        call with the same data and parameters (Defaults to True).
+        Only used when not plotting, which needs the difference channel anyway.
     autosave: bool, optional
         toggles saving of instrument file and images (Defaults to True)
     save_directory: Path-like
         where to save (Defaults to current working directory)
+    trace: bool, optional
+        toggles persisting the seconds spent in each stage in the transition metadata,
+        as "trace" (Defaults to False). They are kept in memory either way,
+        see trace_report.
     **spline_kwargs: optional
         extra arguments to pass to spline creation (e.g. s=0, k=1 for linear interpolation)
 
@@ -89,48 +176,79 @@ def setpoint(
     }
     if not isinstance(channel, (int, str)):
         metadata["channel"] = channel.natural_name
-    transition = Transition("setpoint", instrument, metadata=metadata, data=data)
-    data = data.copy()
-    data.convert("nm")
+    timings = Trace("setpoint")
+    if trace:
+        metadata["trace"] = timings.stages
+    transition = Transition(
+        "setpoint", instrument, metadata=metadata, data=data, trace=timings.stages
+    )
+    view = axes_view(data, trace=timings)
     if instrument is not None:
-        old_instrument = instrument.as_dict()
         setpoints = instrument[arrangement][tune].independent
     else:
-        setpoints = data.axes[0].points
+        setpoints = view.axes[0].points
     # TODO: units
     setpoints.sort()
 
-    if isinstance(channel, (int, str)):
-        channel = data.channels[wt.kit.get_index(data.channel_names, channel)]
-
-    dims = [1] * data.ndim
-    dims[0] = setpoints.size  # TODO: be more robust, don't assume 0 index
-    channel -= setpoints.reshape(dims)
+    # only the one channel is read, in blocks of setpoints
+    channel = get_channel(data, channel)
+    # the channel less setpoints is only written out to plot it
+    # TODO: be more robust, don't assume setpoints along the 0 index
+    difference = None
+    if plot:
+        difference = view.create_channel(
+            channel.natural_name, shape=channel.shape, units=channel.units
+        )
+        difference.null = channel.null
+    with timings.span("cache"):
+        key = None
+        if cache and not plot:
+            key = _cache.key(
+                "setpoint_zeros",
+                {
+                    "axes": view.axis_expressions,
+                    "units": [a.units for a in view.axes],
+                    "variables": [v.units for v in view.variables],
+                },
+                arrays=[setpoints],
+                channels=[*view.variables, channel],
+            )
+        zeros, limits = _cache.cached(
+            key,
+            lambda: _setpoint_zeros(view, channel, setpoints, out=difference, trace=timings),
+        )
+    with timings.span("spline"):
+        points = view.axes[0].points
+        offsets = _setpoint(points, limits, zeros, setpoints, **spline_kwargs)
+        try:
+            raw_offsets = _setpoint(points, limits, zeros, setpoints, spline=False)
+        except ValueError:
+            raw_offsets = None
 
-    offsets = _setpoint(data, channel.natural_name, setpoints, **spline_kwargs)
-    try:
-        raw_offsets = _setpoint(data, channel.natural_name, setpoints, spline=False)
-    except ValueError:
-        raw_offsets = None
+    with timings.span("instrument"):
+        new_instrument = apply_offsets(
+            instrument, arrangement, tune, setpoints, offsets, transition=transition
+        )
 
-    if instrument is not None:
-        old_instrument["arrangements"][arrangement]["tunes"][tune]["independent"] = setpoints
-        old_instrument["arrangements"][arrangement]["tunes"][tune]["dependent"] += offsets
-        try:
-            del old_instrument["transition"]
-        except KeyError:
-            pass
-        new_instrument = Instrument(**old_instrument, transition=transition)
-    else:
-        arr = Arrangement(arrangement, {tune: Tune(setpoints, offsets)})
-        new_instrument = Instrument(
-            {arrangement: arr}, {tune: Setable(tune)}, transition=transition
+    def make_figure(**kwargs):
+        return plot_setpoint(
+            view,
+            channel.natural_name,
+            arrangement,
+            tune,
+            new_instrument,
+            instrument,
+            raw_offsets,
+            **kwargs
         )
 
-    fig, _ = plot_setpoint(
-        data, channel.natural_name, arrangement, tune, new_instrument, instrument, raw_offsets
+    finish(
+        new_instrument,
+        make_figure,
+        "setpoint",
+        plot=plot,
+        autosave=autosave,
+        save_directory=save_directory,
+        trace=timings,
     )
-
-    if autosave:
-        save(new_instrument, fig, "setpoint", save_directory)
     return new_instrument
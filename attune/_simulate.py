@@ -0,0 +1,269 @@
+"""Synthetic scans of an optical parametric amplifier, for benchmarks and tests."""
+
+__all__ = ["OPASimulator"]
+
+
+import numpy as np
+import scipy.interpolate
+import WrightTools as wt
+
+from ._discrete_tune import DiscreteTune
+
+
+class OPASimulator:
+    def __init__(
+        self,
+        truth,
+        *,
+        color_tunes=None,
+        acceptance=None,
+        linewidth=10.0,
+        noise=0.01,
+        color_noise=0.1,
+        seed=None,
+    ):
+        """Simulate the scans which workups process, given the true tuning curves.
+
+        Each arrangement makes one color, set by its color tune: the color made at a motor
+        position is the true curve of that tune inverted (it must be monotonic).
+        The intensity at that color falls off as a Gaussian of the distance of every
+        other (continuous) tune from its true position, with width given by acceptance.
+        The output spectrum is a Gaussian of the given linewidth about the color.
+
+        Motors are set by an instrument (usually the one being tuned), by evaluating the
+        tunes of the arrangement directly: nested arrangements and discrete tunes are not
+        simulated. Colors are in nm.
+
+        Parameters
+        ----------
+        truth: attune.Instrument
+            The true tuning curves, with the same arrangements and tunes as the instruments
+            to be simulated.
+        color_tunes: dict, optional
+            Name of the color tune of each arrangement.
+            Default is None, which uses the first continuous tune of each arrangement.
+        acceptance: dict, optional
+            Acceptance width (in motor units) of each tune, by name.
+            Tunes not given get a twentieth of the range of their true dependent values.
+        linewidth: float, optional
+            Standard deviation of the output spectrum, in nm. Default is 10.
+        noise: float, optional
+            Standard deviation of additive noise on signals, relative to the peak.
+            Default is 0.01.
+        color_noise: float, optional
+            Standard deviation of measured colors, in nm. Default is 0.1.
+        seed: int, optional
+            Seed of the noise. Default is None, which differs each time.
+        """
+        self.truth = truth
+        self.color_tunes = dict(color_tunes or {})
+        self.acceptance = dict(acceptance or {})
+        self.linewidth = linewidth
+        self.noise = noise
+        self.color_noise = color_noise
+        self.rng = np.random.default_rng(seed)
+
+    def _tunes(self, arrangement):
+        return {
+            name: tune
+            for name, tune in self.truth[arrangement].items()
+            if not isinstance(tune, DiscreteTune)
+        }
+
+    def _color_tune(self, arrangement):
+        if arrangement in self.color_tunes:
+            return self.color_tunes[arrangement]
+        return next(iter(self._tunes(arrangement)))
+
+    def _acceptance(self, name, tune):
+        if name in self.acceptance:
+            return self.acceptance[name]
+        return np.ptp(tune.dependent) / 20 or 1.0
+
+    def output(self, arrangement, positions):
+        """Color and intensity made with the motors of an arrangement at positions.
+
+        Parameters
+        ----------
+        arrangement: str
+            Name of the arrangement.
+        positions: dict
+            Position of each tune, by name, broadcastable against each other.
+            The color tune must be given. Tunes not given are at their true positions.
+
+        Returns
+        -------
+        color: array
+            The color made, in nm.
+        intensity: array
+            The intensity, 1 with every tune at its true position.
+        """
+        tunes = self._tunes(arrangement)
+        color_tune = self._color_tune(arrangement)
+        true = tunes[color_tune]
+        inverse = scipy.interpolate.interp1d(
+            true.dependent, true.independent, fill_value="extrapolate"
+        )
+        color = inverse(np.asarray(positions[color_tune], dtype=float))
+        exponent = 0
+        for name, position in positions.items():
+            if name == color_tune:
+                continue
+            width = self._acceptance(name, tunes[name])
+            exponent = exponent + (position - tunes[name](color)) ** 2 / (2 * width ** 2)
+        color, exponent = np.broadcast_arrays(color, exponent)
+        return color, np.exp(-exponent)
+
+    def _set(self, instrument, arrangement, setpoints):
+        """Positions of each continuous tune of instrument at each setpoint."""
+        return {
+            name: instrument[arrangement][name](setpoints) for name in self._tunes(arrangement)
+        }
+
+    def _setpoints(self, instrument, arrangement, setpoints):
+        if setpoints is None:
+            setpoints = instrument[arrangement].independent
+        return np.asarray(setpoints, dtype=float)
+
+    def _signal(self, values):
+        return values + self.rng.normal(0, self.noise, np.shape(values))
+
+    def _color(self, values):
+        return values + self.rng.normal(0, self.color_noise, np.shape(values))
+
+    def tune_test(self, instrument, arrangement, *, setpoints=None, detunings=None):
+        """Spectra of the output at each setpoint, set by instrument.
+
+        Parameters
+        ----------
+        instrument: attune.Instrument
+            The instrument setting the motors.
+        arrangement: str
+            Name of the arrangement.
+        setpoints: 1D array-like, optional
+            Default is None, the independent values of the arrangement in instrument.
+        detunings: 1D array-like, optional
+            Monochromator detuning from each setpoint, in nm.
+            Default is None, 101 points over five linewidths either side.
+
+        Returns
+        -------
+        WrightTools.Data
+            With variables "w" and "wm", in nm, channel "signal" and axes ("w", "wm-w"),
+            as :func:`attune.tune_test` takes it.
+        """
+        setpoints = self._setpoints(instrument, arrangement, setpoints)
+        if detunings is None:
+            detunings = np.linspace(-5, 5, 101) * self.linewidth
+        detunings = np.asarray(detunings, dtype=float)
+        color, intensity = self.output(arrangement, self._set(instrument, arrangement, setpoints))
+        wm = setpoints[:, None] + detunings[None, :]
+        spectrum = np.exp(-((wm - color[:, None]) ** 2) / (2 * self.linewidth ** 2))
+        data = wt.Data(name="tune_test")
+        data.create_variable("w", values=setpoints[:, None], units="nm")
+        data.create_variable("wm", values=wm, units="nm")
+        data.create_channel("signal", values=self._signal(intensity[:, None] * spectrum))
+        data.transform("w", "wm-w")
+        return data
+
+    def intensity(self, instrument, arrangement, tune, offsets, *, setpoints=None):
+        """Integrated intensity at each setpoint, with tune offset from instrument.
+
+        Parameters
+        ----------
+        instrument: attune.Instrument
+            The instrument setting the motors.
+        arrangement: str
+            Name of the arrangement.
+        tune: str
+            Name of the tune to scan.
+        offsets: 1D array-like
+            Offsets of the tune from its position in instrument.
+        setpoints: 1D array-like, optional
+            Default is None, the independent values of the arrangement in instrument.
+
+        Returns
+        -------
+        WrightTools.Data
+            With variables "w" (in nm) and "<tune>_points", channel "signal" and those axes,
+            as :func:`attune.intensity` takes it.
+        """
+        setpoints = self._setpoints(instrument, arrangement, setpoints)
+        offsets = np.asarray(offsets, dtype=float)
+        positions = self._set(instrument, arrangement, setpoints)
+        positions = {name: p[:, None] for name, p in positions.items()}
+        positions[tune] = positions[tune] + offsets[None, :]
+        _, intensity = self.output(arrangement, positions)
+        data = wt.Data(name="intensity")
+        data.create_variable("w", values=setpoints[:, None], units="nm")
+        data.create_variable(f"{tune}_points", values=offsets[None, :])
+        data.create_channel("signal", values=self._signal(intensity))
+        data.transform("w", f"{tune}_points")
+        return data
+
+    def setpoint(self, instrument, arrangement, tune, offsets, *, setpoints=None):
+        """Measured color at each setpoint, with tune offset from instrument.
+
+        Parameters
+        ----------
+        instrument: attune.Instrument
+            The instrument setting the motors.
+        arrangement: str
+            Name of the arrangement.
+        tune: str
+            Name of the tune to scan, usually the color tune.
+        offsets: 1D array-like
+            Offsets of the tune from its position in instrument.
+        setpoints: 1D array-like, optional
+            Default is None, the independent values of the arrangement in instrument.
+
+        Returns
+        -------
+        WrightTools.Data
+            With variables "w" (in nm) and "<tune>_points", channel "wm" (in nm) and those
+            axes, as :func:`attune.setpoint` takes it.
+        """
+        setpoints = self._setpoints(instrument, arrangement, setpoints)
+        offsets = np.asarray(offsets, dtype=float)
+        positions = self._set(instrument, arrangement, setpoints)
+        positions = {name: p[:, None] for name, p in positions.items()}
+        positions[tune] = positions[tune] + offsets[None, :]
+        color, _ = self.output(arrangement, positions)
+        data = wt.Data(name="setpoint")
+        data.create_variable("w", values=setpoints[:, None], units="nm")
+        data.create_variable(f"{tune}_points", values=offsets[None, :])
+        data.create_channel("wm", values=self._color(color), units="nm")
+        data.transform("w", f"{tune}_points")
+        return data
+
+    def holistic(self, arrangement, positions):
+        """Amplitude and center of the output over a grid of motor positions.
+
+        Parameters
+        ----------
+        arrangement: str
+            Name of the arrangement.
+        positions: dict
+            1D array of positions of each tune to scan, by name, in the order of the axes.
+            The color tune must be one of them. Other tunes are at their true positions.
+
+        Returns
+        -------
+        WrightTools.Data
+            With a variable for each tune, channels "amp" and "cen" (in nm) and the tunes
+            as axes, as :func:`attune.holistic` takes it with ``channels=("amp", "cen")``.
+        """
+        names = list(positions)
+        grid = {}
+        for i, name in enumerate(names):
+            shape = [1] * len(names)
+            shape[i] = -1
+            grid[name] = np.reshape(np.asarray(positions[name], dtype=float), shape)
+        color, intensity = self.output(arrangement, grid)
+        data = wt.Data(name="holistic")
+        for name in names:
+            data.create_variable(name, values=grid[name])
+        data.create_channel("amp", values=self._signal(intensity))
+        data.create_channel("cen", values=self._color(color), units="nm")
+        data.transform(*names)
+        return data
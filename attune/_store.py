@@ -11,6 +11,7 @@ import warnings
 import appdirs
 import dateutil
 
+from . import _metrics
 from ._transition import Transition, TransitionType
 from ._open import open as open_
 
@@ -32,7 +33,8 @@ def catalog(full=False):
         return instrument_names
 
 
-def load(name: str, time=None, reverse: bool = True):
+@_metrics.timed("load")
+def load(name: str, time=None, reverse: bool = True, *, lazy: bool = False):
     """Load an istrument of the given name.
 
     Parameters
@@ -47,6 +49,9 @@ def load(name: str, time=None, reverse: bool = True):
     reverse: boolean, optional
         Direction to search, by default looks for a previous curve.
         If given as False, looks forward in time from the given timestamp.
+    lazy: boolean, optional
+        If True, arrangements are constructed only when first accessed.
+        See :func:`attune.open`.
     """
     if isinstance(time, str):
         import maya
@@ -107,7 +112,9 @@ def load(name: str, time=None, reverse: bool = True):
                     raise ValueError(f"Could not find an instrument later than {time}.")
 
     datadir = find(name, time, reverse)
-    return open_(datadir / "instrument.json", load=dateutil.parser.isoparse(datadir.name))
+    return open_(
+        datadir / "instrument.json", load=dateutil.parser.isoparse(datadir.name), lazy=lazy
+    )
 
 
 def restore(name, time, reverse=True):
@@ -137,6 +144,7 @@ def restore(name, time, reverse=True):
     _store_instr(instr)
 
 
+@_metrics.timed("store")
 def store(instrument, warn=True):
     """Store an instrument into the catalog.
 
@@ -167,6 +175,7 @@ def store(instrument, warn=True):
     _store_instr(instrument)
 
 
+@_metrics.timed("store.write")
 def _store_instr(instrument):
     if "ATTUNE_STORE" in os.environ and os.environ["ATTUNE_STORE"]:
         attune_dir = pathlib.Path(os.environ["ATTUNE_STORE"])
@@ -198,6 +207,9 @@ def _store_instr(instrument):
     if instrument.transition.previous is not None:
         with open(datadir / "previous_instrument.json", "w") as f:
             instrument.transition.previous.save(f)
+    if _metrics.enabled:
+        written = sum(p.stat().st_size for p in datadir.iterdir())
+        _metrics.record_bytes("store", written=written)
 
 
 def undo(instrument):
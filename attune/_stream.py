@@ -0,0 +1,617 @@
+"""Workups which are updated as each setpoint of a scan arrives."""
+
+__all__ = ["HolisticStream", "IntensityStream", "SetpointStream", "TuneTestStream"]
+
+
+import itertools
+
+import numpy as np
+import scipy.spatial
+import WrightTools as wt
+
+from ._common import apply_offsets
+from ._holistic import _fit_centers, _gen_instr
+from ._intensity import _intensity
+from ._map import shift_ind_points
+from ._moments import moments
+from ._setpoint import _quadratic_zeros, _setpoint
+from . import _history
+from ._transition import Transition
+from ._tune_test import _offsets
+
+
+class _Stream:
+    """Setpoints, coordinates and a value reduced from each slice, as they arrive."""
+
+    def __init__(self):
+        self._points = []
+        self._lo = np.inf
+        self._hi = -np.inf
+
+    def __len__(self):
+        return len(self._points)
+
+    def append(self, setpoint, x, values):
+        """Add the slice of the next setpoint of the scan.
+
+        Parameters
+        ----------
+        setpoint: float
+            The setpoint, in the units the workup would convert the first axis to (nm).
+        x: 1D array
+            The second (tuned) axis along the slice, in its units after conversion.
+        values: 1D array
+            The channel along the slice, the same shape as x.
+        """
+        x = np.asarray(x)
+        values = np.asarray(values)
+        if not np.issubdtype(values.dtype, np.floating):
+            values = values.astype(float)
+        self._points.append(setpoint)
+        self._lo = np.fmin(self._lo, np.nanmin(x))
+        self._hi = np.fmax(self._hi, np.nanmax(x))
+        self._reduce(x, values)
+
+    @property
+    def points(self):
+        """The setpoints received so far, in the order received."""
+        return np.array(self._points, dtype=float)
+
+    @property
+    def limits(self):
+        """Range of the second axis received so far."""
+        return self._lo, self._hi
+
+    def _spline_ready(self, values, spline_kwargs):
+        # a spline needs more points than its degree
+        if np.sum(np.isfinite(values)) <= spline_kwargs.get("k", 3):
+            raise ValueError(f"Too few setpoints received for a spline, {len(self)} so far")
+
+
+class _CentersStream(_Stream):
+    """Clipped centers of mass of each slice, as :func:`clipped_centers` finds them.
+
+    Each slice is reduced as it arrives.
+    The global tolerance depends on the maximum of all slices, so when that cutoff rises,
+    only slices whose kept values change are reduced again, when centers are next asked for.
+    Leveling subtracts the last three slices, so every slice is reduced again whenever
+    a slice has arrived since centers were last asked for.
+    """
+
+    def __init__(self, *, level, gtol, ltol):
+        super().__init__()
+        self.level = level
+        self.gtol = gtol
+        self.ltol = ltol
+        self._x = []
+        self._values = []
+        self._centers = []
+        self._local = []
+        # the kept values of a slice are unchanged for cutoffs in (dropped, kept]
+        self._kept = []
+        self._dropped = []
+        self._max = -np.inf
+        self._leveled = 0
+
+    def _reduce(self, x, values):
+        self._x.append(x)
+        self._values.append(values)
+        self._max = np.fmax(self._max, np.nanmax(values))
+        self._local.append(np.nan if self.ltol is None else np.nanmax(values) * self.ltol)
+        self._centers.append(np.nan)
+        self._kept.append(np.inf)
+        self._dropped.append(-np.inf)
+        # when leveling, slices are reduced once the leveling offset is known, see _relevel
+        if not self.level:
+            self._reduce_slice(len(self) - 1, values, self._cutoff(self._max))
+
+    def _cutoff(self, maximum):
+        return None if self.gtol is None else maximum * self.gtol
+
+    def _reduce_slice(self, i, values, cutoff):
+        clip = cutoff
+        if self.ltol is not None:
+            local = self._local[i]
+            clip = local if clip is None else np.fmax(clip, local)
+        x = self._x[i]
+        self._centers[i] = moments(values[None], x[None], 1, orders=(1,), cutoff=clip)[0][0]
+        kept, dropped = np.inf, -np.inf
+        if clip is not None:
+            with np.errstate(invalid="ignore"):
+                below = values < clip
+            finite = np.isfinite(values)
+            if np.any(~below & finite):
+                kept = np.min(values[~below & finite])
+            if np.any(below & finite):
+                dropped = np.max(values[below & finite])
+        self._kept[i], self._dropped[i] = kept, dropped
+
+    @property
+    def centers(self):
+        """Center of mass of each slice so far, as the workup would find them."""
+        if self.level:
+            if self._leveled != len(self):
+                self._relevel()
+            return np.array(self._centers)
+        cutoff = self._cutoff(self._max)
+        if cutoff is not None:
+            local = np.array(self._local)
+            clip = cutoff if self.ltol is None else np.fmax(cutoff, local)
+            with np.errstate(invalid="ignore"):
+                stale = (np.array(self._kept) < clip) | (np.array(self._dropped) >= clip)
+            for i in np.flatnonzero(stale):
+                self._reduce_slice(i, self._values[i], cutoff)
+        return np.array(self._centers)
+
+    def _relevel(self):
+        subtrahend = np.nanmean(np.stack(self._values[-3:]), axis=0)
+        leveled = [values - subtrahend for values in self._values]
+        cutoff = self._cutoff(np.nanmax([np.nanmax(values) for values in leveled]))
+        for i, values in enumerate(leveled):
+            self._local[i] = np.nan if self.ltol is None else np.nanmax(values) * self.ltol
+            self._reduce_slice(i, values, cutoff)
+        self._leveled = len(self)
+
+
+class IntensityStream(_CentersStream):
+    def __init__(
+        self,
+        *,
+        arrangement,
+        tune,
+        instrument=None,
+        level=False,
+        gtol=0.01,
+        ltol=0.1,
+        **spline_kwargs,
+    ):
+        """Intensity workup of a scan, updated as each setpoint arrives.
+
+        Once every slice of a scan is appended, :meth:`instrument` is identical to
+        :func:`attune.intensity` of the whole scan.
+        Each append costs only that slice, except when leveling (see :meth:`instrument`).
+
+        Parameters
+        ----------
+        arrangement: str
+            Name of the arrangement to modify in the instrument.
+        tune: str
+            Name of the tune to modify in the instrument.
+        instrument: attune.Instrument, optional
+            Instrument object to modify (Default None: make a new instrument).
+        level: bool, optional
+            Toggle leveling data (Defaults to False).
+        gtol: float, optional
+            Global tolerance for rejecting noise level relative to global maximum.
+        ltol: float, optional
+            Local tolerance for rejecting data relative to slice maximum.
+        **spline_kwargs: optional
+            Extra arguments to pass to spline creation.
+        """
+        super().__init__(level=level, gtol=gtol, ltol=ltol)
+        self.arrangement = arrangement
+        self.tune = tune
+        self.previous = instrument
+        self.spline_kwargs = spline_kwargs
+
+    def instrument(self):
+        """The instrument worked up from the slices received so far.
+
+        Slices whose clipping changed since the last call are reduced again.
+        When leveling, every slice is reduced again (if any arrived since the last call),
+        as the leveling offset changes with each new slice.
+
+        Raises
+        ------
+        ValueError
+            If too few setpoints have arrived to make the spline.
+        """
+        centers = self.centers
+        self._spline_ready(centers, self.spline_kwargs)
+        if self.previous is not None:
+            setpoints = self.previous[self.arrangement][self.tune].independent
+        else:
+            setpoints = self.points
+        setpoints.sort()
+        offsets = _intensity(self.points, self.limits, centers, setpoints, **self.spline_kwargs)
+        metadata = {
+            "arrangement": self.arrangement,
+            "tune": self.tune,
+            "level": self.level,
+            "gtol": self.gtol,
+            "ltol": self.ltol,
+            "spline_kwargs": self.spline_kwargs,
+            "setpoints_received": len(self),
+        }
+        transition = Transition("intensity", self.previous, metadata=metadata)
+        return apply_offsets(
+            self.previous, self.arrangement, self.tune, setpoints, offsets, transition=transition
+        )
+
+
+class TuneTestStream(_CentersStream):
+    def __init__(
+        self,
+        *,
+        arrangement,
+        instrument,
+        level=False,
+        gtol=0.01,
+        ltol=0.1,
+        restore_setpoints=True,
+        **spline_kwargs,
+    ):
+        """Tune test workup of a scan, updated as each setpoint arrives.
+
+        Once every slice of a scan is appended, :meth:`instrument` is identical to
+        :func:`attune.tune_test` of the whole scan.
+        Each append costs only that slice, except when leveling (see :meth:`instrument`).
+
+        Parameters
+        ----------
+        arrangement: str
+            Name of the arrangement to modify.
+        instrument: attune.Instrument
+            Instrument object to modify.
+        level: bool, optional
+            Toggle leveling data (Defaults to False).
+        gtol: float, optional
+            Global tolerance for rejecting noise level relative to global maximum.
+        ltol: float, optional
+            Local tolerance for rejecting data relative to slice maximum.
+        restore_setpoints: bool, optional
+            Toggles remapping onto original setpoints for each tune (default is True).
+        **spline_kwargs: optional
+            Extra arguments to pass to spline creation.
+        """
+        super().__init__(level=level, gtol=gtol, ltol=ltol)
+        self.arrangement = arrangement
+        self.previous = instrument
+        self.restore_setpoints = restore_setpoints
+        self.spline_kwargs = spline_kwargs
+
+    def instrument(self):
+        """The instrument worked up from the slices received so far.
+
+        Slices whose clipping changed since the last call are reduced again.
+        When leveling, every slice is reduced again (if any arrived since the last call),
+        as the leveling offset changes with each new slice.
+
+        Raises
+        ------
+        ValueError
+            If too few setpoints have arrived to make the spline.
+        """
+        centers = self.centers
+        self._spline_ready(centers, self.spline_kwargs)
+        setpoints = self.points
+        setpoints.sort()
+        offset_spline = _offsets(
+            self.points, self.limits, centers, setpoints, **self.spline_kwargs
+        )
+        new_instrument = shift_ind_points(
+            self.previous,
+            self.arrangement,
+            offset_spline,
+            restore_setpoints=self.restore_setpoints,
+        )
+        metadata = {
+            "arrangement": self.arrangement,
+            "level": self.level,
+            "gtol": self.gtol,
+            "ltol": self.ltol,
+            "spline_kwargs": self.spline_kwargs,
+            "setpoints_received": len(self),
+        }
+        new_instrument._transition = Transition("tune_test", self.previous, metadata=metadata)
+        return _history.limit(new_instrument)
+
+
+class SetpointStream(_Stream):
+    def __init__(self, *, arrangement, tune, instrument=None, **spline_kwargs):
+        """Setpoint workup of a scan, updated as each setpoint arrives.
+
+        The zero crossing of each slice is found as it arrives, independent of the others,
+        so each append costs only that slice.
+        Each slice has its setpoint subtracted. As :func:`attune.setpoint` does, the i-th
+        slice has the i-th (sorted) independent value of the tune subtracted when an
+        instrument is given. Otherwise, the setpoint it was appended with is subtracted,
+        so that results are identical to :func:`attune.setpoint` for scans in increasing
+        order of setpoint.
+
+        Parameters
+        ----------
+        arrangement: str
+            Name of the arrangement to modify.
+        tune: str
+            Name of the tune to modify in the instrument.
+        instrument: attune.Instrument, optional
+            Instrument object to modify (Default None: make a new instrument).
+        **spline_kwargs: optional
+            Extra arguments to pass to spline creation.
+        """
+        super().__init__()
+        self.arrangement = arrangement
+        self.tune = tune
+        self.previous = instrument
+        self.spline_kwargs = spline_kwargs
+        self._setpoints = None
+        if instrument is not None:
+            self._setpoints = np.sort(instrument[arrangement][tune].independent)
+        self._zeros = []
+
+    def _reduce(self, x, values):
+        # subtracted in place, in the precision of the channel, as the workup does
+        values = values.copy()
+        if self._setpoints is not None:
+            values -= self._setpoints[len(self) - 1]
+        else:
+            values -= self._points[-1]
+        x = np.broadcast_to(x, values.shape)
+        zero = _quadratic_zeros(x[None].astype(float), values[None].astype(float))[0]
+        self._zeros.append(zero)
+
+    @property
+    def zeros(self):
+        """Where each slice less its setpoint crosses zero."""
+        return np.array(self._zeros)
+
+    def instrument(self):
+        """The instrument worked up from the slices received so far.
+
+        Raises
+        ------
+        ValueError
+            If too few setpoints have arrived to make the spline.
+        """
+        zeros = self.zeros
+        self._spline_ready(zeros, self.spline_kwargs)
+        if self._setpoints is not None:
+            setpoints = self._setpoints.copy()
+        else:
+            setpoints = np.sort(self.points)
+        offsets = _setpoint(self.points, self.limits, zeros, setpoints, **self.spline_kwargs)
+        metadata = {
+            "arrangement": self.arrangement,
+            "tune": self.tune,
+            "spline_kwargs": self.spline_kwargs,
+            "setpoints_received": len(self),
+        }
+        transition = Transition("setpoint", self.previous, metadata=metadata)
+        return apply_offsets(
+            self.previous, self.arrangement, self.tune, setpoints, offsets, transition=transition
+        )
+
+
+class HolisticStream:
+    def __init__(
+        self, *, arrangement, tunes, instrument, gtol=0.01, refine_fits=True, **spline_kwargs
+    ):
+        """Holistic workup of motor positions arriving one at a time.
+
+        Points received since the last result are added to an incremental Delaunay
+        triangulation when :meth:`instrument` (or :attr:`out_points`) is next called.
+        Only setpoints whose iso-surface crosses an edge of a changed simplex (or an edge
+        whose validity changed with the global tolerance) are then found and fit again.
+        Results match ``attune.holistic(..., method="delaunay")`` of the same points,
+        to within the differences of the triangulations (for degenerate, e.g. gridded,
+        points, the incremental triangulation may split cells differently).
+
+        Parameters
+        ----------
+        arrangement: str
+            Name of the arrangement to modify.
+        tunes: iterable of str
+            Names of the tunes to modify, in the order of the coordinates of each point.
+        instrument: attune.Instrument
+            Instrument object to modify. Setpoints are determined from the instrument.
+        gtol: float, optional
+            Global tolerance for rejecting noise level relative to the global maximum.
+        refine_fits: bool, optional
+            Toggle refining the closed form Gaussian estimate of each iso-line with a
+            nonlinear least squares fit.
+        **spline_kwargs: optional
+            Extra arguments to pass to spline creation.
+        """
+        self.arrangement = arrangement
+        self.tunes = list(tunes)
+        self.previous = instrument
+        self.gtol = gtol
+        self.refine_fits = refine_fits
+        self.spline_kwargs = spline_kwargs
+        self.setpoints = instrument[arrangement].independent
+        self._ndim = len(self.tunes)
+        self._pending = []
+        self._points = np.empty((0, self._ndim))
+        self._amplitudes = np.empty(0)
+        self._centers = np.empty(0)
+        self._delaunay = None
+        # simplices (as sorted tuples of vertices), and those each vertex belongs to
+        self._simplices = set()
+        self._incident = {}
+        self._edge_counts = {}
+        self._changed = set()
+        self._valid = np.empty(0, dtype=bool)
+        # edges crossing each setpoint, and the setpoints each edge crosses
+        self._crossings = [set() for _ in self.setpoints]
+        self._runs = {}
+        self._out_points = np.full((len(self.setpoints), self._ndim), np.nan)
+
+    def __len__(self):
+        return len(self._points) + len(self._pending)
+
+    def append(self, position, amplitude, center):
+        """Add a point.
+
+        Parameters
+        ----------
+        position: 1D array-like
+            The position of each motor, in the order of tunes.
+        amplitude: float
+            The amplitude (zeroth moment) of the spectrum at this position.
+        center: float
+            The center (first moment) of the spectrum at this position.
+        """
+        self._pending.append((np.asarray(position, dtype=float), amplitude, center))
+
+    def _triangulate(self):
+        """Add pending points to the triangulation, and count the edges of changed simplices."""
+        if not self._pending:
+            return
+        positions, amplitudes, centers = zip(*self._pending)
+        self._pending = []
+        positions = np.reshape(positions, (-1, self._ndim))
+        nold = 0 if self._delaunay is None else len(self._points)
+        self._points = np.concatenate([self._points, positions])
+        self._amplitudes = np.append(self._amplitudes, amplitudes)
+        self._centers = np.append(self._centers, centers)
+        if self._delaunay is None:
+            if len(self._points) < self._ndim + 2:
+                return
+            try:
+                self._delaunay = scipy.spatial.Delaunay(self._points, incremental=True)
+            except scipy.spatial.QhullError:
+                # e.g. all points so far on a line, wait for more
+                return
+        else:
+            self._delaunay.add_points(positions)
+        added, removed = self._changed_simplices(nold)
+        for change, group in [(1, added), (-1, removed)]:
+            for simplex in group:
+                for v in simplex:
+                    if change > 0:
+                        self._incident.setdefault(v, set()).add(simplex)
+                    else:
+                        self._incident[v].discard(simplex)
+                for edge in itertools.combinations(simplex, 2):
+                    count = self._edge_counts.get(edge, 0) + change
+                    if count:
+                        self._edge_counts[edge] = count
+                    else:
+                        del self._edge_counts[edge]
+                    self._changed.add(edge)
+        self._simplices.difference_update(removed)
+        self._simplices.update(added)
+
+    def _changed_simplices(self, nold):
+        """Simplices added and removed by the points from index nold on.
+
+        Simplices which change when points are added are those with a vertex among them,
+        and those they replace, whose vertices are all shared with the new simplices.
+        Only simplices with all their vertices among those are compared.
+        """
+        simplices = self._delaunay.simplices
+        region = np.zeros(len(self._points), dtype=bool)
+        region[nold:] = True
+        region[simplices[region[simplices].any(axis=1)]] = True
+        after = np.sort(simplices[region[simplices].all(axis=1)], axis=1)
+        after = set(map(tuple, after.tolist()))
+        before = set()
+        for v in np.flatnonzero(region[:nold]).tolist():
+            before.update(s for s in self._incident.get(v, ()) if region[list(s)].all())
+        added, removed = after - before, before - after
+        if len(self._simplices) + len(added) - len(removed) != len(simplices):
+            # degenerate (e.g. cospherical) cells elsewhere may have been split again
+            after = set(map(tuple, np.sort(simplices, axis=1).tolist()))
+            added, removed = after - self._simplices, self._simplices - after
+        return added, removed
+
+    @property
+    def out_points(self):
+        """The fit center of the iso-surface of each setpoint along each motor.
+
+        (nsetpoints, nmotors) array, NaN where there are too few points to fit.
+        """
+        self._triangulate()
+        if self._delaunay is None:
+            return self._out_points.copy()
+        amplitudes = self._amplitudes.copy()
+        if self.gtol is not None:
+            with np.errstate(invalid="ignore"):
+                amplitudes[amplitudes < np.nanmax(amplitudes) * self.gtol] = np.nan
+        valid = np.isfinite(amplitudes)
+        values = np.where(valid, self._centers, np.nan)
+
+        # edges which changed, or whose vertices became valid or invalid
+        changed = self._changed
+        for v in np.flatnonzero(valid[: len(self._valid)] != self._valid).tolist():
+            for simplex in self._incident.get(v, ()):
+                changed.update(e for e in itertools.combinations(simplex, 2) if v in e)
+        self._changed = set()
+        self._valid = valid
+        dirty = self._update_crossings(changed, values)
+        if not dirty.size:
+            return self._out_points.copy()
+
+        iso_points, iso_amps, iso_weights = [], [], []
+        for i in dirty.tolist():
+            keys = sorted(self._crossings[i])
+            edges = np.array(keys, dtype=int).reshape(-1, 2)
+            # oriented from the lower to the higher value, as _edge_crossings does
+            flip = values[edges[:, 0]] > values[edges[:, 1]]
+            edges[flip] = edges[flip, ::-1]
+            start, stop = edges.T
+            frac = (self.setpoints[i] - values[start]) / (values[stop] - values[start])
+            iso_points.append(
+                self._points[start] + (self._points[stop] - self._points[start]) * frac[:, None]
+            )
+            iso_amps.append(amplitudes[start] + (amplitudes[stop] - amplitudes[start]) * frac)
+            iso_weights.append(np.array([self._edge_counts[e] for e in keys], dtype=int))
+        self._out_points[dirty] = _fit_centers(
+            iso_points, iso_amps, iso_weights, self._ndim, refine=self.refine_fits
+        )
+        return self._out_points.copy()
+
+    def _update_crossings(self, edges, values):
+        """Update the setpoints crossed by each of edges, returning those which changed.
+
+        An edge crosses setpoint t if its (valid) values at either end are lo < t <= hi.
+        """
+        dirty = set()
+        for edge in edges:
+            run = self._runs.pop(edge, ())
+            for i in run:
+                self._crossings[i].discard(edge)
+            dirty.update(run)
+        edges = [e for e in edges if e in self._edge_counts]
+        ends = values[np.array(edges, dtype=int).reshape(-1, 2)]
+        keep = np.all(np.isfinite(ends), axis=1)
+        lo, hi = np.fmin(ends[keep, 0], ends[keep, 1]), np.fmax(ends[keep, 0], ends[keep, 1])
+        order = np.argsort(self.setpoints)
+        starts = np.searchsorted(self.setpoints[order], lo, side="right")
+        stops = np.searchsorted(self.setpoints[order], hi, side="right")
+        for edge, start, stop in zip(itertools.compress(edges, keep), starts, stops):
+            if start < stop:
+                run = order[start:stop].tolist()
+                self._runs[edge] = run
+                for i in run:
+                    self._crossings[i].add(edge)
+                dirty.update(run)
+        return np.array(sorted(dirty), dtype=int)
+
+    def instrument(self):
+        """The instrument worked up from the points received so far.
+
+        Raises
+        ------
+        ValueError
+            If too few setpoints have been fit to make the splines.
+        """
+        out_points = self.out_points
+        for vals in out_points.T:
+            if np.sum(np.isfinite(vals)) <= self.spline_kwargs.get("k", 3):
+                raise ValueError(f"Too few setpoints fit for a spline, from {len(self)} points")
+        splines = [
+            wt.kit.Spline(self.setpoints, vals, **self.spline_kwargs) for vals in out_points.T
+        ]
+        metadata = {
+            "arrangement": self.arrangement,
+            "tunes": self.tunes,
+            "gtol": self.gtol,
+            "method": "delaunay",
+            "refine_fits": self.refine_fits,
+            "spline_kwargs": self.spline_kwargs,
+            "points_received": len(self),
+        }
+        transition = Transition("holistic", self.previous, metadata=metadata)
+        return _gen_instr(self.previous, self.arrangement, self.tunes, splines, transition)
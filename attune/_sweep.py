@@ -0,0 +1,146 @@
+"""Evaluate workup parameters over a grid of values, reading the data once."""
+
+__all__ = ["sweep"]
+
+
+import itertools
+
+import numpy as np
+import WrightTools as wt
+
+from ._common import axes_view, axis_rows, get_channel, read_rows, setpoint_blocks
+from ._moments import moments
+
+
+def sweep(
+    workup,
+    *,
+    data,
+    channel,
+    arrangement=None,
+    tune=None,
+    instrument=None,
+    level=(False,),
+    gtol=(0.01,),
+    ltol=(0.1,),
+    spline_kwargs=({},),
+):
+    """Offsets and quality metrics of intensity or tune test workups, for many parameters.
+
+    Every combination of the given values is evaluated.
+    The channel is streamed in blocks of setpoints, each read once for all of the
+    combinations of level, gtol and ltol, as :func:`attune.intensity` reads it for one.
+    Splines are then made from the centers of each of those, with each of spline_kwargs.
+    Nothing is plotted, and no instrument is made.
+
+    Parameters
+    ----------
+    workup: {"intensity", "tune_test"}
+        The workup to evaluate.
+    data: WrightTools.Data
+        Should be in (setpoint, dependent).
+    channel: WrightTools.data.Channel or int or str
+        Channel to process.
+    arrangement: str, optional
+        Name of the arrangement, required if an instrument is given.
+    tune: str, optional
+        Name of the tune, whose independent values are the setpoints of intensity offsets.
+        Default is None, which uses the setpoints of the data.
+    instrument: attune.Instrument, optional
+        Instrument, to take the setpoints of the tune from.
+    level: iterable of bool, optional
+        Values of level to try. Default is (False,).
+    gtol: iterable of float, optional
+        Values of gtol to try. Default is (0.01,).
+    ltol: iterable of float, optional
+        Values of ltol to try. Default is (0.1,).
+    spline_kwargs: iterable of dict, optional
+        Spline arguments to try. Default is ({},).
+
+    Returns
+    -------
+    list of dict
+        One row per combination, with keys "level", "gtol", "ltol", "spline_kwargs",
+        "setpoints", "offsets" (as the workup would apply them at setpoints), "residual"
+        (root mean square difference of the spline and the centers it was made from) and
+        "nan_count" (number of setpoints without a center).
+        Offsets and residual are NaN where too few centers remain for the spline.
+    """
+    if workup not in ("intensity", "tune_test"):
+        raise ValueError(f"Cannot sweep the parameters of '{workup}'")
+    view = axes_view(data)
+    if workup == "intensity" and instrument is not None:
+        setpoints = instrument[arrangement][tune].independent
+    else:
+        setpoints = view.axes[0].points
+    setpoints.sort()
+    channel = get_channel(data, channel)
+
+    level, gtol, ltol = list(level), list(gtol), list(ltol)
+    tolerances = list(itertools.product(gtol, ltol))
+    centers, (lo, hi) = _sweep_centers(view, channel, level, tolerances)
+
+    x = view.axes[0].points
+    rows = []
+    for (lev, (g, l)), kwargs in itertools.product(
+        itertools.product(level, tolerances), spline_kwargs
+    ):
+        c = centers[lev, g, l]
+        finite = np.isfinite(c)
+        row = {
+            "level": lev,
+            "gtol": g,
+            "ltol": l,
+            "spline_kwargs": kwargs,
+            "setpoints": setpoints,
+            "offsets": np.full(len(setpoints), np.nan),
+            "residual": np.nan,
+            "nan_count": int(np.sum(~finite)),
+        }
+        if np.sum(finite) > kwargs.get("k", 3):
+            spline = wt.kit.Spline(x, c, **kwargs)
+            offsets = spline(setpoints)
+            if workup == "intensity":
+                offsets = offsets.clip(lo, hi)
+            row["offsets"] = offsets
+            row["residual"] = np.sqrt(np.mean((spline(x[finite]) - c[finite]) ** 2))
+        rows.append(row)
+    return rows
+
+
+def _sweep_centers(view, channel, levels, tolerances):
+    """Centers of mass as :func:`clipped_centers` finds them, for each level and tolerances.
+
+    Also returns the minimum and maximum of the second axis of view.
+    """
+    blocks = setpoint_blocks(channel)
+    subtrahends = {False: 0}
+    if True in levels:
+        subtrahends[True] = np.nanmean(read_rows(channel, slice(-3, None)), axis=0, keepdims=True)
+    joint = wt.kit.joint_shape(*view.axes)
+    dim = [s != r for s, r in zip(joint, view.axes[0].shape)].index(True)
+
+    # global maxima of each leveling, all from one pass
+    maxima = {lev: -np.inf for lev in levels}
+    if any(g is not None for g, _ in tolerances):
+        for block in blocks:
+            values = read_rows(channel, block)
+            for lev in maxima:
+                maxima[lev] = np.fmax(maxima[lev], np.nanmax(values - subtrahends[lev]))
+
+    centers = {(lev, g, l): [] for lev in levels for g, l in tolerances}
+    lo, hi = np.inf, -np.inf
+    for block in blocks:
+        raw = read_rows(channel, block)
+        x = axis_rows(view.axes[1], block)
+        lo, hi = np.fmin(lo, np.nanmin(x)), np.fmax(hi, np.nanmax(x))
+        for lev in levels:
+            values = raw - subtrahends[lev]
+            local_max = np.nanmax(values, axis=1, keepdims=True)
+            for g, l in tolerances:
+                clip = None if g is None else maxima[lev] * g
+                if l is not None:
+                    clip = local_max * l if clip is None else np.fmax(clip, local_max * l)
+                centers[lev, g, l].append(moments(values, x, dim, orders=(1,), cutoff=clip)[0])
+    centers = {k: np.squeeze(np.concatenate(v)) for k, v in centers.items()}
+    return centers, (lo, hi)
@@ -0,0 +1,105 @@
+"""Timings of the stages of workups."""
+
+__all__ = ["trace_report"]
+
+
+import contextlib
+
+from . import _metrics
+
+
+class Trace:
+    """Seconds spent in each stage of one workup.
+
+    Stages are timed with :meth:`span`, which may be nested: time spent in an inner stage
+    is not counted in the outer one, so that the stages add up to the whole workup.
+    A stage entered more than once accumulates.
+    When metrics are enabled, each span is also recorded as ``"<workup>.<stage>"``,
+    see :func:`attune.metrics`.
+    """
+
+    def __init__(self, workup):
+        self.workup = workup
+        self.stages = {}
+        # [stage, resumed, seconds] of each open span, innermost last
+        self._stack = []
+
+    def _charge(self, now):
+        frame = self._stack[-1]
+        seconds = now - frame[1]
+        frame[2] += seconds
+        self.stages[frame[0]] = self.stages.get(frame[0], 0.0) + seconds
+
+    @contextlib.contextmanager
+    def span(self, stage):
+        now = _metrics.clock()
+        if self._stack:
+            self._charge(now)
+        self._stack.append([stage, now, 0.0])
+        try:
+            yield
+        finally:
+            now = _metrics.clock()
+            self._charge(now)
+            seconds = self._stack.pop()[2]
+            if self._stack:
+                self._stack[-1][1] = now
+            if _metrics.enabled:
+                _metrics.record(f"{self.workup}.{stage}", seconds)
+
+
+@contextlib.contextmanager
+def _untimed():
+    yield
+
+
+def span(trace, stage):
+    """Time a stage of trace, which may be None to time nothing."""
+    if trace is None:
+        return _untimed()
+    return trace.span(stage)
+
+
+def trace_report(source):
+    """Tabulate the seconds spent in each stage of a workup.
+
+    Parameters
+    ----------
+    source: attune.Instrument or attune.Transition or dict
+        The result of a workup (its transition), or the timings themselves.
+        Timings are those kept in memory by the workup, or else those persisted in the
+        transition metadata by ``trace=True``.
+
+    Returns
+    -------
+    str
+        One line for each stage, in the order they were first entered, with seconds and
+        percent of the total, then the total.
+
+    Raises
+    ------
+    ValueError
+        If source has no timings.
+
+    Examples
+    --------
+    >>> new = attune.intensity(data=data, channel="signal", ...)
+    >>> print(attune.trace_report(new))
+    stage            seconds       %
+    copy              0.0042     4.9
+    ...
+    """
+    stages = source
+    if hasattr(stages, "transition"):
+        stages = stages.transition
+    if hasattr(stages, "metadata"):
+        stages = stages.trace if stages.trace is not None else stages.metadata.get("trace")
+    if not stages:
+        raise ValueError("No stage timings, only workups are traced")
+    total = sum(stages.values())
+    width = max(len("total"), *(len(stage) for stage in stages)) + 2
+    lines = [f"{'stage':<{width}}{'seconds':>12}{'%':>8}"]
+    for stage, seconds in list(stages.items()) + [("total", total)]:
+        percent = 100 * seconds / total if total else 0
+        lines.append(f"{stage:<{width}}{seconds:>12.4f}{percent:>8.1f}")
+    return "\n".join(lines)
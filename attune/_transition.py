@@ -19,10 +19,12 @@ class TransitionType(str, Enum):
     offset_by = "offset_by"
     map_limits = "map_limits"
     map_ind_points = "map_ind_points"
+    shift_ind_points = "shift_ind_points"
     tune_test = "tune_test"
     intensity = "intensity"
     setpoint = "setpoint"
     holistic = "holistic"
+    patch = "patch"
 
 
 class Transition:
@@ -32,6 +34,7 @@ class Transition:
         previous: Optional["Instrument"] = None,
         metadata: Optional[Dict[str, Any]] = None,
         data: Optional["wt.Data"] = None,
+        trace: Optional[Dict[str, float]] = None,
     ):
         """Represent one processing step of an instrument.
 
@@ -45,16 +48,41 @@ class Transition:
             JSON serializable metadata associated with the transition.
         data: Optional["wt.Data"]
             A WrightTools Data object that was used to generate the transition.
+        trace: Optional[Dict[str, float]]
+            Seconds spent in each stage of the workup which made the transition.
+            Like data, kept in memory only, unless also put in metadata.
         """
         self.type = type
-        self.previous = previous
+        self._previous = previous
         if metadata is None:
             metadata = {}
         self.metadata = metadata
-        self.data = data
+        self._data = data
+        self.trace = trace
 
     def __repr__(self):
-        return f"Transition({repr(self.type)}, {repr(self.previous)}, {repr(self.metadata)})"
+        return f"Transition({repr(self.type)}, {repr(self._previous)}, {repr(self.metadata)})"
+
+    @property
+    def previous(self) -> Optional["Instrument"]:
+        """The instrument which was modified, read back from disk if spilled.
+
+        See :func:`attune.trim_history`.
+        """
+        from ._history import Reference
+
+        if isinstance(self._previous, Reference):
+            return self._previous.resolve()
+        return self._previous
+
+    @property
+    def data(self) -> Optional["wt.Data"]:
+        """The data used to generate the transition, read back from disk if spilled."""
+        from ._history import Reference
+
+        if isinstance(self._data, Reference):
+            return self._data.resolve()
+        return self._data
 
     def as_dict(self) -> Dict[str, Any]:
         """JSON serializable representation of the transition."""
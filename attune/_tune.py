@@ -1,10 +1,18 @@
 __all__ = ["Tune"]
 
 
+import hashlib
+import sys
+
 import WrightTools as wt
 import numpy as np
 import scipy.interpolate
 
+from . import _metrics
+
+
+_convert = wt.units.convert
+
 
 class Tune:
     def __init__(self, independent, dependent, *, dep_units=None, **kwargs):
@@ -24,6 +32,9 @@ class Tune:
         dep_units: str (optional)
             Units for the dependent axis
 
+        Tunes are treated as immutable: equality first compares a digest of the content,
+        which is computed once, and only compares points if the digests differ.
+
         Note: kwargs are provided to make the serialized dictionary with ind_units
         easy to initialize into a Tune object, but are currently ignored.
         """
@@ -34,6 +45,7 @@ class Tune:
         self._ind_units = "nm"
         self._dep_units = dep_units
         self._interp = scipy.interpolate.interp1d(independent, dependent, fill_value="extrapolate")
+        self._digest = None
 
     def __repr__(self):
         if self.dep_units is None:
@@ -42,22 +54,50 @@ class Tune:
 
     def __call__(self, ind_value, *, ind_units=None, dep_units=None):
         if ind_units is not None and self._ind_units is not None:
-            ind_value = wt.units.convert(ind_value, ind_units, self._ind_units)
+            ind_value = _convert(ind_value, ind_units, self._ind_units)
         ret = self._interp(ind_value)
         if dep_units is not None and self._dep_units is not None:
-            ret = wt.units.convert(ret, self._dep_units, dep_units)
+            ret = _convert(ret, self._dep_units, dep_units)
         return ret
 
     def __len__(self):
         return len(self.independent)
 
     def __eq__(self, other):
-        if not np.allclose(self.independent, other.independent):
+        if not isinstance(other, Tune):
+            return False
+        if self.digest == other.digest:
+            return True
+        if len(self) != len(other) or not np.allclose(self.independent, other.independent):
             return False
         if not np.allclose(self(self.independent), other(other.independent)):
             return False
         return self.ind_units == other.ind_units and self.dep_units == other.dep_units
 
+    def isclose(self, other, *, rtol=1e-05, atol=1e-08):
+        """Whether another tune has the same units and approximately the same points.
+
+        Parameters
+        ----------
+        other: Tune
+            The tune to compare to.
+        rtol: float, optional
+            Relative tolerance, as in ``numpy.allclose``.
+        atol: float, optional
+            Absolute tolerance, as in ``numpy.allclose``.
+        """
+        if not isinstance(other, Tune):
+            return False
+        if self.ind_units != other.ind_units or self.dep_units != other.dep_units:
+            return False
+        if self.digest == other.digest:
+            return True
+        if len(self) != len(other):
+            return False
+        if not np.allclose(self.independent, other.independent, rtol=rtol, atol=atol):
+            return False
+        return np.allclose(self.dependent, other.dependent, rtol=rtol, atol=atol)
+
     def as_dict(self):
         """Serialize this Tune as a python dictionary."""
         out = {}
@@ -67,6 +107,18 @@ class Tune:
         out["dep_units"] = self.dep_units
         return out
 
+    @property
+    def digest(self):
+        """Hex digest of the units and points of the tune."""
+        if self._digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            h.update(repr((self.ind_units, self.dep_units)).encode())
+            # adding zero normalizes -0.0, which would otherwise hash differently from 0.0
+            h.update(np.ascontiguousarray(self.independent + 0.0).tobytes())
+            h.update(np.ascontiguousarray(self.dependent + 0.0).tobytes())
+            self._digest = h.hexdigest()
+        return self._digest
+
     @property
     def independent(self):
         """The independent (input) values for the tune points."""
@@ -96,3 +148,7 @@ class Tune:
     def dep_units(self):
         """The units of the dependent (output) values."""
         return self._dep_units
+
+
+_metrics.register(Tune, "__call__", "Tune.__call__")
+_metrics.register(sys.modules[__name__], "_convert", "units.convert")
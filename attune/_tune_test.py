@@ -5,26 +5,23 @@ import numpy as np
 
 import WrightTools as wt
 
-from ._discrete_tune import DiscreteTune
-from ._instrument import Instrument
+from ._trace import Trace
 from ._transition import Transition
 from ._plot import plot_tune_test
-from ._common import save
-from ._map import map_ind_points
+from . import _cache, _history
+from ._common import axes_view, clipped_centers, finish, get_channel
+from ._map import shift_ind_points
 
 __all__ = ["tune_test"]
 
 
-def _offsets(data, channel_name, tune_points, *, spline=True, **spline_kwargs):
-    data.moment(axis=1, channel=channel_name, moment=1, resultant=data.axes[0].shape)
-    offsets = data[f"{channel_name}_1_moment_1"].points
-
+def _offsets(points, limits, centers, tune_points, *, spline=True, **spline_kwargs):
     if spline:
-        return wt.kit.Spline(data.axes[0].points, offsets, **spline_kwargs)
-    if np.allclose(data.axes[0].points, tune_points):
-        return offsets.clip(data.axes[1].min(), data.axes[1].max())
-    if np.allclose(data.axes[0].points, tune_points[::-1]):
-        return offsets.clip(data.axes[1].min(), data.axes[1].max())[::-1]
+        return wt.kit.Spline(points, centers, **spline_kwargs)
+    if np.allclose(points, tune_points):
+        return centers.clip(*limits)
+    if np.allclose(points, tune_points[::-1]):
+        return centers.clip(*limits)[::-1]
     else:
         raise ValueError("Data points and instrument points do not match, and splining disabled")
 
@@ -39,8 +36,11 @@ def tune_test(
     gtol=0.01,
     ltol=0.1,
     restore_setpoints=True,
+    plot=True,
+    cache=True,
     autosave=True,
     save_directory=None,
+    trace=False,
     **spline_kwargs,
 ):
     """Workup a Tune Test.
@@ -63,10 +63,21 @@ def tune_test(
         local tolerance for rejecting data relative to slice maximum
     restore_setpoints: bool, optional
         toggles remapping onto original setpoints for each tune (default is True)
+    plot: bool or "deferred", optional
+        toggles plotting (Defaults to True).
+        "deferred" returns immediately, rendering in the background (see wait_for_plots)
+    cache: bool, optional
+        toggles reusing the centers of mass cached on disk by an earlier
+        call with the same data and parameters (Defaults to True).
+        Only used when not plotting, which needs the clipped channel anyway.
     autosave: bool, optional
         toggles saving of instrument file and images (Defaults to True)
     save_directory: Path-like
         where to save (Defaults to current working directory)
+    trace: bool, optional
+        toggles persisting the seconds spent in each stage in the transition metadata,
+        as "trace" (Defaults to False). They are kept in memory either way,
+        see trace_report.
     **spline_kwargs: optional
         extra arguments to pass to spline creation (e.g. s=0, k=1 for linear interpolation)
 
@@ -85,62 +96,77 @@ def tune_test(
     }
     if not isinstance(channel, (int, str)):
         metadata["channel"] = channel.natural_name
-    transition = Transition("tune_test", instrument, metadata=metadata, data=data)
-
-    data = data.copy()
-    data.convert("nm")
+    timings = Trace("tune_test")
+    if trace:
+        metadata["trace"] = timings.stages
+    transition = Transition(
+        "tune_test", instrument, metadata=metadata, data=data, trace=timings.stages
+    )
 
-    setpoints = data.axes[0].points
+    view = axes_view(data, trace=timings)
+    setpoints = view.axes[0].points
     setpoints.sort()
 
-    if isinstance(channel, (int, str)):
-        channel = data.channels[wt.kit.get_index(data.channel_names, channel)]
-        orig_channel = data.create_channel(
-            f"{channel.natural_name}_orig", channel, units=channel.units
-        )
-
+    # only the one channel is read, in blocks of setpoints
+    channel = get_channel(data, channel)
+    channel_name = channel.natural_name
+    # the clipped channel is only written out to plot it
+    clipped = None
+    if plot:
+        clipped = view.create_channel(channel_name, shape=channel.shape, units=channel.units)
+        clipped.null = 0 if level else channel.null
     # TODO: check if level does what we want
-    if level:
-        data.level(channel.natural_name, 0, -3)
-
     # TODO: gtol/ltol should maybe be moved to wt
-    cutoff = channel.max() * gtol
-    channel.clip(min=cutoff)
-    max_axis = tuple(i for i, v in enumerate(data.axes[0].shape) if v > 1)
-    cutoff = np.nanmax(channel[:], axis=1, keepdims=True) * ltol
-    channel.clip(min=cutoff)
-
-    offset_spline = _offsets(data, channel.natural_name, setpoints, **spline_kwargs)
-    try:
-        raw_offsets = _offsets(data, channel.natural_name, setpoints, spline=False)
-    except ValueError:
-        raw_offsets = None
-
-    old_instrument = instrument.as_dict()
-    for tune in old_instrument["arrangements"][arrangement]["tunes"].values():
-        if "ranges" in tune:
-            # Discrete tune in dict form
-            continue
-        tune["independent"] += offset_spline(tune["independent"])
-    new_instrument = Instrument(**old_instrument)
-
-    if restore_setpoints:
-        for tune in new_instrument[arrangement].keys():
-            if isinstance(instrument[arrangement][tune], DiscreteTune):
-                continue
-            new_instrument = map_ind_points(
-                new_instrument, arrangement, tune, instrument[arrangement][tune].independent
+    with timings.span("cache"):
+        key = None
+        if cache and not plot:
+            key = _cache.key(
+                "clipped_centers",
+                {
+                    "level": level,
+                    "gtol": gtol,
+                    "ltol": ltol,
+                    "axes": view.axis_expressions,
+                    "units": [a.units for a in view.axes],
+                    "variables": [v.units for v in view.variables],
+                },
+                channels=[*view.variables, channel],
             )
+        centers, limits = _cache.cached(
+            key,
+            lambda: clipped_centers(
+                view, channel, level=level, gtol=gtol, ltol=ltol, out=clipped, trace=timings
+            ),
+        )
 
-    new_instrument._transition = transition
+    with timings.span("spline"):
+        points = view.axes[0].points
+        offset_spline = _offsets(points, limits, centers, setpoints, **spline_kwargs)
+        try:
+            raw_offsets = _offsets(points, limits, centers, setpoints, spline=False)
+        except ValueError:
+            raw_offsets = None
+        used_offsets = offset_spline(setpoints)
+
+    with timings.span("instrument"):
+        new_instrument = shift_ind_points(
+            instrument, arrangement, offset_spline, restore_setpoints=restore_setpoints
+        )
+        new_instrument._transition = transition
+        _history.limit(new_instrument)
 
-    fig, _ = plot_tune_test(
-        data,
-        channel.natural_name,
-        used_offsets=offset_spline(setpoints),
-        raw_offsets=raw_offsets,
-    )
+    def make_figure(**kwargs):
+        return plot_tune_test(
+            view, channel_name, used_offsets=used_offsets, raw_offsets=raw_offsets, **kwargs
+        )
 
-    if autosave:
-        save(new_instrument, fig, "tune_test", save_directory)
+    finish(
+        new_instrument,
+        make_figure,
+        "tune_test",
+        plot=plot,
+        autosave=autosave,
+        save_directory=save_directory,
+        trace=timings,
+    )
     return new_instrument
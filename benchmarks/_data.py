@@ -0,0 +1,113 @@
+"""Synthetic WrightTools data shared by the benchmarks."""
+
+import numpy as np
+import WrightTools as wt
+
+import attune
+
+
+def holistic_2d(n=100):
+    """Two motor holistic scan on an n by n grid, with amplitude and center channels.
+
+    Returns the data and an instrument with an arrangement "arr" with tunes "c1" and "c2".
+    """
+    data = wt.Data(name="holistic")
+    m1 = np.linspace(-1.5, 1.5, n)[:, None]
+    m2 = np.linspace(-3, 3, n)[None, :]
+    data.create_variable("c1", values=m1)
+    data.create_variable("c2", values=m2)
+    data.create_channel("amp", values=np.exp(-((m2 - 2 * m1 - 0.5) ** 2) / 0.5))
+    data.create_channel("cen", values=1350 + 40 * m1 + 5 * m2)
+    data.transform("c1", "c2")
+    setpoints = np.linspace(1300, 1400, 21)
+    arr = attune.Arrangement(
+        "arr",
+        {
+            "c1": attune.Tune(setpoints, np.linspace(-1, 1, 21)),
+            "c2": attune.Tune(setpoints, np.linspace(-2, 2, 21)),
+        },
+    )
+    return data, attune.Instrument({"arr": arr})
+
+
+def setpoint_2d(n=100, m=200):
+    """Setpoint scan of n setpoints by m motor positions, with a "wm" channel.
+
+    Returns the data and an instrument with an arrangement "arr" with a tune "c2".
+    """
+    data = wt.Data(name="setpoint")
+    w = np.linspace(1300, 1400, n)[:, None]
+    c2 = np.linspace(-1, 1, m)[None, :]
+    data.create_variable("w1", values=w, units="nm")
+    data.create_variable("c2", values=c2)
+    data.create_channel("wm", values=w + 20 * (c2 - 0.3 * np.sin(w / 20)) + 3 * (c2 - 0.1) ** 2)
+    data.transform("w1", "c2")
+    arr = attune.Arrangement("arr", {"c2": attune.Tune(w.ravel(), np.zeros(n))})
+    return data, attune.Instrument({"arr": arr})
+
+
+def intensity_2d(n=100, m=200, extra_channels=0):
+    """Scan of n setpoints by m motor offsets, with a peaked "sig" channel.
+
+    Extra channels of the same shape mimic the other signals recorded alongside,
+    which the workups should not need to read.
+    Returns the data and an instrument with an arrangement "arr" with a tune "c1".
+    """
+    data = wt.Data(name="intensity")
+    w = np.linspace(1300, 1400, n)[:, None]
+    d1 = np.linspace(-1, 1, m)[None, :]
+    data.create_variable("w1", values=w, units="nm")
+    data.create_variable("d1", values=d1)
+    data.create_channel("sig", values=np.exp(-((d1 - 0.3 * np.sin(w / 20)) ** 2) / 0.1))
+    for i in range(extra_channels):
+        data.create_channel(f"extra{i}", values=np.broadcast_to(w + d1, (n, m)))
+    data.transform("w1", "d1")
+    arr = attune.Arrangement(
+        "arr",
+        {
+            "c1": attune.Tune(w.ravel(), np.linspace(-5, 5, n)),
+            "c2": attune.Tune(w.ravel(), np.linspace(0, 1, n)),
+        },
+    )
+    return data, attune.Instrument({"arr": arr})
+
+
+# (setpoints, points along the scanned axis) of the simulated scans, by size
+SIZES = {"small": (21, 51), "medium": (101, 201), "large": (501, 1001)}
+
+
+def simulated(workup, size):
+    """A scan simulated by :class:`attune.OPASimulator`, with the instrument which took it.
+
+    The instrument has an arrangement "sig" with tunes "crystal" (setting the color) and
+    "delay", both off their true curves. Holistic scans are square grids of the two motors,
+    with as many points along each as the scanned axis of the other workups.
+    """
+    n, m = SIZES[size]
+    setpoints = np.linspace(1300, 1500, n)
+
+    def make(crystal, delay):
+        arr = attune.Arrangement(
+            "sig",
+            {"crystal": attune.Tune(setpoints, crystal), "delay": attune.Tune(setpoints, delay)},
+        )
+        return attune.Instrument({"sig": arr})
+
+    truth = make(20 + 0.05 * (setpoints - 1300), 2 + 0.3 * np.sin((setpoints - 1300) / 50))
+    instrument = make(
+        truth["sig"]["crystal"].dependent + 0.1 * np.cos(setpoints / 40),
+        truth["sig"]["delay"].dependent - 0.05,
+    )
+    sim = attune.OPASimulator(truth, acceptance={"delay": 0.2}, linewidth=5, seed=0)
+    offsets = np.linspace(-1, 1, m)
+    if workup == "tune_test":
+        data = sim.tune_test(instrument, "sig", detunings=np.linspace(-25, 25, m))
+    elif workup == "intensity":
+        data = sim.intensity(instrument, "sig", "delay", offsets)
+    elif workup == "setpoint":
+        data = sim.setpoint(instrument, "sig", "crystal", offsets)
+    else:
+        data = sim.holistic(
+            "sig", {"crystal": np.linspace(19, 31, m), "delay": np.linspace(1, 3.5, m)}
+        )
+    return data, instrument
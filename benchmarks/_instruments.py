@@ -0,0 +1,54 @@
+"""Synthetic instruments shared by the benchmarks."""
+
+import numpy as np
+
+import attune
+
+
+def topas4_like(n_arrangements=12, n_motors=8, n_points=200):
+    """An instrument roughly the size of a fully configured Topas4 calibration.
+
+    Every arrangement covers the same range, has ``n_motors`` continuous tunes of
+    ``n_points`` points each and one discrete tune.
+    """
+    setpoints = np.linspace(1140, 2600, n_points)
+    arrangements = {}
+    setables = {}
+    for i in range(n_arrangements):
+        tunes = {}
+        for j in range(n_motors):
+            name = f"motor{j}"
+            tunes[name] = attune.Tune(setpoints, np.sin(setpoints / (100 + i + j)) + j)
+            setables[name] = attune.Setable(name)
+        tunes["shutter"] = attune.DiscreteTune(
+            {"open": (1140, 1800), "closed": (1800, 2600)}, default="closed"
+        )
+        setables["shutter"] = attune.Setable("shutter")
+        arrangements[f"arr{i}"] = attune.Arrangement(f"arr{i}", tunes)
+    return attune.Instrument(arrangements, setables, name="bench")
+
+
+def nested(depth, n_motors=8, n_points=200):
+    """An instrument whose arrangement "arr{depth}" nests ``depth`` arrangements deep.
+
+    "arr0" has ``n_motors`` continuous tunes and one discrete tune, each further
+    arrangement has one tune mapping onto the arrangement below it, and one motor of its own.
+    """
+    setpoints = np.linspace(1140, 2600, n_points)
+    tunes = {
+        f"motor{j}": attune.Tune(setpoints, np.sin(setpoints / (100 + j)) + j)
+        for j in range(n_motors)
+    }
+    tunes["shutter"] = attune.DiscreteTune(
+        {"open": (1140, 1800), "closed": (1800, 2600)}, default="closed"
+    )
+    arrangements = {"arr0": attune.Arrangement("arr0", tunes)}
+    for i in range(1, depth + 1):
+        arrangements[f"arr{i}"] = attune.Arrangement(
+            f"arr{i}",
+            {
+                f"arr{i - 1}": attune.Tune(setpoints, setpoints),
+                f"stage{i}": attune.Tune(setpoints, setpoints / 1000),
+            },
+        )
+    return attune.Instrument(arrangements, name="nested")
@@ -0,0 +1,28 @@
+import attune
+
+from ._instruments import topas4_like
+
+
+class InstrumentEquality:
+    """Compare instruments as done by ``store`` and ``restore``."""
+
+    def setup(self):
+        self.a = topas4_like()
+        self.b = attune.Instrument(**self.a.as_dict())
+        self.c = self.a.evolve("arr5", "motor3", dependent=self.a["arr5"]["motor3"].dependent + 1)
+        # compute and cache digests
+        self.a == self.b
+        self.a == self.c
+
+    def time_equal_fresh(self):
+        # digests are not yet computed for the rebuilt instrument
+        attune.Instrument(**self.a.as_dict()) == self.a
+
+    def time_equal_cached(self):
+        self.a == self.b
+
+    def time_not_equal(self):
+        self.a == self.c
+
+    def time_isclose(self):
+        self.a.isclose(self.b)
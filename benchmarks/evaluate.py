@@ -0,0 +1,67 @@
+import numpy as np
+
+import attune
+
+from ._instruments import nested, topas4_like
+
+
+class TuneCall:
+    """Evaluate a 200 point tune at one value, or at 1000 values.
+
+    DiscreteTune takes scalars only, so arrays are evaluated one value at a time,
+    as callers must.
+    """
+
+    params = [["Tune", "DiscreteTune"], ["scalar", "array"]]
+    param_names = ["tune", "argument"]
+
+    def setup(self, tune, argument):
+        if tune == "Tune":
+            setpoints = np.linspace(1140, 2600, 200)
+            self.tune = attune.Tune(setpoints, np.sin(setpoints / 100))
+        else:
+            self.tune = attune.DiscreteTune(
+                {"a": (1140, 1500), "b": (1500, 2000), "c": (2000, 2600)}, default="c"
+            )
+        self.values = np.linspace(1150, 2590, 1000)
+        if argument == "scalar":
+            self.values = 1750.0
+
+    def time_call(self, tune, argument):
+        if tune == "DiscreteTune" and argument == "array":
+            [self.tune(v) for v in self.values]
+        else:
+            self.tune(self.values)
+
+
+class InstrumentCall:
+    """Evaluate an arrangement nested 0, 1 or 3 arrangements deep."""
+
+    params = [0, 1, 3]
+    param_names = ["depth"]
+
+    def setup(self, depth):
+        self.instrument = nested(depth)
+        self.arrangement = f"arr{depth}"
+
+    def time_call(self, depth):
+        self.instrument(1750, self.arrangement)
+
+
+class Metrics:
+    """Evaluate a Topas4-sized arrangement with metrics disabled and enabled."""
+
+    params = [False, True]
+    param_names = ["enabled"]
+
+    def setup(self, enabled):
+        self.instrument = topas4_like()
+        if enabled:
+            attune.enable_metrics()
+
+    def teardown(self, enabled):
+        attune.disable_metrics()
+        attune.reset_metrics()
+
+    def time_call(self, enabled):
+        self.instrument(1750, "arr3")
@@ -0,0 +1,56 @@
+import os
+import tempfile
+
+import attune
+
+from ._data import simulated
+
+
+class History:
+    """A session of 50 intensity workups of small simulated scans, each on the last result.
+
+    Without a depth every instrument and scan stays in memory; at depth 5 older ones are
+    spilled to disk as each workup is made.
+    """
+
+    params = ["", "5"]
+    param_names = ["depth"]
+    timeout = 300
+
+    def setup(self, depth):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self._environ = {k: os.environ.get(k) for k in ("ATTUNE_HISTORY", "ATTUNE_HISTORY_DEPTH")}
+        os.environ["ATTUNE_HISTORY"] = self._tmpdir.name
+        os.environ["ATTUNE_HISTORY_DEPTH"] = depth
+
+    def teardown(self, depth):
+        for key, value in self._environ.items():
+            if value is None:
+                del os.environ[key]
+            else:
+                os.environ[key] = value
+        self._tmpdir.cleanup()
+
+    def _session(self):
+        _, instrument = simulated("intensity", "small")
+        for _ in range(50):
+            data, _ = simulated("intensity", "small")
+            instrument = attune.intensity(
+                data=data,
+                channel="signal",
+                arrangement="sig",
+                tune="delay",
+                instrument=instrument,
+                plot=False,
+                cache=False,
+                autosave=False,
+            )
+        return instrument
+
+    def time_session(self, depth):
+        self._session()
+
+    def track_history_bytes(self, depth):
+        return attune.history_bytes(self._session())["total"]
+
+    track_history_bytes.unit = "bytes"
@@ -0,0 +1,230 @@
+import os
+import tempfile
+
+import numpy as np
+import scipy.optimize
+import scipy.spatial
+import WrightTools as wt
+
+import attune
+from attune._fit import fit_gauss_centers
+from attune._holistic import _iso_points
+
+from ._data import holistic_2d
+
+
+class Holistic:
+    """Full holistic workup of two motor data given amplitude and center channels."""
+
+    params = [25, 50, 100]
+    param_names = ["grid"]
+    timeout = 300
+
+    def setup(self, n):
+        self.data, self.instrument = holistic_2d(n)
+
+    def teardown(self, n):
+        self.data.close()
+
+    def time_holistic(self, n):
+        attune.holistic(
+            data=self.data,
+            channels=("amp", "cen"),
+            arrangement="arr",
+            tunes=["c1", "c2"],
+            instrument=self.instrument,
+            cache=False,
+            autosave=False,
+        )
+
+
+class HolisticMethod:
+    """Regular grid iso-lines compared to Delaunay triangulation, on 200 by 200 grids."""
+
+    params = ["grid", "delaunay"]
+    param_names = ["method"]
+    timeout = 300
+
+    def setup(self, method):
+        self.data, self.instrument = holistic_2d(200)
+
+    def teardown(self, method):
+        self.data.close()
+
+    def time_holistic(self, method):
+        attune.holistic(
+            data=self.data,
+            channels=("amp", "cen"),
+            arrangement="arr",
+            tunes=["c1", "c2"],
+            instrument=self.instrument,
+            cache=False,
+            autosave=False,
+            method=method,
+            refine_fits=False,
+        )
+
+
+class HolisticStream:
+    """2000 scattered points arriving one at a time, with an instrument every 100 points.
+
+    Points arrive in order of the first motor, as in a scan.
+    The first instrument is made from 500 points, enough to span all setpoints.
+
+    "stream" updates the triangulation and refits only the setpoints affected by new points,
+    "batch" works up all points received so far each time.
+    """
+
+    params = ["stream", "batch"]
+    param_names = ["mode"]
+    timeout = 300
+
+    def setup(self, mode):
+        _, self.instrument = holistic_2d(2)
+        rng = np.random.default_rng(0)
+        m1, m2 = np.sort(rng.uniform(-1.5, 1.5, 2000)), rng.uniform(-3, 3, 2000)
+        self.points = np.column_stack([m1, m2])
+        self.amplitudes = np.exp(-((m2 - 2 * m1 - 0.5) ** 2) / 0.5)
+        self.centers = 1350 + 40 * m1 + 5 * m2
+
+    def time_holistic(self, mode):
+        kwargs = dict(arrangement="arr", tunes=["c1", "c2"], instrument=self.instrument)
+        stream = attune.HolisticStream(**kwargs)
+        for i, (p, a, c) in enumerate(zip(self.points, self.amplitudes, self.centers)):
+            if mode == "stream":
+                stream.append(p, a, c)
+            if i < 499 or i % 100 != 99:
+                continue
+            if mode == "stream":
+                stream.instrument()
+                continue
+            data = wt.Data(name="holistic")
+            data.create_variable("c1", values=self.points[: i + 1, 0])
+            data.create_variable("c2", values=self.points[: i + 1, 1])
+            data.create_channel("amp", values=self.amplitudes[: i + 1])
+            data.create_channel("cen", values=self.centers[: i + 1])
+            data.transform("c1", "c2")
+            attune.holistic(
+                data=data,
+                channels=("amp", "cen"),
+                plot=False,
+                cache=False,
+                autosave=False,
+                method="delaunay",
+                **kwargs,
+            )
+            data.close()
+
+
+class HolisticCache:
+    """Holistic workup of a 100 by 100 grid, computing the fits or loading them from cache."""
+
+    params = ["miss", "hit"]
+    param_names = ["cache"]
+    timeout = 300
+
+    def setup(self, cache):
+        self.directory = tempfile.TemporaryDirectory()
+        os.environ["ATTUNE_CACHE"] = self.directory.name
+        self.data, self.instrument = holistic_2d(100)
+        if cache == "hit":
+            self._run()
+
+    def teardown(self, cache):
+        self.data.close()
+        del os.environ["ATTUNE_CACHE"]
+        self.directory.cleanup()
+
+    def _run(self):
+        attune.holistic(
+            data=self.data,
+            channels=("amp", "cen"),
+            arrangement="arr",
+            tunes=["c1", "c2"],
+            instrument=self.instrument,
+            plot=False,
+            autosave=False,
+        )
+
+    def time_holistic(self, cache):
+        if cache == "miss":
+            attune.clear_cache()
+        self._run()
+
+
+class IsoPoints:
+    """Iso-surface extraction from a Delaunay triangulation."""
+
+    params = [100, 200]
+    param_names = ["grid"]
+
+    def setup(self, n):
+        x, y = np.meshgrid(np.linspace(-1.5, 1.5, n), np.linspace(-3, 3, n), indexing="ij")
+        self.delaunay = scipy.spatial.Delaunay(np.column_stack([x.ravel(), y.ravel()]))
+        self.values = (1350 + 40 * x + 5 * y).ravel()
+        self.targets = np.linspace(1300, 1400, 101)
+
+    def time_iso_points(self, n):
+        _iso_points(self.delaunay, self.values, self.targets)
+
+
+class IsoPointsND:
+    """Iso-surface extraction from 3D and 4D triangulations of 10^5 scattered points."""
+
+    params = [3, 4]
+    param_names = ["ndim"]
+    timeout = 600
+
+    def setup(self, ndim):
+        points = np.random.default_rng(0).random((100_000, ndim))
+        self.delaunay = scipy.spatial.Delaunay(points)
+        self.values = points @ np.arange(1, ndim + 1)
+        self.targets = np.linspace(0.5, ndim * (ndim + 1) / 2 - 0.5, 101)
+
+    def time_iso_points(self, ndim):
+        _iso_points(self.delaunay, self.values, self.targets)
+
+    def peakmem_iso_points(self, ndim):
+        _iso_points(self.delaunay, self.values, self.targets)
+
+
+class GaussFit:
+    """Gaussian center fits of many noisy peaks.
+
+    "serial" reproduces the previous implementation, one least squares fit per peak
+    started from the median, for comparison of the speedup.
+    """
+
+    params = [["serial", "estimate", "refine", "refine-4-processes"], [100, 1000]]
+    param_names = ["method", "peaks"]
+    timeout = 300
+
+    def setup(self, method, n):
+        rng = np.random.default_rng(0)
+        self.xs, self.ys = [], []
+        for i in range(n):
+            x = np.sort(rng.uniform(-3, 3, 200))
+            y = np.exp(-1 / 2 * (x - np.sin(i / 50)) ** 2 / 0.5 ** 2)
+            self.xs.append(x)
+            self.ys.append(y + 0.02 * rng.standard_normal(200))
+
+    def time_fit(self, method, n):
+        if method == "serial":
+            [_serial_fit(x, y) for x, y in zip(self.xs, self.ys)]
+        elif method == "estimate":
+            fit_gauss_centers(self.xs, self.ys, refine=False)
+        elif method == "refine":
+            fit_gauss_centers(self.xs, self.ys)
+        else:
+            fit_gauss_centers(self.xs, self.ys, processes=4)
+
+
+def _serial_fit(x, y):
+    def resid(inps):
+        center, sigma, amplitude = inps
+        return y - amplitude * np.exp(-1 / 2 * (x - center) ** 2 / sigma ** 2)
+
+    x_range = np.max(x) - np.min(x)
+    bounds = [(np.min(x) - x_range / 10, np.max(x) + x_range / 10)] + [(-np.inf, np.inf)] * 2
+    x0 = [np.median(x), x_range / 10, np.max(y)]
+    return scipy.optimize.least_squares(resid, x0, bounds=np.array(bounds).T).x[0]
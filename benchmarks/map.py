@@ -0,0 +1,36 @@
+import numpy as np
+
+import attune
+
+from ._instruments import topas4_like
+
+
+class ShiftIndPoints:
+    """Shift and restore the setpoints of every motor of one arrangement, as tune_test does.
+
+    "arrangement" shifts all tunes at once, "tunes" evolves and remaps one tune at a time.
+    """
+
+    params = [["arrangement", "tunes"], [8, 64]]
+    param_names = ["how", "motors"]
+
+    def setup(self, how, motors):
+        self.instrument = topas4_like(n_motors=motors)
+
+    def time_shift(self, how, motors):
+        def shift(x):
+            return np.sin(x / 50)
+
+        if how == "arrangement":
+            attune.shift_ind_points(self.instrument, "arr0", shift)
+            return
+        new = self.instrument
+        for name, tune in self.instrument["arr0"].items():
+            if isinstance(tune, attune.DiscreteTune):
+                continue
+            x = tune.independent
+            new = new.evolve("arr0", name, independent=x + shift(x), dependent=tune.dependent)
+        for name, tune in self.instrument["arr0"].items():
+            if isinstance(tune, attune.DiscreteTune):
+                continue
+            new = attune.map_ind_points(new, "arr0", name, tune.independent)
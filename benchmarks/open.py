@@ -0,0 +1,55 @@
+import pathlib
+import tempfile
+
+import attune
+
+from ._instruments import topas4_like
+
+
+class OpenSingleArrangement:
+    """Open a Topas4-sized instrument and evaluate one arrangement."""
+
+    params = [False, True]
+    param_names = ["lazy"]
+
+    def setup(self, lazy):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self._tmpdir.name) / "instrument.json"
+        with open(self.path, "w") as f:
+            topas4_like().save(f)
+
+    def teardown(self, lazy):
+        self._tmpdir.cleanup()
+
+    def time_open(self, lazy):
+        attune.open(self.path, lazy=lazy)
+
+    def time_open_and_call(self, lazy):
+        instr = attune.open(self.path, lazy=lazy)
+        instr(1500, "arr3")
+
+
+class Save:
+    """Save a Topas4-sized instrument."""
+
+    def setup(self):
+        self.instrument = topas4_like()
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self._tmpdir.name) / "instrument.json"
+
+    def teardown(self):
+        self._tmpdir.cleanup()
+
+    def time_save(self):
+        with open(self.path, "w") as f:
+            self.instrument.save(f)
+
+
+class FromTopas4:
+    """Read the Topas4 configuration used by the io tests."""
+
+    def setup(self):
+        self.folder = pathlib.Path(__file__).parents[1] / "tests" / "io" / "twin_test_data"
+
+    def time_from_topas4(self):
+        attune.from_topas4(self.folder)
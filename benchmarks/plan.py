@@ -0,0 +1,115 @@
+import numpy as np
+import WrightTools as wt
+
+import attune
+
+
+SETPOINTS = np.linspace(1300, 1400, 21)
+# interpolating, so that errors are those of the measurements rather than of smoothing
+SPLINE = {"s": 0}
+
+
+def _instrument():
+    arr = attune.Arrangement("arr", {"m": attune.Tune(SETPOINTS, np.zeros(21))})
+    return attune.Instrument({"arr": arr})
+
+
+def _ridge(s):
+    return 0.3 * np.sin((s - 1300) / 20)
+
+
+def _zero(s):
+    return 0.2 * np.sin(s / 30)
+
+
+class _Simulation:
+    """An intensity or setpoint scan of 21 setpoints, with noise, and its true offsets.
+
+    Intensity measures a Gaussian ridge of width 0.05 with 1% noise on a 201 offset grid,
+    setpoint a color quadratic in the motor with 0.5 nm noise on a 41 offset grid.
+    """
+
+    def __init__(self, workup, seed=0):
+        self.workup = workup
+        self.rng = np.random.default_rng(seed)
+        self.instrument = _instrument()
+        self.truth = (_ridge if workup == "intensity" else _zero)(SETPOINTS)
+        self.grid = np.linspace(-1, 1, 201 if workup == "intensity" else 41)
+
+    def measure(self, s, x):
+        noise = self.rng.normal(0, 1, np.shape(x))
+        if self.workup == "intensity":
+            return np.exp(-((x - _ridge(s)) ** 2) / (2 * 0.05 ** 2)) + 0.01 * noise
+        d = x - _zero(s)
+        return s + 20 * d + 5 * d ** 2 + 0.5 * noise
+
+    def error(self, instrument):
+        return np.sqrt(np.mean((instrument["arr"]["m"].dependent - self.truth) ** 2))
+
+    def full_grid(self):
+        """Root mean square error of the workup of the full grid, and its measurements."""
+        data = wt.Data(name=self.workup)
+        data.create_variable("w", values=SETPOINTS[:, None], units="nm")
+        data.create_variable("m", values=self.grid[None, :])
+        values = self.measure(SETPOINTS[:, None], self.grid[None, :])
+        data.create_channel("sig", values=values)
+        data.transform("w", "m")
+        workup = attune.intensity if self.workup == "intensity" else attune.setpoint
+        new = workup(
+            data=data,
+            channel="sig",
+            arrangement="arr",
+            tune="m",
+            instrument=self.instrument,
+            plot=False,
+            cache=False,
+            autosave=False,
+            **SPLINE,
+        )
+        data.close()
+        return self.error(new), values.size
+
+    def planned(self, target, budget):
+        """Measurements the planner takes to reach the target error, in batches of 21."""
+        planner = (
+            attune.IntensityPlanner if self.workup == "intensity" else attune.SetpointPlanner
+        )(arrangement="arr", tune="m", instrument=self.instrument, limits=(-1, 1), **SPLINE)
+        while len(planner) < budget:
+            points = planner.propose(21)
+            if not len(points):
+                break
+            planner.tell(points, self.measure(points[:, 0], points[:, 1]))
+            try:
+                if self.error(planner.instrument()) <= target:
+                    break
+            except ValueError:
+                continue
+        return len(planner)
+
+
+class Planner:
+    """Measurements needed for the accuracy of a full grid scan, simulated.
+
+    The target is the root mean square error (from the true offsets) of the workup of
+    a full grid. The planner proposes 21 points at a time until its instrument is at
+    least as accurate, or it has used as many measurements as the grid.
+    Tracked as a fraction of the measurements of the grid, averaged over five noise seeds.
+    """
+
+    params = ["intensity", "setpoint"]
+    param_names = ["workup"]
+    timeout = 300
+
+    def track_fraction_of_grid(self, workup):
+        fractions = []
+        for seed in range(5):
+            simulation = _Simulation(workup, seed)
+            target, size = simulation.full_grid()
+            fractions.append(simulation.planned(target, size) / size)
+        return np.mean(fractions)
+
+    track_fraction_of_grid.unit = "fraction"
+
+    def time_planned(self, workup):
+        simulation = _Simulation(workup)
+        simulation.planned(0, 1000)
@@ -0,0 +1,71 @@
+import numpy as np
+import WrightTools as wt
+
+import attune
+from attune._setpoint import _quadratic_zeros
+
+from ._data import setpoint_2d
+
+
+class Setpoint:
+    """Full setpoint workup of dense setpoint scans."""
+
+    params = [100, 1000]
+    param_names = ["setpoints"]
+    timeout = 300
+
+    def setup(self, n):
+        self.data, self.instrument = setpoint_2d(n)
+
+    def teardown(self, n):
+        self.data.close()
+
+    def time_setpoint(self, n):
+        attune.setpoint(
+            data=self.data,
+            channel="wm",
+            arrangement="arr",
+            tune="c2",
+            instrument=self.instrument,
+            cache=False,
+            autosave=False,
+        )
+
+
+class QuadraticZeros:
+    """Zero crossings of per-setpoint quadratic fits.
+
+    "chop" reproduces the previous implementation, one Polynomial.fit per chopped
+    slice, for comparison of the speedup.
+    """
+
+    params = [["chop", "batched"], [100, 1000]]
+    param_names = ["method", "setpoints"]
+    timeout = 300
+
+    def setup(self, method, n):
+        self.data, _ = setpoint_2d(n)
+        self.data.wm[:] -= self.data.w1[:]
+
+    def teardown(self, method, n):
+        self.data.close()
+
+    def time_zeros(self, method, n):
+        if method == "chop":
+            _chop_zeros(self.data)
+        else:
+            _quadratic_zeros(
+                np.broadcast_to(self.data.c2[:], self.data.shape).astype(float),
+                self.data.wm[:].astype(float),
+            )
+
+
+def _chop_zeros(data):
+    out = []
+    for c in data.chop(1).values():
+        xi, yi = wt.kit.remove_nans_1D(c.axes[0].points, c.wm.points)
+        if np.nanmin(yi) <= 0 <= np.nanmax(yi):
+            out.append(np.polynomial.Polynomial.fit(yi, xi, 2)(0))
+        else:
+            out.append(np.nan)
+    return out
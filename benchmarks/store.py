@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+import os
+import tempfile
+
+import attune
+from attune._store import _store_instr
+
+from ._instruments import topas4_like
+
+
+class Store:
+    """Load and store with 10, 100 or 1000 instruments in the history of the store.
+
+    Each stored instrument offsets one motor of the one before it.
+    """
+
+    params = [10, 100, 1000]
+    param_names = ["depth"]
+    timeout = 300
+
+    def setup(self, depth):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self._environ = os.environ.get("ATTUNE_STORE")
+        os.environ["ATTUNE_STORE"] = self._tmpdir.name
+        instrument = topas4_like(n_arrangements=2, n_motors=4, n_points=50)
+        for i in range(depth):
+            instrument = attune.offset_by(instrument, "arr0", "motor0", 0.001)
+            # written directly, as store would, without comparing each to the head
+            _store_instr(instrument)
+            if i == 0:
+                self.oldest = datetime.now(timezone.utc)
+        self.head = instrument
+
+    def teardown(self, depth):
+        if self._environ is None:
+            del os.environ["ATTUNE_STORE"]
+        else:
+            os.environ["ATTUNE_STORE"] = self._environ
+        self._tmpdir.cleanup()
+
+    def time_load(self, depth):
+        attune.load("bench")
+
+    def time_load_oldest(self, depth):
+        attune.load("bench", self.oldest)
+
+    def time_store(self, depth):
+        # equal to the head but for one offset, so the head is loaded and compared first
+        attune.store(attune.offset_by(self.head, "arr0", "motor1", 0.001))
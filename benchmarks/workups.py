@@ -0,0 +1,204 @@
+import itertools
+
+import matplotlib.pyplot as plt
+import numpy as np
+import WrightTools as wt
+
+import attune
+from attune._common import BLOCK_BYTES, axes_view, clipped_centers
+
+from ._data import SIZES, intensity_2d, setpoint_2d, simulated
+
+
+class LargeScan:
+    """Workups of a 500 by 4000 scan recorded with four other channels.
+
+    Peak memory is the maximum resident size of the whole process,
+    so compare between implementations rather than to the size of the data.
+    With ``plot="deferred"``, only the time until the instrument is returned is measured.
+    """
+
+    params = [["intensity", "tune_test", "setpoint"], [True, False, "deferred"]]
+    param_names = ["workup", "plot"]
+    timeout = 300
+
+    def setup(self, workup, plot):
+        if workup == "setpoint":
+            self.data, self.instrument = setpoint_2d(500, 4000)
+        else:
+            self.data, self.instrument = intensity_2d(500, 4000, extra_channels=4)
+
+    def teardown(self, workup, plot):
+        attune.wait_for_plots()
+        plt.close("all")
+        self.data.close()
+
+    def _run(self, workup, plot):
+        if workup == "intensity":
+            attune.intensity(
+                data=self.data,
+                channel="sig",
+                arrangement="arr",
+                tune="c1",
+                instrument=self.instrument,
+                plot=plot,
+                cache=False,
+                autosave=False,
+            )
+        elif workup == "tune_test":
+            attune.tune_test(
+                data=self.data,
+                channel="sig",
+                arrangement="arr",
+                instrument=self.instrument,
+                plot=plot,
+                cache=False,
+                autosave=False,
+            )
+        else:
+            attune.setpoint(
+                data=self.data,
+                channel="wm",
+                arrangement="arr",
+                tune="c2",
+                instrument=self.instrument,
+                plot=plot,
+                cache=False,
+                autosave=False,
+            )
+
+    def time_workup(self, workup, plot):
+        self._run(workup, plot)
+
+    def peakmem_workup(self, workup, plot):
+        self._run(workup, plot)
+
+
+class ClippedCenters:
+    """Leveling, clipping and centers of mass of a 2000 by 20000 channel on disk.
+
+    "blocks" streams over setpoints in blocks, "whole" reads the channel in one block.
+    The channel is written row by row, so that setup does not set the peak memory.
+    """
+
+    params = ["blocks", "whole"]
+    param_names = ["read"]
+    timeout = 300
+
+    def setup(self, read):
+        n, m = 2000, 20000
+        self.data = wt.Data(name="large")
+        self.data.create_variable("w1", values=np.linspace(1300, 1400, n)[:, None], units="nm")
+        self.data.create_variable("d1", values=np.linspace(-1, 1, m)[None, :])
+        self.data.create_channel("sig", shape=(n, m), dtype=np.dtype(np.float32))
+        d1 = np.linspace(-1, 1, m)
+        for i, w in enumerate(np.linspace(1300, 1400, n)):
+            self.data.sig[i] = np.exp(-((d1 - 0.3 * np.sin(w / 20)) ** 2) / 0.1)
+        self.data.transform("w1", "d1")
+        self.view = axes_view(self.data)
+
+    def teardown(self, read):
+        self.data.close()
+
+    def _run(self, read):
+        max_bytes = BLOCK_BYTES if read == "blocks" else self.data.sig.nbytes
+        clipped_centers(self.view, self.data.sig, gtol=0.01, ltol=0.1, max_bytes=max_bytes)
+
+    def time_clipped_centers(self, read):
+        self._run(read)
+
+    def peakmem_clipped_centers(self, read):
+        self._run(read)
+
+
+class Sweep:
+    """Twelve combinations of intensity leveling and tolerances on a 500 by 4000 scan.
+
+    "sweep" reads the channel once for all of them, "loop" runs each workup without plotting.
+    """
+
+    params = ["sweep", "loop"]
+    param_names = ["how"]
+    timeout = 300
+    grid = {"level": [False, True], "gtol": [0.01, 0.05], "ltol": [0.1, 0.3, 0.5]}
+
+    def setup(self, how):
+        self.data, self.instrument = intensity_2d(500, 4000)
+
+    def teardown(self, how):
+        self.data.close()
+
+    def time_sweep(self, how):
+        kwargs = dict(data=self.data, channel="sig", arrangement="arr", instrument=self.instrument)
+        if how == "sweep":
+            attune.sweep("intensity", tune="c1", **kwargs, **self.grid)
+            return
+        for level, gtol, ltol in itertools.product(*self.grid.values()):
+            attune.intensity(
+                tune="c1",
+                level=level,
+                gtol=gtol,
+                ltol=ltol,
+                plot=False,
+                cache=False,
+                autosave=False,
+                **kwargs,
+            )
+
+
+class Stream:
+    """Intensity of a 500 by 4000 scan, streamed one setpoint at a time.
+
+    A provisional instrument is made after every tenth setpoint.
+    """
+
+    timeout = 300
+
+    def setup(self):
+        self.data, self.instrument = intensity_2d(500, 4000)
+        view = axes_view(self.data)
+        self.setpoints = view.axes[0].points
+        self.x = np.broadcast_to(view.axes[1][:], self.data.sig.shape)
+        self.values = self.data.sig[:]
+
+    def teardown(self):
+        self.data.close()
+
+    def time_stream(self):
+        stream = attune.IntensityStream(arrangement="arr", tune="c1", instrument=self.instrument)
+        for i in range(len(self.setpoints)):
+            stream.append(self.setpoints[i], self.x[i], self.values[i])
+            if i % 10 == 9:
+                stream.instrument()
+
+
+class Simulated:
+    """Each workup of a simulated scan, at small, medium and large sizes (see ``SIZES``)."""
+
+    params = [["tune_test", "intensity", "setpoint", "holistic"], list(SIZES)]
+    param_names = ["workup", "size"]
+    timeout = 300
+
+    def setup(self, workup, size):
+        self.data, self.instrument = simulated(workup, size)
+
+    def teardown(self, workup, size):
+        self.data.close()
+
+    def time_workup(self, workup, size):
+        kwargs = dict(
+            data=self.data,
+            arrangement="sig",
+            instrument=self.instrument,
+            plot=False,
+            cache=False,
+            autosave=False,
+        )
+        if workup == "tune_test":
+            attune.tune_test(channel="signal", **kwargs)
+        elif workup == "intensity":
+            attune.intensity(channel="signal", tune="delay", **kwargs)
+        elif workup == "setpoint":
+            attune.setpoint(channel="wm", tune="crystal", **kwargs)
+        else:
+            attune.holistic(channels=("amp", "cen"), tunes=["crystal", "delay"], **kwargs)
@@ -30,6 +30,7 @@ setup(
     python_requires=">=3.6",
     install_requires=[
         "WrightTools>=3.2.5",
+        "numexpr",
         "numpy",
         "scipy",
         "matplotlib",
@@ -38,9 +39,10 @@ setup(
         "maya",
     ],
     extras_require={
-        "dev": ["black", "pre-commit", "pytest", "pytest-cov"],
+        "dev": ["asv", "black", "pre-commit", "pytest", "pytest-cov"],
         "docs": ["sphinx-gallery>0.3.0", "sphinx", "sphinx-rtd-theme"],
     },
+    entry_points={"console_scripts": ["attune-batch=attune._batch:main"]},
     version=version,
     description="Tools for tuning optical parametric amplifiers and multidimensional spectrometers.",
     long_description=read("README.rst"),
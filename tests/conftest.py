@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_directory(tmp_path, monkeypatch):
+    # workups cache by default, which must not write to the user cache directory
+    monkeypatch.setenv("ATTUNE_CACHE", str(tmp_path / "cache"))
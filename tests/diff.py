@@ -0,0 +1,64 @@
+import json
+
+import attune
+import numpy as np
+
+import pytest
+
+
+def make_instrument():
+    tune = attune.Tune(np.linspace(1300, 1400, 200), np.linspace(-5, 5, 200))
+    discrete = attune.DiscreteTune({"hi": (1350, 1400)}, default="lo")
+    arrangements = {
+        f"arr{i}": attune.Arrangement(f"arr{i}", {"tune": tune, "discrete": discrete})
+        for i in range(5)
+    }
+    return attune.Instrument(arrangements, {"tune": attune.Setable("tune")}, name="inst")
+
+
+def test_round_trip():
+    a = make_instrument()
+    b = attune.offset_by(a, "arr1", "tune", 1.0)
+    b = attune.map_ind_points(b, "arr2", "tune", np.linspace(1310, 1390, 7))
+    b = b.evolve("arr3", "new", independent=[1300, 1400], dependent=[0, 1])
+    del b.arrangements["arr4"]
+    b.setables["other"] = attune.Setable("other", 3)
+    delta = json.loads(json.dumps(attune.diff(a, b)))
+    assert set(delta["arrangements"]["changed"]) == {"arr1", "arr2", "arr3"}
+    assert delta["arrangements"]["removed"] == ["arr4"]
+    assert list(delta["setables"]["added"]) == ["other"]
+    patched = attune.patch(a, delta)
+    assert patched == b
+    assert patched["arr0"] is a["arr0"]
+    assert patched.transition.type == "patch"
+
+
+def test_points_only():
+    a = make_instrument()
+    dependent = a["arr0"]["tune"].dependent
+    dependent[[3, 50]] += 0.5
+    b = a.evolve("arr0", "tune", dependent=dependent)
+    delta = attune.diff(a, b)
+    assert delta["arrangements"]["changed"]["arr0"]["changed"]["tune"]["points"]["index"] == [
+        3,
+        50,
+    ]
+    assert len(json.dumps(delta)) < len(json.dumps(b.as_dict())) / 10
+    assert attune.patch(a, delta) == b
+
+
+def test_empty():
+    a = make_instrument()
+    delta = attune.diff(a, a)
+    assert not delta["arrangements"]["changed"]
+    assert attune.patch(a, delta) == a
+
+
+def test_check():
+    a = make_instrument()
+    b = attune.offset_by(a, "arr1", "tune", 1.0)
+    delta = attune.diff(a, b)
+    other = attune.offset_by(a, "arr1", "tune", 2.0)
+    with pytest.raises(ValueError):
+        attune.patch(other, delta)
+    attune.patch(other, delta, check=False)
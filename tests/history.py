@@ -0,0 +1,129 @@
+import pickle
+
+import attune
+import numpy as np
+import pytest
+import WrightTools as wt
+
+from attune._history import SpilledInstrument, StoredInstrument
+from attune._transition import Transition
+
+
+@pytest.fixture(autouse=True)
+def history(tmp_path, monkeypatch):
+    monkeypatch.setenv("ATTUNE_HISTORY", str(tmp_path / "history"))
+    monkeypatch.setenv("ATTUNE_STORE", str(tmp_path / "store"))
+    monkeypatch.delenv("ATTUNE_HISTORY_DEPTH", raising=False)
+
+
+def make_instrument():
+    tune = attune.Tune(np.linspace(1300, 1400, 11), np.linspace(0, 1, 11))
+    return attune.Instrument({"arr": attune.Arrangement("arr", {"tune": tune})}, name="history")
+
+
+def chain(n):
+    instruments = [make_instrument()]
+    for _ in range(n):
+        instruments.append(attune.offset_by(instruments[-1], "arr", "tune", 1))
+    return instruments
+
+
+def walk(instrument):
+    out = [instrument]
+    while out[-1].transition.previous is not None:
+        out.append(out[-1].transition.previous)
+    return out
+
+
+def history_counts(instrument):
+    accounting = attune.history_bytes(instrument)
+    return accounting["instruments"], accounting["spilled"]
+
+
+def test_trim():
+    instruments = chain(5)
+    head = instruments[-1]
+    assert history_counts(head) == (6, False)
+    attune.trim_history(head, 2)
+    assert history_counts(head) == (3, True)
+    assert isinstance(instruments[2].transition._previous, SpilledInstrument)
+    # spilled instruments no longer hold their own history
+    assert isinstance(instruments[1].transition._previous, SpilledInstrument)
+    assert walk(head) == instruments[::-1]
+    types = [i.transition.type for i in instruments]
+    assert [i.transition.type for i in walk(head)] == types[::-1]
+    # read back only while held
+    assert head.transition.previous.transition.previous.transition.previous is instruments[2]
+    assert attune.undo(attune.undo(attune.undo(attune.undo(head)))) == instruments[1]
+
+
+def test_depth(monkeypatch):
+    monkeypatch.setenv("ATTUNE_HISTORY_DEPTH", "2")
+    instruments = chain(5)
+    head = instruments[-1]
+    assert history_counts(head) == (3, True)
+    assert walk(head) == instruments[::-1]
+    monkeypatch.setenv("ATTUNE_HISTORY_DEPTH", "0")
+    new = attune.offset_by(head, "arr", "tune", 1)
+    assert history_counts(new) == (1, True)
+    assert new.transition.previous == head
+
+
+def test_spilled_once(tmp_path, monkeypatch):
+    monkeypatch.setenv("ATTUNE_HISTORY_DEPTH", "0")
+    first = make_instrument()
+    # a transition alone spills nothing, only the instrument made with it
+    Transition("offset_by", first)
+    assert not (tmp_path / "history").exists()
+    # offset_to discards the transition of the offset_by it is made of
+    second = attune.offset_to(first, "arr", "tune", 2, 1350)
+    third = attune.offset_by(first, "arr", "tune", 1)
+    assert len(list((tmp_path / "history").iterdir())) == 1
+    assert second.transition._previous is third.transition._previous
+    assert second.transition.previous is first
+
+
+def test_data():
+    data = wt.Data(name="scan")
+    data.create_variable("w", values=np.linspace(1300, 1400, 11))
+    data.create_channel("signal", values=np.arange(11.0))
+    data.transform("w")
+    first = make_instrument()
+    second = first.evolve(transition=Transition("intensity", first, data=data))
+    third = attune.offset_by(second, "arr", "tune", 1)
+    accounting = attune.history_bytes(third)
+    assert accounting["instruments"] == 3
+    # the tune of second is shared with first
+    assert accounting["tunes"] == 2 * 2 * 11 * 8
+    assert accounting["data"] == 2 * 11 * 8
+    assert accounting["total"] == accounting["tunes"] + accounting["data"]
+    attune.trim_history(third, 0)
+    assert attune.history_bytes(third)["data"] == 0
+    del second
+    data = third.transition.previous.transition.data
+    assert data.channel_names == ("signal",)
+    np.testing.assert_array_equal(data.signal[:], np.arange(11.0))
+
+
+def test_store():
+    attune.store(make_instrument())
+    loaded = attune.load("history")
+    new = attune.offset_by(attune.offset_by(loaded, "arr", "tune", 1), "arr", "tune", 1)
+    attune.trim_history(new, 0)
+    previous = new.transition._previous
+    assert isinstance(previous, SpilledInstrument)
+    # the stored instrument is referred to in the store, rather than written again
+    del loaded
+    stored = previous.resolve().transition._previous
+    assert isinstance(stored, StoredInstrument)
+    assert stored.resolve() == make_instrument()
+    attune.store(new)
+    assert attune.load("history") == new
+    assert attune.undo(attune.load("history")) == new.transition.previous
+
+
+def test_pickle(monkeypatch):
+    monkeypatch.setenv("ATTUNE_HISTORY_DEPTH", "1")
+    head = chain(3)[-1]
+    copy = pickle.loads(pickle.dumps(head))
+    assert walk(copy) == walk(head)
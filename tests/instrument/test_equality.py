@@ -0,0 +1,70 @@
+import attune
+import numpy as np
+
+
+def make_instrument(offset=0.0):
+    tune = attune.Tune(np.linspace(1300, 1400, 20), np.linspace(-5, 5, 20) + offset)
+    discrete = attune.DiscreteTune({"hi": (1350, 1400), "lo": (1300, 1350)}, default="med")
+    arr = attune.Arrangement("arr", {"tune": tune, "discrete": discrete})
+    return attune.Instrument({"arr": arr}, {"tune": attune.Setable("tune")}, name="inst")
+
+
+def test_equal():
+    a = make_instrument()
+    b = make_instrument()
+    assert a == b
+    assert a["arr"].digest == b["arr"].digest
+    assert a["arr"]["tune"].digest == b["arr"]["tune"].digest
+
+
+def test_tolerant():
+    # equal digests are a shortcut, equality is still within np.allclose tolerance
+    a = make_instrument()
+    b = make_instrument(offset=1e-12)
+    assert a["arr"]["tune"].digest != b["arr"]["tune"].digest
+    assert a == b
+    assert a["arr"] == b["arr"]
+    assert a["arr"]["tune"] == b["arr"]["tune"]
+
+
+def test_not_equal():
+    a = make_instrument()
+    b = make_instrument(offset=1e-3)
+    assert a != b
+    assert a["arr"] != b["arr"]
+    assert a["arr"]["tune"] != b["arr"]["tune"]
+    assert a["arr"]["discrete"] == b["arr"]["discrete"]
+    assert a["arr"]["tune"] != attune.Tune([0, 0.5, 1], [0, 0.5, 1])
+
+
+def test_isclose():
+    a = make_instrument()
+    assert a.isclose(make_instrument(offset=1e-12))
+    assert not a.isclose(make_instrument(offset=1e-3))
+    assert a.isclose(make_instrument(offset=1e-3), atol=1e-2)
+
+
+def test_discrete():
+    a = attune.DiscreteTune({"hi": (100, 200), "lo": (10, 20)}, default="def")
+    b = attune.DiscreteTune({"lo": (10.0, 20.0), "hi": (100.0, 200.0)}, default="def")
+    c = attune.DiscreteTune({"hi": (100, 200.001), "lo": (10, 20)}, default="def")
+    assert a == b
+    assert a != c
+    assert a.isclose(c, atol=0.01)
+    assert a != attune.Tune([0, 1], [0, 1])
+
+
+def test_tune_mismatched_type():
+    tune = attune.Tune([0, 1], [0, 1])
+    assert tune != attune.DiscreteTune({"hi": (0, 1)})
+    assert not tune.isclose(attune.DiscreteTune({"hi": (0, 1)}))
+    assert not tune.isclose(attune.Tune([0, 0.5, 1], [0, 0.5, 1]))
+
+
+if __name__ == "__main__":
+    test_equal()
+    test_tolerant()
+    test_not_equal()
+    test_isclose()
+    test_discrete()
+    test_tune_mismatched_type()
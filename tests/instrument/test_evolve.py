@@ -0,0 +1,69 @@
+import attune
+import numpy as np
+import pytest
+
+
+def make_instrument():
+    tune = attune.Tune(np.linspace(1300, 1400, 20), np.linspace(-5, 5, 20), dep_units="mm")
+    other = attune.Tune(np.linspace(1300, 1400, 5), np.linspace(0, 1, 5))
+    discrete = attune.DiscreteTune({"hi": (1350, 1400)}, default="lo")
+    arr = attune.Arrangement("arr", {"tune": tune, "other": other, "discrete": discrete})
+    untouched = attune.Arrangement("untouched", {"tune": tune})
+    return attune.Instrument(
+        {"arr": arr, "untouched": untouched}, {"tune": attune.Setable("tune")}, name="inst"
+    )
+
+
+def test_evolve_dependent():
+    inst0 = make_instrument()
+    dependent = np.linspace(0, 10, 20)
+    inst1 = inst0.evolve("arr", "tune", dependent=dependent)
+    np.testing.assert_allclose(inst1["arr"]["tune"].dependent, dependent)
+    np.testing.assert_allclose(inst1["arr"]["tune"].independent, inst0["arr"]["tune"].independent)
+    assert inst1["arr"]["tune"].dep_units == "mm"
+    # untouched objects are shared, not rebuilt
+    assert inst1["untouched"] is inst0["untouched"]
+    assert inst1["arr"]["other"] is inst0["arr"]["other"]
+    assert inst1["arr"]["discrete"] is inst0["arr"]["discrete"]
+    assert inst1.setables["tune"] is inst0.setables["tune"]
+    # the original is unchanged
+    np.testing.assert_allclose(inst0["arr"]["tune"].dependent, np.linspace(-5, 5, 20))
+    assert inst1.name == "inst"
+
+
+def test_evolve_independent_resamples():
+    inst0 = make_instrument()
+    points = np.linspace(1310, 1390, 7)
+    inst1 = inst0.evolve("arr", "tune", independent=points)
+    np.testing.assert_allclose(inst1["arr"]["tune"].independent, points)
+    np.testing.assert_allclose(inst1["arr"]["tune"].dependent, inst0["arr"]["tune"](points))
+
+
+def test_evolve_transition_and_name():
+    inst0 = make_instrument()
+    trans = attune._transition.Transition("offset_by", inst0)
+    inst1 = inst0.evolve(name="new", transition=trans)
+    assert inst1.name == "new"
+    assert inst1.transition is trans
+    assert inst1["arr"] is inst0["arr"]
+
+
+def test_evolve_discrete_raises():
+    inst0 = make_instrument()
+    with pytest.raises(TypeError):
+        inst0.evolve("arr", "discrete", dependent=[0])
+
+
+def test_evolve_lazy_stays_lazy():
+    inst0 = attune.Instrument(**make_instrument().as_dict(), lazy=True)
+    inst1 = inst0.evolve("arr", "other", dependent=np.ones(5))
+    assert not inst1.arrangements.is_decoded("untouched")
+    np.testing.assert_allclose(inst1["arr"]["other"].dependent, 1)
+
+
+if __name__ == "__main__":
+    test_evolve_dependent()
+    test_evolve_independent_resamples()
+    test_evolve_transition_and_name()
+    test_evolve_discrete_raises()
+    test_evolve_lazy_stays_lazy()
@@ -0,0 +1,53 @@
+import math
+import tempfile
+
+import attune
+
+
+def make_instrument():
+    tune = attune.Tune([0, 1], [0, 1])
+    tune1 = attune.Tune([0.5, 1.5], [0, 1])
+    discrete_tune = attune.DiscreteTune({"hi": (0.8, 1.0), "lo": (0.1, 0.2)}, default="med")
+    first = attune.Arrangement("first", {"tune": tune, "discrete": discrete_tune})
+    second = attune.Arrangement("second", {"first": tune1})
+    third = attune.Arrangement("third", {"tune": tune1})
+    return attune.Instrument(
+        {"first": first, "second": second, "third": third}, {"tune": attune.Setable("tune")}
+    )
+
+
+def test_decoded_on_access():
+    inst = make_instrument()
+    with tempfile.TemporaryFile("w+t", suffix=".json") as tmp:
+        inst.save(tmp)
+        tmp.seek(0)
+        lazy = attune.open(tmp, lazy=True)
+    assert set(lazy.arrangements.keys()) == {"first", "second", "third"}
+    assert "first" in lazy.arrangements
+    assert not any(lazy.arrangements.is_decoded(k) for k in lazy.arrangements)
+    assert math.isclose(lazy(0.5, "third")["tune"], 0)
+    assert lazy.arrangements.is_decoded("third")
+    assert not lazy.arrangements.is_decoded("first")
+    assert not lazy.arrangements.is_decoded("second")
+
+
+def test_nested_decodes_dependencies():
+    inst = make_instrument()
+    lazy = attune.Instrument(**inst.as_dict(), lazy=True)
+    assert math.isclose(lazy(0.75, "second")["tune"], 0.25)
+    assert lazy.arrangements.is_decoded("first")
+    assert not lazy.arrangements.is_decoded("third")
+
+
+def test_equivalent_to_eager():
+    inst = make_instrument()
+    lazy = attune.Instrument(**inst.as_dict(), lazy=True)
+    assert lazy == inst
+    assert lazy.as_dict() == inst.as_dict()
+    assert lazy(0.9, "first")["discrete"] == "hi"
+
+
+if __name__ == "__main__":
+    test_decoded_on_access()
+    test_nested_decodes_dependencies()
+    test_equivalent_to_eager()
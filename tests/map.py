@@ -32,3 +32,41 @@ def test_map_ind_limits():
         inst1["test_map"]["test"](test_points), inst0["test_map"]["test"](test_points)
     )
     assert len(inst1["test_map"]["test"]) == len(inst0["test_map"]["test"])
+
+
+@pytest.mark.parametrize("restore_setpoints", [True, False])
+def test_shift_ind_points(restore_setpoints):
+    x = np.linspace(1300, 1400, 20)
+    tunes = {
+        "a": attune.Tune(x, np.sin(x / 10)),
+        "b": attune.Tune(x, np.cos(x / 10), dep_units="mm"),
+        "c": attune.Tune(np.linspace(1300, 1400, 31), np.linspace(-5, 5, 31)),
+        "d": attune.DiscreteTune({"low": (1300, 1350), "high": (1350, 1400)}),
+    }
+    arr = attune.Arrangement("test_map", tunes)
+    inst0 = attune.Instrument({"test_map": arr}, {})
+
+    def shift(x):
+        return 3 * np.sin(x / 15)
+
+    inst1 = attune.shift_ind_points(inst0, "test_map", shift, restore_setpoints=restore_setpoints)
+
+    # one tune at a time, as tune_test used to
+    expected = inst0
+    for name in "abc":
+        tune = inst0["test_map"][name]
+        x = tune.independent
+        expected = expected.evolve(
+            "test_map", name, independent=x + shift(x), dependent=tune.dependent
+        )
+        if restore_setpoints:
+            expected = attune.map_ind_points(expected, "test_map", name, x)
+    assert inst1["test_map"] == expected["test_map"]
+    assert inst1["test_map"]["d"] is tunes["d"]
+    assert inst1["test_map"]["b"].dep_units == "mm"
+    assert inst1.transition.type == "shift_ind_points"
+    assert inst1.transition.metadata == {
+        "arrangement": "test_map",
+        "restore_setpoints": restore_setpoints,
+    }
+    assert inst1.transition.previous is inst0
@@ -0,0 +1,67 @@
+import attune
+import pytest
+
+
+def make_instrument():
+    tune = attune.Tune([0, 1], [0, 1])
+    tune1 = attune.Tune([0.5, 1.5], [0, 1])
+    shutter = attune.DiscreteTune({"open": (0, 0.5), "closed": (0.5, 1)})
+    first = attune.Arrangement("first", {"tune": tune, "shutter": shutter})
+    second = attune.Arrangement("second", {"first": tune1})
+    return attune.Instrument({"first": first, "second": second}, name="metrics")
+
+
+def test_disabled_records_nothing():
+    attune.reset_metrics()
+    make_instrument()(0.75, "second")
+    assert attune.metrics() == {}
+    # hot calls are only wrapped while enabled
+    with attune.collect_metrics():
+        assert hasattr(attune.Tune.__call__, "__wrapped__")
+    assert not hasattr(attune.Tune.__call__, "__wrapped__")
+    assert not hasattr(attune.Instrument.__call__, "__wrapped__")
+    assert attune._tune._convert is attune._tune.wt.units.convert
+
+
+def test_calls():
+    instrument = make_instrument()
+    with attune.collect_metrics() as report:
+        instrument(0.75, "second")
+        instrument(0.25)
+        instrument["first"]["tune"](750, ind_units="um")
+    assert report["Instrument.__call__"]["count"] == 2
+    assert report["Instrument.select"]["count"] == 2
+    # second evaluates its tune once for each tune of first, then the tune of first,
+    # then first alone, then the tune directly
+    assert report["Tune.__call__"]["count"] == 5
+    assert report["DiscreteTune.__call__"]["count"] == 2
+    assert report["units.convert"]["count"] == 1
+    row = report["Instrument.__call__"]
+    assert 0 < row["p50"] <= row["p99"] <= row["max"]
+    assert row["total"] == pytest.approx(row["mean"] * 2)
+    # recording stops with the block
+    instrument(0.25)
+    assert attune.metrics()["Instrument.__call__"]["count"] == 2
+
+
+def test_bytes(tmp_path, monkeypatch):
+    monkeypatch.setenv("ATTUNE_STORE", str(tmp_path / "store"))
+    instrument = make_instrument()
+    attune.enable_metrics()
+    try:
+        attune.reset_metrics()
+        with open(tmp_path / "instrument.json", "w") as f:
+            instrument.save(f)
+        attune.open(tmp_path / "instrument.json")
+        attune.store(instrument)
+        attune.load("metrics")
+    finally:
+        attune.disable_metrics()
+    report = attune.metrics()
+    size = (tmp_path / "instrument.json").stat().st_size
+    assert report["open"]["count"] == 2
+    # the stored file has a trailing newline
+    assert report["open"]["bytes_read"] == 2 * size + 1
+    assert report["load"]["count"] >= 1
+    assert report["store.write"]["count"] == 1
+    assert report["store"]["bytes_written"] == size + 1
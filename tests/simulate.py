@@ -0,0 +1,111 @@
+import attune
+import numpy as np
+
+import pytest
+
+
+SETPOINTS = np.linspace(1300, 1500, 21)
+
+
+def make_instrument(c, d):
+    arr = attune.Arrangement(
+        "sig", {"c": attune.Tune(SETPOINTS, c), "d": attune.Tune(SETPOINTS, d)}
+    )
+    return attune.Instrument({"sig": arr})
+
+
+def truth():
+    return make_instrument(
+        20 + 0.05 * (SETPOINTS - 1300), 2 + 0.3 * np.sin((SETPOINTS - 1300) / 50)
+    )
+
+
+def perturbed():
+    true = truth()
+    return make_instrument(
+        true["sig"]["c"].dependent + 0.3 * np.cos(SETPOINTS / 40),
+        true["sig"]["d"].dependent - 0.1,
+    )
+
+
+def error(instrument, tune):
+    true = truth()["sig"][tune]
+    return np.max(np.abs(instrument["sig"][tune](SETPOINTS) - true(SETPOINTS)))
+
+
+def test_output():
+    sim = attune.OPASimulator(truth(), acceptance={"d": 0.1})
+    color, intensity = sim.output("sig", {"c": 25, "d": truth()["sig"]["d"](1400)})
+    assert color == pytest.approx(1400)
+    assert intensity == pytest.approx(1)
+    _, intensity = sim.output("sig", {"c": 25, "d": truth()["sig"]["d"](1400) + 0.1})
+    assert intensity == pytest.approx(np.exp(-0.5))
+
+
+def test_setpoint_then_intensity():
+    sim = attune.OPASimulator(truth(), acceptance={"d": 0.1}, seed=0)
+    instrument = perturbed()
+    data = sim.setpoint(instrument, "sig", "c", np.linspace(-1, 1, 41))
+    instrument = attune.setpoint(
+        data=data,
+        channel="wm",
+        arrangement="sig",
+        tune="c",
+        instrument=instrument,
+        plot=False,
+        autosave=False,
+        cache=False,
+        s=0,
+    )
+    assert error(instrument, "c") < 0.01
+    data = sim.intensity(instrument, "sig", "d", np.linspace(-0.5, 0.5, 101))
+    instrument = attune.intensity(
+        data=data,
+        channel="signal",
+        arrangement="sig",
+        tune="d",
+        instrument=instrument,
+        plot=False,
+        autosave=False,
+        cache=False,
+        s=0,
+    )
+    assert error(instrument, "d") < 0.01
+
+
+def test_tune_test_converges():
+    sim = attune.OPASimulator(truth(), acceptance={"d": 0.2}, linewidth=5, seed=1)
+    instrument = perturbed()
+    errors = [error(instrument, "c")]
+    for _ in range(2):
+        data = sim.tune_test(instrument, "sig")
+        instrument = attune.tune_test(
+            data=data,
+            channel="signal",
+            arrangement="sig",
+            instrument=instrument,
+            plot=False,
+            autosave=False,
+            cache=False,
+            s=0,
+        )
+        errors.append(error(instrument, "c"))
+    assert errors[-1] < 0.05 * errors[0]
+
+
+def test_holistic():
+    sim = attune.OPASimulator(truth(), acceptance={"d": 0.1}, noise=0, color_noise=0)
+    data = sim.holistic("sig", {"c": np.linspace(19, 31, 61), "d": np.linspace(1, 3.5, 61)})
+    new = attune.holistic(
+        data=data,
+        channels=("amp", "cen"),
+        arrangement="sig",
+        tunes=["c", "d"],
+        instrument=perturbed(),
+        plot=False,
+        autosave=False,
+        cache=False,
+        s=0,
+    )
+    assert error(new, "c") < 0.01
+    assert error(new, "d") < 0.01
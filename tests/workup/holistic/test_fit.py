@@ -0,0 +1,123 @@
+import numpy as np
+import scipy.optimize
+
+from attune._fit import estimate_gauss, fit_gauss_centers, fit_gauss_centers_nd
+
+
+def reference_center(x, y):
+    def resid(inps):
+        center, sigma, amplitude = inps
+        return y - amplitude * np.exp(-1 / 2 * (x - center) ** 2 / sigma ** 2)
+
+    x_range = np.max(x) - np.min(x)
+    bounds = [(np.min(x) - x_range / 10, np.max(x) + x_range / 10)] + [(-np.inf, np.inf)] * 2
+    x0 = [np.median(x), x_range / 10, np.max(y)]
+    return scipy.optimize.least_squares(resid, x0, bounds=np.array(bounds).T).x[0]
+
+
+def make_peaks(n=40, noise=0.02):
+    rng = np.random.default_rng(0)
+    xs, ys = [], []
+    for i in range(n):
+        x = np.sort(rng.uniform(-3, 3, 50))
+        y = 2 * np.exp(-1 / 2 * (x - np.sin(i / 5)) ** 2 / 0.5 ** 2)
+        xs.append(x)
+        ys.append(y + noise * rng.standard_normal(50))
+    return xs, ys
+
+
+def test_estimate_exact():
+    xs, ys = make_peaks(noise=0)
+    estimates = estimate_gauss(xs, ys)
+    np.testing.assert_allclose(estimates[:, 0], np.sin(np.arange(40) / 5), atol=1e-8)
+    np.testing.assert_allclose(estimates[:, 1], 0.5)
+    np.testing.assert_allclose(estimates[:, 2], 2)
+
+
+def test_estimate_not_peak():
+    x = np.linspace(0, 1, 10)
+    estimates = estimate_gauss([x, x], [np.exp(x ** 2), np.exp(-(x ** 2))])
+    assert np.isnan(estimates[0]).all()
+    assert not np.isnan(estimates[1]).any()
+
+
+def test_matches_reference():
+    xs, ys = make_peaks()
+    truth = np.sin(np.arange(40) / 5)
+    reference = np.array([reference_center(x, y) for x, y in zip(xs, ys)])
+    centers = fit_gauss_centers(xs, ys)
+    np.testing.assert_allclose(centers, truth, atol=0.02)
+    np.testing.assert_allclose(fit_gauss_centers(xs, ys, refine=False), truth, atol=0.05)
+    # unlike the closed form start, the default start occasionally finds a spurious minimum
+    converged = np.abs(reference - truth) < 0.02
+    assert converged.sum() > 30
+    np.testing.assert_allclose(centers[converged], reference[converged], atol=1e-6)
+
+
+def test_processes():
+    xs, ys = make_peaks()
+    np.testing.assert_allclose(
+        fit_gauss_centers(xs, ys, processes=2), fit_gauss_centers(xs, ys), atol=1e-12
+    )
+
+
+def test_single_coordinate():
+    # an iso-line along a grid line projects onto a single coordinate
+    centers = fit_gauss_centers([np.full(5, 2.0), np.linspace(0, 1, 5)], [np.ones(5)] * 2)
+    assert centers[0] == 2.0
+
+
+def make_tilted_peaks(n=10):
+    # a Gaussian correlated within a plane in 3D, which the scan cuts off unevenly
+    rng = np.random.default_rng(1)
+    basis = np.array([[1, 0, 0.5], [0, 1, -0.3]])
+    precision = np.linalg.inv(0.3 * np.array([[1, 0.8], [0.8, 1]]))
+    xs, ys, truth = [], [], []
+    for i in range(n):
+        center = np.array([0.3, -0.2]) + 0.05 * i
+        plane = rng.uniform([-1.2, -2], [2.5, 1], (400, 2))
+        distance = plane - center
+        y = 2 * np.exp(-1 / 2 * np.einsum("ij,jk,ik->i", distance, precision, distance))
+        xs.append(plane @ basis + [1, 2, 3])
+        ys.append(y + 0.01 * rng.standard_normal(400))
+        truth.append(center @ basis + [1, 2, 3])
+    return xs, ys, np.array(truth)
+
+
+def test_nd_tilted():
+    xs, ys, truth = make_tilted_peaks()
+    np.testing.assert_allclose(fit_gauss_centers_nd(xs, ys, dims=2), truth, atol=5e-3)
+    np.testing.assert_allclose(
+        fit_gauss_centers_nd(xs, ys, dims=2, refine=False), truth, atol=2e-2
+    )
+    # fitting each coordinate separately is biased
+    separate = np.column_stack([fit_gauss_centers([x[:, i] for x in xs], ys) for i in range(3)])
+    assert np.abs(separate - truth).max() > 0.1
+
+
+def test_nd_processes():
+    xs, ys, _ = make_tilted_peaks()
+    np.testing.assert_allclose(
+        fit_gauss_centers_nd(xs, ys, dims=2, processes=2),
+        fit_gauss_centers_nd(xs, ys, dims=2),
+        atol=1e-12,
+    )
+
+
+def test_nd_degenerate():
+    # all points at one position, and no points at all
+    x = np.ones((5, 3))
+    out = fit_gauss_centers_nd([x, np.full((2, 3), np.nan)], [np.ones(5), np.ones(2)], dims=2)
+    np.testing.assert_array_equal(out[0], 1)
+    assert np.isnan(out[1]).all()
+
+
+if __name__ == "__main__":
+    test_estimate_exact()
+    test_estimate_not_peak()
+    test_matches_reference()
+    test_processes()
+    test_single_coordinate()
+    test_nd_tilted()
+    test_nd_processes()
+    test_nd_degenerate()
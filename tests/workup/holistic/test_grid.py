@@ -0,0 +1,90 @@
+import attune
+import numpy as np
+import pytest
+import WrightTools as wt
+
+
+def make_data(n=40):
+    data = wt.Data(name="holistic")
+    m1 = np.linspace(-1.5, 1.5, n)[:, None]
+    m2 = np.linspace(-3, 3, n)[None, :]
+    data.create_variable("c1", values=m1)
+    data.create_variable("c2", values=m2)
+    data.create_channel("amp", values=np.exp(-((m2 - 2 * m1 - 0.5) ** 2) / 0.5))
+    data.create_channel("cen", values=1350 + 40 * m1 + 5 * m2)
+    data.transform("c1", "c2")
+    setpoints = np.linspace(1320, 1380, 13)
+    arr = attune.Arrangement(
+        "arr",
+        {
+            "c1": attune.Tune(setpoints, np.linspace(-1, 1, 13)),
+            "c2": attune.Tune(setpoints, np.linspace(-2, 2, 13)),
+        },
+    )
+    return data, attune.Instrument({"arr": arr})
+
+
+def run(data, instrument, method=None):
+    kwargs = {} if method is None else {"method": method}
+    return attune.holistic(
+        data=data,
+        channels=("amp", "cen"),
+        arrangement="arr",
+        tunes=["c1", "c2"],
+        instrument=instrument,
+        autosave=False,
+        **kwargs,
+    )
+
+
+def test_grid_matches_delaunay():
+    data, instrument = make_data()
+    grid = run(data, instrument, "grid")
+    delaunay = run(data, instrument, "delaunay")
+    auto = run(data, instrument, "auto")
+    for tune in ["c1", "c2"]:
+        np.testing.assert_allclose(
+            grid["arr"][tune].dependent, delaunay["arr"][tune].dependent, atol=0.01
+        )
+        np.testing.assert_array_equal(auto["arr"][tune].dependent, grid["arr"][tune].dependent)
+    # the grid path is opt in, gridded data is triangulated by default
+    default = run(data, instrument)
+    for tune in ["c1", "c2"]:
+        np.testing.assert_array_equal(
+            default["arr"][tune].dependent, delaunay["arr"][tune].dependent
+        )
+    assert grid.transition.metadata["method"] == "grid"
+
+
+def test_grid_requires_gridded_axes():
+    data, instrument = make_data()
+    data.transform("c1+c2", "c2")
+    with pytest.raises(ValueError):
+        run(data, instrument, "grid")
+    run(data, instrument, "auto")
+
+
+def test_unknown_method():
+    data, instrument = make_data()
+    with pytest.raises(ValueError):
+        run(data, instrument, "marching")
+
+
+def test_channel_metadata():
+    data, instrument = make_data()
+    new = attune.holistic(
+        data=data,
+        channels=(data.amp, "cen"),
+        arrangement="arr",
+        tunes=["c1", "c2"],
+        instrument=instrument,
+        autosave=False,
+    )
+    assert new.transition.metadata["channels"] == ["amp", "cen"]
+
+
+if __name__ == "__main__":
+    test_grid_matches_delaunay()
+    test_grid_requires_gridded_axes()
+    test_unknown_method()
+    test_channel_metadata()
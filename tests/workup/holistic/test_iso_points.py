@@ -0,0 +1,87 @@
+import itertools
+
+import numpy as np
+import scipy.spatial
+
+from attune._holistic import _iso_points
+
+
+def reference_iso_points(delaunay, values, target):
+    out = []
+    for simplex in delaunay.simplices:
+        for i, j in itertools.combinations(simplex, 2):
+            v1, v2 = values[i], values[j]
+            p1, p2 = delaunay.points[i], delaunay.points[j]
+            if v1 > v2:
+                v1, v2, p1, p2 = v2, v1, p2, p1
+            if v1 < target <= v2:
+                out.append(p1 + (p2 - p1) * (target - v1) / (v2 - v1))
+    return np.array(out).reshape(-1, delaunay.points.shape[1])
+
+
+def sort_rows(a):
+    return a[np.lexsort(a.T[::-1])]
+
+
+def check(ndim):
+    rng = np.random.default_rng(ndim)
+    points = rng.random((200, ndim))
+    values = points @ np.arange(1, ndim + 1) + 0.1 * rng.random(200)
+    values[rng.random(200) < 0.1] = np.nan
+    delaunay = scipy.spatial.Delaunay(points)
+    targets = np.array([1.5, 0.5, 1.0, -10, 1.0])
+    iso, weights = _iso_points(delaunay, values, targets)
+    assert len(iso) == len(targets)
+    for t, found, weight in zip(targets, iso, weights):
+        expected = reference_iso_points(delaunay, values, t)
+        # shared edges are found once, weighted by the number of simplices sharing them
+        found = np.repeat(found, weight, axis=0)
+        assert found.shape == expected.shape
+        np.testing.assert_allclose(sort_rows(found), sort_rows(expected))
+
+
+def test_2d():
+    check(2)
+
+
+def test_3d():
+    check(3)
+
+
+def test_clipped():
+    # gridded centers, clipped where the amplitude is low, as holistic does
+    rng = np.random.default_rng(0)
+    m1 = np.linspace(-1.5, 1.5, 31)[:, None]
+    m2 = np.linspace(-3, 3, 33)[None, :]
+    amplitudes = np.exp(-((m2 - 2 * m1 - 0.5) ** 2) / 0.5)
+    centers = 1350 + 40 * m1 + 5 * m2 + rng.normal(0, 0.5, amplitudes.shape)
+    centers[amplitudes < 0.05] = np.nan
+    points = np.column_stack([np.broadcast_to(m, centers.shape).ravel() for m in (m1, m2)])
+    delaunay = scipy.spatial.Delaunay(points)
+    values = centers.ravel()
+    targets = np.linspace(1300, 1400, 21)
+    iso, weights = _iso_points(delaunay, values, targets)
+    for t, found, weight in zip(targets, iso, weights):
+        expected = reference_iso_points(delaunay, values, t)
+        found = np.repeat(found, weight, axis=0)
+        assert found.shape == expected.shape
+        np.testing.assert_allclose(sort_rows(found), sort_rows(expected))
+
+
+def test_nan_neighbour():
+    # two triangles sharing the short diagonal, one with a NaN vertex
+    points = np.array([[0, 0], [2, 0], [1, 0.5], [1, -0.5]])
+    values = np.array([np.nan, 5, 0, 1])
+    delaunay = scipy.spatial.Delaunay(points)
+    (found,), (weight,) = _iso_points(delaunay, values, [0.5])
+    order = np.argsort(found[:, 0])
+    # the diagonal counts for both triangles, edges to the NaN vertex are never crossed
+    np.testing.assert_allclose(found[order], [[1, 0], [1.1, 0.45]])
+    np.testing.assert_array_equal(weight[order], [2, 1])
+
+
+if __name__ == "__main__":
+    test_2d()
+    test_3d()
+    test_clipped()
+    test_nan_neighbour()
@@ -0,0 +1,88 @@
+import attune
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+import WrightTools as wt
+
+
+def make_data(n=12):
+    data = wt.Data(name="holistic")
+    m1 = np.linspace(-1.5, 1.5, n)[:, None, None]
+    m2 = np.linspace(-4, 4, n)[None, :, None]
+    m3 = np.linspace(-3, 3, n)[None, None, :]
+    data.create_variable("c1", values=m1)
+    data.create_variable("c2", values=m2)
+    data.create_variable("c3", values=m3)
+    data.create_channel("amp", values=np.exp(-((m2 - 2 * m1 - 0.5) ** 2 + (m3 - m1) ** 2) / 0.5))
+    data.create_channel("cen", values=1350 + 40 * m1 + 5 * m2 + 3 * m3)
+    data.transform("c1", "c2", "c3")
+    setpoints = np.linspace(1320, 1380, 7)
+    arr = attune.Arrangement(
+        "arr", {f"c{i}": attune.Tune(setpoints, np.zeros(7)) for i in (1, 2, 3)}
+    )
+    return data, attune.Instrument({"arr": arr})
+
+
+def truth(setpoints):
+    # the amplitude ridge, m2 = 2 m1 + 0.5 and m3 = m1, crosses each center iso-surface once
+    m1 = (setpoints - 1352.5) / 53
+    return np.array([m1, 2 * m1 + 0.5, m1])
+
+
+@pytest.mark.parametrize("method", ["grid", "delaunay"])
+def test_three_motors(method):
+    data, instrument = make_data()
+    new = attune.holistic(
+        data=data,
+        channels=("amp", "cen"),
+        arrangement="arr",
+        tunes=["c1", "c2", "c3"],
+        instrument=instrument,
+        autosave=False,
+        method=method,
+    )
+    setpoints = instrument["arr"].independent
+    found = np.array([new["arr"][f"c{i}"].dependent for i in (1, 2, 3)])
+    # within a fraction of the grid spacing (0.27 to 0.73), the iso-surfaces being fit
+    # jointly, as the ridge crosses them at an angle
+    np.testing.assert_allclose(found, truth(setpoints), atol=0.1)
+    plt.close("all")
+
+
+def test_grid_matches_delaunay():
+    data, instrument = make_data()
+    kwargs = dict(
+        data=data,
+        channels=("amp", "cen"),
+        arrangement="arr",
+        tunes=["c1", "c2", "c3"],
+        instrument=instrument,
+        autosave=False,
+    )
+    grid = attune.holistic(method="grid", **kwargs)
+    delaunay = attune.holistic(method="delaunay", **kwargs)
+    for tune in ["c1", "c2", "c3"]:
+        np.testing.assert_allclose(
+            grid["arr"][tune].dependent, delaunay["arr"][tune].dependent, atol=0.15
+        )
+    plt.close("all")
+
+
+def test_autosave_plot(tmp_path):
+    data, instrument = make_data(8)
+    attune.holistic(
+        data=data,
+        channels=("amp", "cen"),
+        arrangement="arr",
+        tunes=["c1", "c2", "c3"],
+        instrument=instrument,
+        save_directory=tmp_path,
+    )
+    assert list(tmp_path.glob("**/*.png"))
+    plt.close("all")
+
+
+if __name__ == "__main__":
+    test_three_motors("grid")
+    test_three_motors("delaunay")
+    test_grid_matches_delaunay()
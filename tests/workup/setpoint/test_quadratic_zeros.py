@@ -0,0 +1,43 @@
+import warnings
+
+import numpy as np
+
+from attune._setpoint import _quadratic_zeros
+
+
+def reference(x, y):
+    out = []
+    for xi, yi in zip(x, y):
+        keep = np.isfinite(xi) & np.isfinite(yi)
+        xi, yi = xi[keep], yi[keep]
+        if yi.size and np.min(yi) <= 0 <= np.max(yi):
+            out.append(np.polynomial.Polynomial.fit(yi, xi, 2)(0))
+        else:
+            out.append(np.nan)
+    return np.array(out)
+
+
+def test_matches_polynomial_fit():
+    rng = np.random.default_rng(0)
+    x = np.linspace(-2, 3, 40) + rng.normal(0, 0.01, (200, 40))
+    y = (x - rng.normal(0, 1, (200, 1))) * rng.uniform(0.5, 2, (200, 1)) + 0.1 * x ** 2
+    y += rng.normal(0, 0.05, y.shape)
+    y[rng.random(y.shape) < 0.2] = np.nan
+    x[7, ::3] = np.nan
+    y[3] = np.nan
+    # too few distinct values for a quadratic
+    y[4] = np.nan
+    y[4, :2] = [-1, 1]
+    y[5] = np.nan
+    y[5, :5] = [-1, 1, -1, 1, 1]
+    with warnings.catch_warnings():
+        # underdetermined fits warn
+        warnings.simplefilter("ignore")
+        expected = reference(x, y)
+    found = _quadratic_zeros(x, y)
+    assert np.isfinite(expected).sum() > 100
+    np.testing.assert_allclose(found, expected, rtol=1e-12, atol=1e-12)
+
+
+if __name__ == "__main__":
+    test_matches_polynomial_fit()
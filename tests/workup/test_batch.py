@@ -0,0 +1,91 @@
+import json
+import pathlib
+
+import numpy as np
+import pytest
+import WrightTools as wt
+
+import attune
+from attune._batch import main
+
+
+__here__ = pathlib.Path(__file__).parent / "tune_test"
+
+
+def make_instrument():
+    instr = attune.open(__here__ / "instrument_in.json")
+    arrangements = dict(instr.arrangements, sfs2=attune.Arrangement("sfs2", instr["sfs"].tunes))
+    return attune.Instrument(arrangements, instr.setables, name="batch")
+
+
+def make_jobs():
+    def job(arrangement, channel):
+        return {
+            "data": str(__here__ / "tunetest.wt5"),
+            "workup": "tune_test",
+            "axes": ["w3", "wm-w3"],
+            "parameters": {"channel": channel, "arrangement": arrangement},
+        }
+
+    return [job("sfs", "signal_mean"), job("sfs2", "signal_mean"), job("sfs", "signal_diff")]
+
+
+def run_serially(instr, jobs):
+    for job in jobs:
+        data = wt.open(job["data"])
+        data.transform(*job["axes"])
+        instr = attune.tune_test(data=data, instrument=instr, autosave=False, **job["parameters"])
+    return instr
+
+
+def test_same_as_serial():
+    instr = make_instrument()
+    jobs = make_jobs()
+    expected = run_serially(instr, jobs)
+    for processes in [None, 2]:
+        out, report = attune.run_batch(jobs, instr, processes=processes)
+        assert out == expected
+        assert [job["wave"] for job in report] == [0, 0, 1]
+        assert all(job["seconds"] > 0 for job in report)
+
+
+def test_transitions():
+    # workers are sent no history, but the results are linked to it
+    instr = attune.offset_by(make_instrument(), "sfs", "grating", 0)
+    jobs = make_jobs()
+    data = wt.open(jobs[0]["data"])
+    for processes in [None, 2]:
+        out, _ = attune.run_batch(jobs, instr, processes=processes)
+        previous = out
+        for job in reversed(jobs):
+            assert previous.transition.type == "tune_test"
+            assert previous.transition.metadata["arrangement"] == job["parameters"]["arrangement"]
+            assert previous.transition.metadata["data"] == job["data"]
+            assert previous.transition.metadata["axes"] == job["axes"]
+            assert previous.transition.data.channel_names == data.channel_names
+            previous = previous.transition.previous
+        assert previous is instr
+        assert previous.transition.type == "offset_by"
+    data.close()
+
+
+def test_reserved_parameters():
+    jobs = make_jobs()
+    jobs[1]["parameters"]["plot"] = True
+    with pytest.raises(ValueError):
+        attune.run_batch(jobs, make_instrument())
+
+
+def test_main(tmp_path):
+    with open(tmp_path / "instrument.json", "w") as f:
+        make_instrument().save(f)
+    with open(tmp_path / "manifest.json", "w") as f:
+        json.dump({"instrument": "instrument.json", "jobs": make_jobs()}, f)
+    main([str(tmp_path / "manifest.json"), "-o", str(tmp_path / "out.json")])
+    out = attune.open(tmp_path / "out.json")
+    expected = run_serially(make_instrument(), make_jobs())
+    for arrangement in ["sfs", "sfs2"]:
+        for tune in ["grating", "bbo", "mixer"]:
+            np.testing.assert_allclose(
+                out[arrangement][tune].dependent, expected[arrangement][tune].dependent
+            )
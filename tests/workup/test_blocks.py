@@ -0,0 +1,84 @@
+import h5py
+import numpy as np
+import pytest
+import WrightTools as wt
+
+from attune._common import axes_view, axis_rows, clipped_centers, setpoint_blocks
+from attune._setpoint import _setpoint_zeros
+
+
+def make_data():
+    rng = np.random.default_rng(0)
+    data = wt.Data(name="blocks")
+    w1 = np.linspace(1300, 1400, 23)[:, None]
+    wm = (w1 + np.linspace(-10, 10, 31)[None, :]).astype(np.float32)
+    data.create_variable("w1", values=w1, units="nm")
+    data.create_variable("wm", values=wm, units="nm")
+    signal = np.exp(-(((wm - w1) - 3 * np.sin(w1 / 20)) ** 2) / 10) + rng.normal(0, 0.01, wm.shape)
+    data.create_channel("sig", values=signal.astype(np.float32))
+    data.transform("w1", "wm-w1")
+    return data
+
+
+def reference_centers(data, level, gtol, ltol):
+    # the whole data, processed the way the workups used to
+    data = data.copy()
+    channel = data.sig
+    if level:
+        data.level("sig", 0, -3, verbose=False)
+    channel.clip(min=channel.max() * gtol)
+    channel.clip(min=np.nanmax(channel[:], axis=1, keepdims=True) * ltol)
+    data.moment(axis=1, channel="sig", moment=1, resultant=data.axes[0].shape)
+    return data.sig_1_moment_1.points, channel[:]
+
+
+@pytest.mark.parametrize("level", [False, True])
+@pytest.mark.parametrize("max_bytes", [1, 500, 2 ** 24])
+def test_clipped_centers(level, max_bytes):
+    data = make_data()
+    view = axes_view(data)
+    out = view.create_channel("sig", shape=data.sig.shape)
+    centers, limits = clipped_centers(
+        view, data.sig, level=level, gtol=0.05, ltol=0.2, out=out, max_bytes=max_bytes
+    )
+    expected, clipped = reference_centers(data, level, 0.05, 0.2)
+    # WrightTools integrates the single precision axis in single precision
+    np.testing.assert_allclose(centers, expected, rtol=1e-6)
+    np.testing.assert_array_equal(out[:], clipped)
+    np.testing.assert_array_equal(limits, [data.axes[1].min(), data.axes[1].max()])
+
+
+@pytest.mark.parametrize("max_bytes", [1, 2 ** 24])
+def test_axis_rows(max_bytes):
+    data = wt.Data(name="rows")
+    data.create_variable("w1", values=np.linspace(1300, 1400, 23)[:, None], units="nm")
+    data.create_variable("w2", values=np.linspace(-10, 10, 31)[None, :], units="nm")
+    data.create_channel("sig", values=np.ones((23, 31), dtype=np.float32))
+    data.transform("w1", "w1+w2")
+    view = axes_view(data, units="wn")
+    # variables keep their shapes, rather than being expanded along the setpoints
+    assert view.w2.shape == (1, 31)
+    for block in setpoint_blocks(data.sig, max_bytes):
+        np.testing.assert_allclose(axis_rows(view.axes[1], block), view.axes[1][:][block])
+
+
+def test_setpoint_blocks():
+    with h5py.File("blocks.h5", "w", driver="core", backing_store=False) as f:
+        dataset = f.create_dataset("d", shape=(23, 31), dtype="f4", chunks=(4, 31))
+        blocks = setpoint_blocks(dataset, max_bytes=1000)
+        assert [(b.start, b.stop) for b in blocks] == [(0, 8), (8, 16), (16, 23)]
+        # never less than one chunk
+        assert setpoint_blocks(dataset, max_bytes=1)[1] == slice(4, 8)
+        assert setpoint_blocks(dataset) == [slice(0, 23)]
+
+
+@pytest.mark.parametrize("max_bytes", [1, 2 ** 24])
+def test_setpoint_zeros(max_bytes):
+    data = make_data()
+    data.create_channel("wa", values=data.wm[:] + 0.5 * data.w1[:] / 1300)
+    data.transform("w1", "wm")
+    view = axes_view(data)
+    setpoints = view.axes[0].points
+    zeros, limits = _setpoint_zeros(view, data.wa, setpoints, max_bytes=max_bytes)
+    np.testing.assert_allclose(zeros, setpoints - 0.5 * setpoints / 1300, atol=1e-3)
+    np.testing.assert_array_equal(limits, [data.wm.min(), data.wm.max()])
@@ -0,0 +1,58 @@
+import pathlib
+
+import numpy as np
+import pytest
+import WrightTools as wt
+
+import attune
+from attune import _cache
+
+
+__here__ = pathlib.Path(__file__).parent / "tune_test"
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("ATTUNE_CACHE", str(tmp_path))
+    return tmp_path
+
+
+def run(**kwargs):
+    d = wt.open(__here__ / "tunetest.wt5")
+    d.transform("w3", "wm-w3")
+    instr = attune.open(__here__ / "instrument_in.json")
+    kwargs = dict(data=d, channel="signal_mean", arrangement="sfs", instrument=instr, **kwargs)
+    return attune.tune_test(**kwargs, plot=False, autosave=False)
+
+
+def test_hit(cache_dir, monkeypatch):
+    first = run()
+    assert len(list(cache_dir.glob("*.npy"))) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("centers were computed again")
+
+    with monkeypatch.context() as m:
+        m.setattr(attune._tune_test, "clipped_centers", fail)
+        # spline settings are applied after the cached centers
+        assert run() == first
+        run(s=0)
+        with pytest.raises(AssertionError):
+            run(ltol=0.2)
+    assert len(list(cache_dir.glob("*.npy"))) == 1
+
+
+def test_opt_out(cache_dir):
+    run(cache=False)
+    assert not list(cache_dir.glob("*.npy"))
+
+
+def test_eviction(cache_dir, monkeypatch):
+    monkeypatch.setenv("ATTUNE_CACHE_MAX_BYTES", "1000")
+    keys = [_cache.key("test", {"i": i}) for i in range(4)]
+    for k in keys:
+        _cache.cached(k, lambda: np.zeros(50))
+    # each entry is 528 bytes, so only the last is kept
+    assert [p.stem for p in cache_dir.glob("*.npy")] == keys[-1:]
+    attune.clear_cache()
+    assert not list(cache_dir.glob("*.npy"))
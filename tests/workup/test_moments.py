@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+import WrightTools as wt
+
+import attune
+from attune._moments import moments
+
+
+def make_data(decreasing=False):
+    rng = np.random.default_rng(0)
+    data = wt.Data(name="moments")
+    wa = np.linspace(1300, 1400, 50)[None, :, None]
+    if decreasing:
+        wa = wa[:, ::-1]
+    w1 = np.linspace(1320, 1380, 13)[:, None, None]
+    d1 = np.linspace(-1, 1, 11)[None, None, :]
+    data.create_variable("w1", values=w1, units="nm")
+    data.create_variable("wa", values=wa, units="nm")
+    data.create_variable("d1", values=d1)
+    signal = np.exp(-((wa - w1 - 5 * d1) ** 2) / 50) + rng.normal(0, 0.01, (13, 50, 11))
+    signal[0, 3, 0] = np.nan
+    data.create_channel("sig", values=signal)
+    data.transform("w1", "wa", "d1")
+    return data
+
+
+@pytest.mark.parametrize("decreasing", [False, True])
+def test_matches_wrighttools(decreasing):
+    data = make_data(decreasing)
+    found = moments(data.sig[:], data.wa[:], 1, orders=(2, 0, 1), keepdims=True)
+    data.moment("wa", "sig", moment=(0, 1, 2))
+    for order, values in zip((2, 0, 1), found):
+        np.testing.assert_allclose(values, data[f"sig_wa_moment_{order}"][:], rtol=1e-10)
+
+
+def test_cutoff():
+    data = make_data()
+    values = data.sig[:]
+    cutoff = np.nanmax(values, axis=1, keepdims=True) * 0.3
+    clipped = np.where(values < cutoff, np.nan, values)
+    expected = moments(clipped, data.wa[:], 1)
+    found = moments(values, data.wa[:], 1, cutoff=cutoff)
+    for a, b in zip(found, expected):
+        np.testing.assert_array_equal(a, b)
+    assert found[0].shape == (13, 11)
+
+
+def test_unsupported_order():
+    with pytest.raises(ValueError):
+        moments(np.ones(3), np.arange(3), 0, orders=(3,))
+
+
+def test_holistic_single_channel():
+    data = make_data()
+    data.create_channel("sig_pos", values=np.clip(data.sig[:], 0, None))
+    arr = attune.Arrangement(
+        "arr",
+        {
+            "w1": attune.Tune(np.linspace(1330, 1370, 5), np.linspace(1330, 1370, 5)),
+            "d1": attune.Tune(np.linspace(1330, 1370, 5), np.zeros(5)),
+        },
+    )
+    instrument = attune.Instrument({"arr": arr})
+    kwargs = dict(arrangement="arr", tunes=["w1", "d1"], instrument=instrument, autosave=False)
+    found = attune.holistic(data=data, channels="sig_pos", spectral_axis="wa", **kwargs)
+    # the same, with moments taken by WrightTools
+    data.moment("wa", "sig_pos", moment=(0, 1))
+    data.transform("w1", "d1")
+    expected = attune.holistic(
+        data=data, channels=("sig_pos_wa_moment_0", "sig_pos_wa_moment_1"), **kwargs
+    )
+    assert found["arr"].isclose(expected["arr"])
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+import attune
+
+
+SETPOINTS = np.linspace(1300, 1400, 11)
+
+
+def instrument():
+    arr = attune.Arrangement("arr", {"m": attune.Tune(SETPOINTS, np.zeros(11))})
+    return attune.Instrument({"arr": arr})
+
+
+def ridge(s):
+    return 0.3 * np.sin((s - 1300) / 20)
+
+
+def run(planner, measure, rounds):
+    for _ in range(rounds):
+        points = planner.propose(22)
+        planner.tell(points, measure(points[:, 0], points[:, 1]))
+
+
+def test_initial_pass():
+    planner = attune.IntensityPlanner(
+        arrangement="arr", tune="m", instrument=instrument(), limits=(1, -1), initial=5
+    )
+    first = planner.propose(7)
+    np.testing.assert_array_equal(first[:5, 0], 1300)
+    np.testing.assert_array_equal(first[:5, 1], np.linspace(-1, 1, 5))
+    np.testing.assert_array_equal(first[5:], [[1310, -1], [1310, -0.5]])
+    # proposed points are not proposed again before they are measured
+    second = planner.propose(100)
+    assert len(second) == 55 - 7
+    planner.tell(first, np.ones(7))
+    with pytest.raises(ValueError):
+        planner.instrument()
+    with pytest.raises(ValueError):
+        planner.tell([[1301, 0]], [1])
+
+
+def test_intensity():
+    def measure(s, x):
+        return np.exp(-((x - ridge(s)) ** 2) / (2 * 0.05 ** 2))
+
+    planner = attune.IntensityPlanner(
+        arrangement="arr", tune="m", instrument=instrument(), limits=(-1, 1), s=0
+    )
+    run(planner, measure, 20)
+    new = planner.instrument()
+    assert new.transition.metadata["measurements"] == len(planner)
+    np.testing.assert_allclose(new["arr"]["m"].dependent, ridge(SETPOINTS), atol=2e-3)
+    # most measurements after the initial pass are on the ridge
+    x, _ = planner.samples(1350)
+    assert np.mean(np.abs(x - ridge(1350)) < 0.2) > 0.6
+
+
+def test_setpoint():
+    def measure(s, x):
+        return s + 20 * (x - 0.2 * np.sin(s / 30))
+
+    planner = attune.SetpointPlanner(
+        arrangement="arr", tune="m", instrument=instrument(), limits=(-1, 1), s=0
+    )
+    run(planner, measure, 5)
+    new = planner.instrument()
+    np.testing.assert_allclose(new["arr"]["m"].dependent, 0.2 * np.sin(SETPOINTS / 30), atol=1e-6)
+    # resolution bounds the refinement
+    run(planner, measure, 100)
+    x, _ = planner.samples(1300)
+    assert np.min(np.diff(x)) >= planner.resolution
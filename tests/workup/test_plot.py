@@ -0,0 +1,29 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from attune._plot import _create_figure
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        dict(width="single", nrows=2, cols=[1, "cbar"], default_aspect=0.5),
+        dict(default_aspect=0.5, cols=[1, "cbar"]),
+        dict(nrows=2, cols=[1, "cbar"]),
+        dict(width="double", nrows=2, cols=[1, 1, 1, "cbar"]),
+    ],
+)
+def test_create_figure(kwargs):
+    expected, expected_gs = _create_figure(**kwargs)
+    figures = plt.get_fignums()
+    fig, gs = _create_figure(pyplot=False, **kwargs)
+    # the same layout, without registering the figure with pyplot
+    assert plt.get_fignums() == figures
+    plt.close(expected)
+    np.testing.assert_allclose(fig.get_size_inches(), expected.get_size_inches())
+    np.testing.assert_allclose(gs.get_width_ratios(), expected_gs.get_width_ratios())
+    np.testing.assert_allclose(gs.get_height_ratios(), expected_gs.get_height_ratios())
+    assert vars(gs.get_subplot_params(fig)) == pytest.approx(
+        vars(expected_gs.get_subplot_params(expected))
+    )
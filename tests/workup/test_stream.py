@@ -0,0 +1,195 @@
+import itertools
+import pathlib
+
+import numpy as np
+import pytest
+import WrightTools as wt
+
+import attune
+from attune._common import axes_view
+from attune._holistic import _edge_crossings
+
+
+__here__ = pathlib.Path(__file__).parent
+
+
+def tune_test_data():
+    d = wt.open(__here__ / "tune_test" / "tunetest.wt5")
+    d.transform("w3", "wm-w3")
+    return d
+
+
+def setpoint_data():
+    rng = np.random.default_rng(1)
+    data = wt.Data(name="setpoint")
+    w1 = np.linspace(1300, 1400, 17)[:, None]
+    d1 = np.linspace(-1, 1, 41)[None, :]
+    data.create_variable("w1", values=w1, units="nm")
+    data.create_variable("d1", values=d1)
+    wm = w1 + 20 * (d1 - 0.2 * np.sin(w1 / 30)) + rng.normal(0, 0.5, (17, 41))
+    data.create_channel("wm", values=wm.astype(np.float32), units="nm")
+    data.transform("w1", "d1")
+    instr = attune.Instrument(
+        {"arr": attune.Arrangement("arr", {"d1": attune.Tune(w1[:, 0], np.zeros(17))})},
+        {"d1": attune.Setable("d1")},
+    )
+    return data, instr
+
+
+def feed(stream, data, channel):
+    # one slice at a time, as an acquisition would produce them
+    view = axes_view(data)
+    setpoints = view.axes[0].points
+    x = np.broadcast_to(view.axes[1][:], data[channel].shape)
+    for i in range(data[channel].shape[0]):
+        stream.append(setpoints[i], x[i], data[channel][i])
+        yield i
+
+
+@pytest.mark.parametrize("level", [False, True])
+@pytest.mark.parametrize("gtol", [None, 0.3])
+def test_tune_test(level, gtol):
+    d = tune_test_data()
+    instr = attune.open(__here__ / "tune_test" / "instrument_in.json")
+    kwargs = dict(arrangement="sfs", instrument=instr, level=level, gtol=gtol, ltol=0.5)
+    stream = attune.TuneTestStream(**kwargs)
+    for i in feed(stream, d, "signal_mean"):
+        if i == 2:
+            with pytest.raises(ValueError):
+                stream.instrument()
+        elif i in (12, 15):
+            # provisional results along the way do not change the final one
+            stream.instrument()
+    expected = attune.tune_test(
+        data=d, channel="signal_mean", plot=False, autosave=False, **kwargs
+    )
+    assert stream.instrument() == expected
+
+
+def test_intensity():
+    d = tune_test_data()
+    instr = attune.open(__here__ / "tune_test" / "instrument_in.json")
+    kwargs = dict(arrangement="sfs", tune="grating", instrument=instr, gtol=0.2, ltol=0.3)
+    stream = attune.IntensityStream(**kwargs)
+    for i in feed(stream, d, "signal_mean"):
+        if i > 5:
+            stream.instrument()
+    expected = attune.intensity(
+        data=d, channel="signal_mean", plot=False, autosave=False, **kwargs
+    )
+    assert stream.instrument() == expected
+
+
+@pytest.mark.parametrize("with_instrument", [False, True])
+def test_setpoint(with_instrument):
+    data, instr = setpoint_data()
+    kwargs = dict(arrangement="arr", tune="d1", instrument=instr if with_instrument else None)
+    stream = attune.SetpointStream(**kwargs)
+    for _ in feed(stream, data, "wm"):
+        pass
+    expected = attune.setpoint(data=data, channel="wm", plot=False, autosave=False, **kwargs)
+    assert stream.instrument() == expected
+
+
+def scattered_data(n=400):
+    rng = np.random.default_rng(2)
+    m1, m2 = rng.uniform(-1.5, 1.5, n), rng.uniform(-4, 4, n)
+    amp = np.exp(-((m2 - 2 * m1 - 0.5) ** 2) / 0.5) + 0.05
+    cen = 1350 + 40 * m1 + 5 * m2
+    data = wt.Data(name="holistic")
+    data.create_variable("c1", values=m1)
+    data.create_variable("c2", values=m2)
+    data.create_channel("amp", values=amp)
+    data.create_channel("cen", values=cen)
+    data.transform("c1", "c2")
+    setpoints = np.linspace(1320, 1380, 13)
+    arr = attune.Arrangement(
+        "arr", {c: attune.Tune(setpoints, np.zeros(13)) for c in ("c1", "c2")}
+    )
+    return data, attune.Instrument({"arr": arr})
+
+
+@pytest.mark.parametrize("gtol", [None, 0.1])
+def test_holistic(gtol):
+    data, instr = scattered_data()
+    kwargs = dict(arrangement="arr", tunes=["c1", "c2"], instrument=instr, gtol=gtol)
+    stream = attune.HolisticStream(**kwargs)
+    points = np.column_stack([data.c1[:], data.c2[:]])
+    for i, (p, a, c) in enumerate(zip(points, data.amp[:], data.cen[:])):
+        stream.append(p, a, c)
+        if i == 2:
+            with pytest.raises(ValueError):
+                stream.instrument()
+        elif i in (150, 151, 300):
+            stream.instrument()
+    assert stream.instrument().transition.metadata["points_received"] == len(points)
+    expected = attune.holistic(
+        data=data, channels=("amp", "cen"), plot=False, autosave=False, cache=False, **kwargs
+    )
+    # points in general position triangulate the same, incrementally or not
+    # amplitudes of iso points on edges next to rejected points may differ, as the batch
+    # interpolates them across a simplex
+    atol = 1e-8 if gtol is None else 0.01
+    for tune in ("c1", "c2"):
+        np.testing.assert_allclose(
+            stream.instrument()["arr"][tune].dependent,
+            expected["arr"][tune].dependent,
+            atol=atol,
+        )
+
+
+def test_holistic_refits_only_dirty(monkeypatch):
+    data, instr = scattered_data()
+    stream = attune.HolisticStream(arrangement="arr", tunes=["c1", "c2"], instrument=instr)
+    points = np.column_stack([data.c1[:], data.c2[:]])
+    for p, a, c in zip(points, data.amp[:], data.cen[:]):
+        stream.append(p, a, c)
+    stream.out_points
+    fit = []
+    original = attune._holistic.fit_gauss_centers
+    monkeypatch.setattr(
+        attune._holistic,
+        "fit_gauss_centers",
+        lambda xs, *args, **kwargs: fit.append(len(xs)) or original(xs, *args, **kwargs),
+    )
+    # a new point changes only the simplices around it, so only setpoints near its center
+    stream.append([0.01, 0.02], 1.0, 1350.5)
+    stream.out_points
+    assert 0 < max(fit) <= 3
+    fit.clear()
+    stream.out_points
+    assert not fit
+
+
+def test_holistic_incremental_state():
+    # gridded points are degenerate (cospherical), the hardest case to keep track of
+    m1, m2 = np.meshgrid(np.linspace(-1, 1, 9), np.linspace(-1, 1, 9), indexing="ij")
+    points = np.column_stack([m1.ravel(), m2.ravel()])
+    points = points[np.random.default_rng(0).permutation(len(points))]
+    amp = np.exp(-(points ** 2).sum(axis=1))
+    cen = 1350 + 25 * points[:, 0] + 5 * points[:, 1]
+    setpoints = np.linspace(1330, 1370, 9)
+    arr = attune.Arrangement("arr", {c: attune.Tune(setpoints, np.zeros(9)) for c in ("c1", "c2")})
+    stream = attune.HolisticStream(
+        arrangement="arr", tunes=["c1", "c2"], instrument=attune.Instrument({"arr": arr}), gtol=0.5
+    )
+    for i, (p, a, c) in enumerate(zip(points, amp, cen)):
+        stream.append(p, a, c)
+        if i % 4 != 3:
+            continue
+        stream.out_points
+        if stream._delaunay is None:
+            continue
+        # the state kept up to date incrementally, as found from scratch
+        simplices = np.sort(stream._delaunay.simplices, axis=1)
+        assert stream._simplices == set(map(tuple, simplices.tolist()))
+        edges = {}
+        for simplex in stream._simplices:
+            for e in itertools.combinations(simplex, 2):
+                edges[e] = edges.get(e, 0) + 1
+        assert stream._edge_counts == edges
+        valid = amp[: i + 1] >= amp[: i + 1].max() * 0.5
+        values = np.where(valid, cen[: i + 1], np.nan)
+        crossings = _edge_crossings(np.array(list(edges)), values, setpoints)
+        for expected, (start, stop, _, _) in zip(stream._crossings, crossings):
+            assert expected == {tuple(sorted(e)) for e in zip(start.tolist(), stop.tolist())}
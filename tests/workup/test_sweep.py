@@ -0,0 +1,78 @@
+import pathlib
+
+import numpy as np
+import pytest
+import WrightTools as wt
+
+import attune
+from attune._common import axes_view, clipped_centers
+
+
+__here__ = pathlib.Path(__file__).parent / "tune_test"
+
+
+def open_data():
+    d = wt.open(__here__ / "tunetest.wt5")
+    d.transform("w3", "wm-w3")
+    return d
+
+
+@pytest.mark.parametrize("level", [False, True])
+def test_centers(level):
+    d = open_data()
+    rows = attune.sweep(
+        "tune_test",
+        data=d,
+        channel="signal_mean",
+        level=[level],
+        gtol=[None, 0.01, 0.1],
+        ltol=[None, 0.5],
+        spline_kwargs=[{"k": 1, "s": 0}],
+    )
+    assert len(rows) == 6
+    view = axes_view(d)
+    order = np.argsort(view.axes[0].points)
+    for row in rows:
+        expected, _ = clipped_centers(
+            view, d.signal_mean, level=level, gtol=row["gtol"], ltol=row["ltol"]
+        )
+        # an interpolating spline passes through the centers which remain
+        expected = expected[order]
+        finite = np.isfinite(expected)
+        np.testing.assert_allclose(row["offsets"][finite], expected[finite])
+        assert row["nan_count"] == np.sum(~finite)
+
+
+def test_intensity():
+    d = open_data()
+    instr = attune.open(__here__ / "instrument_in.json")
+    kwargs = dict(data=d, channel="signal_mean", arrangement="sfs", tune="grating")
+    rows = attune.sweep(
+        "intensity", **kwargs, instrument=instr, gtol=[0.01, 0.05], spline_kwargs=[{"s": 0}, {}]
+    )
+    assert [(row["gtol"], row["spline_kwargs"]) for row in rows] == [
+        (0.01, {"s": 0}),
+        (0.01, {}),
+        (0.05, {"s": 0}),
+        (0.05, {}),
+    ]
+    for row in rows:
+        new = attune.intensity(
+            **kwargs,
+            instrument=instr,
+            gtol=row["gtol"],
+            plot=False,
+            cache=False,
+            autosave=False,
+            **row["spline_kwargs"],
+        )
+        np.testing.assert_allclose(
+            row["offsets"], new["sfs"]["grating"].dependent - instr["sfs"]["grating"].dependent
+        )
+    # only the interpolating spline passes through every center
+    assert rows[0]["residual"] < rows[1]["residual"]
+
+
+def test_unknown_workup():
+    with pytest.raises(ValueError):
+        attune.sweep("setpoint", data=open_data(), channel="signal_mean")
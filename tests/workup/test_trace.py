@@ -0,0 +1,109 @@
+import json
+
+import numpy as np
+import pytest
+
+import attune
+
+
+SETPOINTS = np.linspace(1300, 1500, 11)
+
+
+def truth():
+    arr = attune.Arrangement(
+        "sig",
+        {
+            "c": attune.Tune(SETPOINTS, 20 + 0.05 * (SETPOINTS - 1300)),
+            "d": attune.Tune(SETPOINTS, 2 + 0.3 * np.sin((SETPOINTS - 1300) / 50)),
+        },
+    )
+    return attune.Instrument({"sig": arr})
+
+
+def simulator():
+    return attune.OPASimulator(truth(), acceptance={"d": 0.2}, seed=0)
+
+
+def run(workup, **kwargs):
+    sim = simulator()
+    instrument = truth()
+    kwargs.setdefault("plot", False)
+    options = dict(instrument=instrument, autosave=False, cache=False, s=0, **kwargs)
+    if workup == "intensity":
+        data = sim.intensity(instrument, "sig", "d", np.linspace(-0.5, 0.5, 21))
+        return attune.intensity(
+            data=data, channel="signal", arrangement="sig", tune="d", **options
+        )
+    if workup == "setpoint":
+        data = sim.setpoint(instrument, "sig", "c", np.linspace(-1, 1, 21))
+        return attune.setpoint(data=data, channel="wm", arrangement="sig", tune="c", **options)
+    if workup == "tune_test":
+        data = sim.tune_test(instrument, "sig")
+        return attune.tune_test(data=data, channel="signal", arrangement="sig", **options)
+    data = sim.holistic("sig", {"c": np.linspace(19, 31, 31), "d": np.linspace(1, 3.5, 31)})
+    return attune.holistic(
+        data=data, channels=("amp", "cen"), arrangement="sig", tunes=["c", "d"], **options
+    )
+
+
+STAGES = {
+    "intensity": ["copy", "units", "cache", "clip", "read", "moments", "spline", "instrument"],
+    "setpoint": ["copy", "units", "cache", "read", "fit", "spline", "instrument"],
+    "tune_test": ["copy", "units", "cache", "clip", "read", "moments", "spline", "instrument"],
+    "holistic": ["copy", "clip", "cache", "iso", "fit", "spline", "instrument"],
+}
+
+
+@pytest.mark.parametrize("workup", STAGES)
+def test_stages(workup):
+    new = run(workup)
+    stages = new.transition.trace
+    assert list(stages) == STAGES[workup]
+    assert all(seconds >= 0 for seconds in stages.values())
+    # kept in memory only, unless asked for
+    assert "trace" not in new.transition.metadata
+
+
+def test_persisted(tmp_path):
+    new = run("intensity", plot=True, trace=True)
+    assert new.transition.metadata["trace"] is new.transition.trace
+    assert "plot" in new.transition.trace
+    with open(tmp_path / "instrument.json", "w") as f:
+        new.save(f)
+    with open(tmp_path / "instrument.json") as f:
+        saved = json.load(f)
+    assert saved["transition"]["metadata"]["trace"] == pytest.approx(new.transition.trace)
+
+
+def test_exclusive():
+    trace = attune._trace.Trace("test")
+    with trace.span("outer"):
+        with trace.span("inner"):
+            pass
+        with trace.span("inner"):
+            pass
+    assert list(trace.stages) == ["outer", "inner"]
+    with trace.span("outer"):
+        pass
+    assert len(trace.stages) == 2
+
+
+def test_metrics():
+    with attune.collect_metrics() as report:
+        run("setpoint")
+    assert report["setpoint.fit"]["count"] == 1
+    assert report["setpoint.spline"]["count"] == 1
+
+
+def test_report():
+    new = run("holistic", trace=True)
+    report = attune.trace_report(new)
+    lines = report.splitlines()
+    assert lines[0].split() == ["stage", "seconds", "%"]
+    assert [line.split()[0] for line in lines[1:]] == STAGES["holistic"] + ["total"]
+    assert float(lines[-1].split()[-1]) == pytest.approx(100)
+    # persisted timings are used when the in memory ones are gone
+    transition = attune._transition.Transition("holistic", metadata=new.transition.metadata)
+    assert attune.trace_report(transition) == report
+    with pytest.raises(ValueError):
+        attune.trace_report(truth())
@@ -1,5 +1,6 @@
 import attune
 import WrightTools as wt
+import matplotlib.pyplot as plt
 import numpy as np
 import pathlib
 
@@ -20,3 +21,52 @@ def test_tune_test():
     for tune, correct in zip(out["sfs"].values(), correct_out["sfs"].values()):
         assert np.allclose(tune.dependent, correct.dependent, atol=0.01)
         assert np.allclose(tune.independent, correct.independent, atol=0.01)
+
+
+def test_data_unchanged():
+    d = wt.open(__here__ / "tunetest.wt5")
+    instr = attune.open(__here__ / "instrument_in.json")
+    d.transform("w3", "wm-w3")
+    before = d.signal_mean[:]
+    attune.tune_test(
+        data=d,
+        channel=d.signal_mean,
+        arrangement="sfs",
+        instrument=instr,
+        level=True,
+        autosave=False,
+    )
+    # the workup reads the channel, without modifying or adding to the data
+    np.testing.assert_array_equal(d.signal_mean[:], before)
+    assert d.channel_names == wt.open(__here__ / "tunetest.wt5").channel_names
+
+
+def test_plot_modes(tmp_path):
+    d = wt.open(__here__ / "tunetest.wt5")
+    instr = attune.open(__here__ / "instrument_in.json")
+    d.transform("w3", "wm-w3")
+    kwargs = dict(data=d, channel="signal_mean", arrangement="sfs", instrument=instr)
+    plotted = attune.tune_test(**kwargs, save_directory=tmp_path)
+    assert (tmp_path / "tune_test.png").exists()
+
+    unplotted = tmp_path / "unplotted"
+    unplotted.mkdir()
+    out = attune.tune_test(**kwargs, plot=False, save_directory=unplotted)
+    assert [p.name for p in unplotted.iterdir()] == ["instrument.json"]
+    assert out == plotted
+
+    deferred = tmp_path / "deferred"
+    deferred.mkdir()
+    figures = plt.get_fignums()
+    out = attune.tune_test(**kwargs, plot="deferred", save_directory=deferred)
+    assert out == plotted
+    assert (deferred / "instrument.json").exists()
+    attune.wait_for_plots()
+    assert (deferred / "tune_test.png").exists()
+    # rendered in the background without pyplot, which is not thread safe
+    assert plt.get_fignums() == figures
+
+    # without autosave the figure would never be seen, so it is not rendered
+    out = attune.tune_test(**kwargs, plot="deferred", autosave=False)
+    assert out == plotted
+    assert attune.wait_for_plots() == 0